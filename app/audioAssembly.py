@@ -0,0 +1,184 @@
+import io
+import os
+import subprocess
+import time
+import wave
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import mediainfo
+
+try:
+    from . import telemetry
+except ImportError:
+    import telemetry
+
+
+SAMPLE_WIDTH = 2
+
+
+def silence(sample_rate, duration_ms):
+    return np.zeros(int(sample_rate * duration_ms / 1000), dtype=np.int16)
+
+
+def segment_to_pcm(segment, sample_rate):
+    segment = (
+        segment.set_channels(1)
+        .set_frame_rate(sample_rate)
+        .set_sample_width(SAMPLE_WIDTH)
+    )
+    return np.frombuffer(segment.raw_data, dtype=np.int16)
+
+
+def decode_clip(data, response_format, sample_rate):
+    if response_format == "pcm":
+        return np.frombuffer(data, dtype=np.int16)
+    segment = AudioSegment.from_file(io.BytesIO(data), format=response_format)
+    return segment_to_pcm(segment, sample_rate)
+
+
+def probe_duration(path):
+    """Length of an encoded audio file in seconds, or None if it can't be read."""
+    try:
+        if path.endswith(".wav"):
+            with wave.open(path) as audio:
+                return audio.getnframes() / audio.getframerate()
+        return float(mediainfo(path)["duration"])
+    except (OSError, KeyError, ValueError, wave.Error):
+        return None
+
+
+class PcmTrack:
+    """Mono 16-bit PCM collected as a list of chunks and joined once on export."""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.chunks = []
+        self.length = 0
+
+    def silence(self, duration_ms):
+        return silence(self.sample_rate, duration_ms)
+
+    def append(self, samples):
+        self.chunks.append(samples)
+        self.length += len(samples)
+
+    def to_array(self):
+        track = np.empty(self.length, dtype=np.int16)
+        offset = 0
+        for chunk in self.chunks:
+            track[offset : offset + len(chunk)] = chunk
+            offset += len(chunk)
+        return track
+
+    def duration_seconds(self):
+        return self.length / self.sample_rate
+
+    def export(self, output_filename, format=None):
+        format = format or os.path.splitext(output_filename)[1].lstrip(".") or "mp3"
+        segment = AudioSegment(
+            data=self.to_array().tobytes(),
+            sample_width=SAMPLE_WIDTH,
+            frame_rate=self.sample_rate,
+            channels=1,
+        )
+        self.chunks = []
+        self.length = 0
+        segment.export(output_filename, format=format)
+
+
+class StreamingEncoder:
+    """Encode mono 16-bit PCM to disk as it is written, in a single pass."""
+
+    def __init__(self, output_filename, sample_rate, format=None, bitrate="128k"):
+        self.output_filename = output_filename
+        self.sample_rate = sample_rate
+        self.format = (
+            format or os.path.splitext(output_filename)[1].lstrip(".") or "mp3"
+        )
+        self.frames_written = 0
+        self.encode_seconds = 0.0
+        self._started = time.time()
+        self._wav = None
+        self._process = None
+        if self.format == "wav":
+            self._wav = wave.open(output_filename, "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(SAMPLE_WIDTH)
+            self._wav.setframerate(sample_rate)
+        else:
+            self._process = subprocess.Popen(
+                [
+                    AudioSegment.converter,
+                    "-y",
+                    "-loglevel",
+                    "error",
+                    "-f",
+                    "s16le",
+                    "-ar",
+                    str(sample_rate),
+                    "-ac",
+                    "1",
+                    "-i",
+                    "pipe:0",
+                    "-b:a",
+                    bitrate,
+                    "-flush_packets",
+                    "1",
+                    "-f",
+                    self.format,
+                    output_filename,
+                ],
+                stdin=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+
+    def write(self, samples):
+        began = time.perf_counter()
+        samples = np.ascontiguousarray(samples, dtype=np.int16)
+        if self._wav is not None:
+            self._wav.writeframes(samples.tobytes())
+        else:
+            try:
+                self._process.stdin.write(memoryview(samples).cast("B"))
+            except BrokenPipeError:
+                self.close()
+                raise
+        self.frames_written += len(samples)
+        self.encode_seconds += time.perf_counter() - began
+
+    def duration_seconds(self):
+        return self.frames_written / self.sample_rate
+
+    def close(self):
+        if self._wav is None and self._process is None:
+            return
+        began = time.perf_counter()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+        else:
+            process, self._process = self._process, None
+            if not process.stdin.closed:
+                process.stdin.close()
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise RuntimeError(
+                    f"Encoding {self.output_filename} failed: {stderr.decode(errors='ignore')}"
+                )
+        self.encode_seconds += time.perf_counter() - began
+        # Only the time spent writing and finishing the file counts, not the time
+        # spent waiting for upstream stages to produce samples.
+        telemetry.record(
+            "encode",
+            self._started,
+            self.encode_seconds,
+            format=self.format,
+            audio_seconds=round(self.duration_seconds(), 3),
+        )
+        telemetry.count("encoded_audio_seconds_total", self.duration_seconds())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
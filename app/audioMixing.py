@@ -0,0 +1,176 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+
+SPEECH_LOUDNESS_DBFS = float(os.environ.get("PODCRAFT_SPEECH_LOUDNESS_DBFS", -18))
+MUSIC_LOUDNESS_DBFS = float(os.environ.get("PODCRAFT_MUSIC_LOUDNESS_DBFS", -22))
+MAX_GAIN_DB = 20.0
+PEAK_CEILING_DBFS = -1.0
+FADE_MS = 1500
+FADE_CURVE = os.environ.get("PODCRAFT_FADE_CURVE", "equal_power")
+TURN_PAUSE_MS = 400
+# Lines of dialogue the intro keeps playing under, attenuated by DUCK_DB.
+# 0 plays the whole intro before the first line, as before.
+DUCK_LINES = int(os.environ.get("PODCRAFT_DUCK_LINES", 0))
+DUCK_DB = float(os.environ.get("PODCRAFT_DUCK_DB", -14))
+DUCK_LEAD_MS = 3000
+DUCK_RAMP_MS = 300
+
+PCM_SCALE = 32768.0
+
+
+def db_to_gain(db):
+    return 10 ** (db / 20)
+
+
+def ms_to_samples(sample_rate, duration_ms):
+    return int(sample_rate * duration_ms / 1000)
+
+
+def to_float(samples, out=None):
+    """16-bit PCM as float32 in [-1, 1), converted in a single pass."""
+    if out is None:
+        out = np.empty(len(samples), dtype=np.float32)
+    np.multiply(samples, 1 / PCM_SCALE, out=out, casting="unsafe")
+    return out
+
+
+def to_pcm16(samples):
+    """Clip float32 samples in place and convert them to 16-bit PCM."""
+    np.clip(samples, -1.0, (PCM_SCALE - 1) / PCM_SCALE, out=samples)
+    samples *= PCM_SCALE
+    np.rint(samples, out=samples)
+    return samples.astype(np.int16)
+
+
+def rms_dbfs(samples):
+    if not len(samples):
+        return -np.inf
+    rms = np.sqrt(np.dot(samples, samples) / len(samples))
+    return 20 * np.log10(rms) if rms > 0 else -np.inf
+
+
+def normalize(samples, target_dbfs, max_gain_db=MAX_GAIN_DB):
+    """Scale samples in place to target_dbfs RMS without pushing peaks over the
+    ceiling or lifting near-silence by more than max_gain_db."""
+    level = rms_dbfs(samples)
+    if not np.isfinite(level):
+        return samples
+    gain = db_to_gain(min(target_dbfs - level, max_gain_db))
+    peak = float(np.max(np.abs(samples)))
+    gain = min(gain, db_to_gain(PEAK_CEILING_DBFS) / peak)
+    samples *= gain
+    return samples
+
+
+@lru_cache(maxsize=32)
+def fade_curve(length, curve=FADE_CURVE):
+    """Gain ramp from silence to unity over length samples."""
+    position = np.linspace(0.0, 1.0, length, dtype=np.float32)
+    if curve == "linear":
+        ramp = position
+    elif curve == "equal_power":
+        ramp = np.sin(position * (np.pi / 2))
+    elif curve == "logarithmic":
+        # Linear in decibels from -60 dB, which is how pydub fades.
+        ramp = np.where(position > 0, db_to_gain(60 * (position - 1)), 0.0)
+    else:
+        raise ValueError(f"Unknown fade curve: {curve}")
+    ramp = ramp.astype(np.float32)
+    ramp.flags.writeable = False
+    return ramp
+
+
+def fade(samples, sample_rate, fade_in_ms=0, fade_out_ms=0, curve=FADE_CURVE):
+    """Apply fade-in and fade-out curves to float32 samples in place."""
+    fade_in = min(ms_to_samples(sample_rate, fade_in_ms), len(samples))
+    fade_out = min(ms_to_samples(sample_rate, fade_out_ms), len(samples))
+    if fade_in:
+        samples[:fade_in] *= fade_curve(fade_in, curve)
+    if fade_out:
+        samples[len(samples) - fade_out :] *= fade_curve(fade_out, curve)[::-1]
+    return samples
+
+
+class EpisodeMixer:
+    """Mixes the intro and the dialogue clips into the final episode as they
+    arrive: every clip is normalized, followed by the turn pause and, for the
+    first DUCK_LINES lines, laid over the attenuated tail of the intro.
+
+    Each call returns 16-bit PCM ready for the encoder; start() goes before the
+    first clip and finish() after the last.
+    """
+
+    def __init__(
+        self,
+        sample_rate,
+        intro=None,
+        pause_ms=TURN_PAUSE_MS,
+        duck_lines=DUCK_LINES,
+        duck_db=DUCK_DB,
+        fade_ms=FADE_MS,
+        speech_dbfs=SPEECH_LOUDNESS_DBFS,
+        music_dbfs=MUSIC_LOUDNESS_DBFS,
+    ):
+        self.sample_rate = sample_rate
+        self.pause = ms_to_samples(sample_rate, pause_ms)
+        self.duck_lines = duck_lines
+        self.fade_ms = fade_ms
+        self.speech_dbfs = speech_dbfs
+        self.lines = 0
+        self._lead = np.zeros(0, dtype=np.float32)
+        self._bed = None
+        self._bed_offset = 0
+        if intro is not None and len(intro):
+            music = normalize(to_float(intro), music_dbfs)
+            fade(music, sample_rate, fade_in_ms=fade_ms, fade_out_ms=fade_ms)
+            lead = ms_to_samples(sample_rate, DUCK_LEAD_MS)
+            if duck_lines <= 0 or len(music) <= lead:
+                self._lead = music
+            else:
+                self._lead, self._bed = music[:lead], music[lead:]
+                self._bed *= db_to_gain(duck_db)
+                # Dip into the duck over a short ramp instead of stepping down.
+                ramp = min(ms_to_samples(sample_rate, DUCK_RAMP_MS), len(self._bed))
+                self._bed[:ramp] /= np.linspace(
+                    db_to_gain(duck_db), 1.0, ramp, dtype=np.float32
+                )
+
+    def start(self):
+        lead, self._lead = self._lead, np.zeros(0, dtype=np.float32)
+        return to_pcm16(lead)
+
+    def add(self, clip):
+        out = np.zeros(len(clip) + self.pause, dtype=np.float32)
+        normalize(to_float(clip, out=out[: len(clip)]), self.speech_dbfs)
+        self.lines += 1
+        if self._bed is not None:
+            remaining = len(self._bed) - self._bed_offset
+            overlap = min(remaining, len(out))
+            bed = self._bed[self._bed_offset : self._bed_offset + overlap]
+            if self.lines >= self.duck_lines and overlap < remaining:
+                # The last ducked line cuts the music short, so fade it out here.
+                fade(bed, self.sample_rate, fade_out_ms=self.fade_ms)
+                remaining = overlap
+            out[:overlap] += bed
+            self._bed_offset += overlap
+            if overlap >= remaining:
+                self._bed = None
+        return to_pcm16(out)
+
+    def finish(self):
+        """Music still left when the dialogue ran out."""
+        bed, self._bed = self._bed, None
+        if bed is None:
+            return np.zeros(0, dtype=np.int16)
+        return to_pcm16(bed[self._bed_offset :].copy())
+
+
+def mix_episode(intro, clips, sample_rate, **options):
+    """Mix a whole episode into one 16-bit PCM array."""
+    mixer = EpisodeMixer(sample_rate, intro, **options)
+    return np.concatenate(
+        [mixer.start(), *(mixer.add(clip) for clip in clips), mixer.finish()]
+    )
@@ -0,0 +1,92 @@
+import re
+from collections import namedtuple
+
+
+Turn = namedtuple("Turn", ["speaker", "text"])
+
+HOSTS = ("Ofir", "Daniel")
+
+SEGMENT_HEADING_PATTERN = re.compile(r"\*\*Segment \d+:.*?\*\*")
+SPEAKER_PATTERN = re.compile(
+    r"^(?:\*\*(?P<bold>Ofir|Daniel):\*\*(?P<space> )?|(?P<plain>Ofir|Daniel):)"
+)
+REVISED_SPEAKER_PATTERN = re.compile(r"^\W*(Ofir|Daniel)\W*:")
+LABEL_PATTERN = re.compile(
+    r"^\*\*(Ofir|Daniel):\*\*\s*|^(\*\*Ofir\*\*:\s*|\*\*Daniel\*\*:\s*)|(Ofir:|Daniel:)\s*"
+)
+BOLD_PATTERN = re.compile(r"\*\*(.*?)\*\*")
+SEGMENT_PATTERN = re.compile(r"\bsegment\s+\d+\b", re.IGNORECASE)
+OUTRO_PATTERN = re.compile(r"\boutro\b", re.IGNORECASE)
+SPACES_PATTERN = re.compile(r"\s{2,}")
+
+
+def other_host(speaker):
+    return HOSTS[1] if speaker == HOSTS[0] else HOSTS[0]
+
+
+def iter_lines(chunks):
+    """Split a stream of text chunks into lines without joining the whole stream."""
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_turns(lines):
+    """Yield a Turn per change of speaker from raw script lines; consecutive lines
+    of the same host are joined and unlabelled narration is skipped."""
+    speaker = None
+    parts = []
+    for line in lines:
+        if "**Segment" in line:
+            line = SEGMENT_HEADING_PATTERN.sub("", line)
+        match = SPEAKER_PATTERN.match(line)
+        if match is None:
+            continue
+        host = match.group("bold") or match.group("plain")
+        if match.group("bold") and not match.group("space"):
+            text = line.strip()
+        else:
+            text = line[match.end() :].strip()
+        if host != speaker:
+            if parts:
+                joined = " ".join(parts).strip()
+                if joined:
+                    yield Turn(speaker, joined)
+            parts = []
+            speaker = host
+        parts.append(text)
+    if parts:
+        joined = " ".join(parts).strip()
+        if joined:
+            yield Turn(speaker, joined)
+
+
+def clean_line(line):
+    cleaned_line = LABEL_PATTERN.sub("", line)
+    cleaned_line = BOLD_PATTERN.sub(r"\1", cleaned_line)
+    cleaned_line = SEGMENT_PATTERN.sub("", cleaned_line).strip()
+    cleaned_line = OUTRO_PATTERN.sub("", cleaned_line).strip()
+    return SPACES_PATTERN.sub(" ", cleaned_line)
+
+
+def iter_revised_turns(lines, first_speaker=HOSTS[0]):
+    """Yield cleaned Turns from revised script lines, following speaker labels
+    and alternating hosts for unlabelled lines."""
+    speaker = None
+    for line in lines:
+        if not line.strip():
+            continue
+        match = REVISED_SPEAKER_PATTERN.match(line)
+        if match:
+            speaker = match.group(1)
+        elif speaker is None:
+            speaker = first_speaker
+        else:
+            speaker = other_host(speaker)
+        text = clean_line(line)
+        if text:
+            yield Turn(speaker, text)
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from . import telemetry
+except ImportError:
+    import telemetry
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_dir():
+    return os.environ.get("PODCRAFT_CACHE_DIR", ".podcraft_cache")
+
+
+def content_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def open_cache(name, **kwargs):
+    path = os.path.join(cache_dir(), f"{name}.sqlite3")
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = DiskCache(path, **kwargs)
+            _caches[path] = cache
+    return cache
+
+
+class DiskCache:
+    def __init__(self, path, max_entries=None, max_bytes=None, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "accessed REAL NOT NULL, expires REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hits, misses):
+        with self._counter_lock:
+            self.hits += hits
+            self.misses += misses
+        if hits:
+            telemetry.count("cache_requests_total", hits, cache=self.name, result="hit")
+        if misses:
+            telemetry.count(
+                "cache_requests_total", misses, cache=self.name, result="miss"
+            )
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def __contains__(self, key):
+        """Whether key holds a live entry; unlike get() this neither refreshes
+        the entry nor counts as a hit or miss."""
+        row = (
+            self._connect()
+            .execute("SELECT expires FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def get_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        conn = self._connect()
+        found = {}
+        with conn:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value, expires FROM entries WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, value, expires in rows:
+                    if expires is None or expires > now:
+                        found[key] = value
+            if found:
+                conn.executemany(
+                    "UPDATE entries SET accessed = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, items, ttl=None):
+        if not items:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires = now + ttl if ttl else None
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed, expires) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, sqlite3.Binary(value), len(value), now, expires)
+                    for key, value in items.items()
+                ],
+            )
+            self._evict(conn)
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, conn):
+        conn.execute(
+            "DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        )
+        if self.max_entries is not None:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                stale = []
+                for key, size in conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed ASC"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def stats(self):
+        entries, size = (
+            self._connect()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+            .fetchone()
+        )
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
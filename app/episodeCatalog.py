@@ -0,0 +1,172 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    from .workspace import jobs_dir
+except ImportError:
+    from workspace import jobs_dir
+
+
+def episodes_dir():
+    return os.environ.get("PODCRAFT_EPISODES_DIR", "")
+
+
+def catalog_db_path():
+    return os.environ.get(
+        "PODCRAFT_CATALOG_DB", os.path.join(jobs_dir(), "catalog.sqlite3")
+    )
+
+
+def file_etag(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+class EpisodeCatalog:
+    """Index of published episodes, shared by the API and the job workers."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS episodes ("
+                "id TEXT PRIMARY KEY, topic TEXT NOT NULL, job_id TEXT, "
+                "filename TEXT NOT NULL, path TEXT NOT NULL, duration REAL, "
+                "size INTEGER NOT NULL, etag TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS episodes_filename ON episodes (filename)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS episodes_created ON episodes (created)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS topic_vectors ("
+                "episode_id TEXT NOT NULL, model TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (episode_id, model))"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, topic, path, job_id=None, duration=None, episode_id=None):
+        episode = {
+            "id": episode_id or job_id or uuid.uuid4().hex,
+            "topic": topic,
+            "job_id": job_id,
+            "filename": os.path.basename(path),
+            "path": os.path.abspath(path),
+            "duration": duration,
+            "size": os.path.getsize(path),
+            "etag": file_etag(path),
+            "created": time.time(),
+        }
+        conn = self._connect()
+        with conn:
+            # Re-rendering an episode keeps its place in /episodes and the dedup window.
+            existing = conn.execute(
+                "SELECT created FROM episodes WHERE id = ?", (episode["id"],)
+            ).fetchone()
+            if existing is not None:
+                episode["created"] = existing[0]
+            # A new episode published to the same path replaces the old file.
+            conn.execute(
+                "DELETE FROM topic_vectors WHERE episode_id = ? OR episode_id IN "
+                "(SELECT id FROM episodes WHERE path = ?)",
+                (episode["id"], episode["path"]),
+            )
+            conn.execute("DELETE FROM episodes WHERE path = ?", (episode["path"],))
+            conn.execute(
+                f"INSERT OR REPLACE INTO episodes ({', '.join(episode)}) "
+                f"VALUES ({', '.join('?' * len(episode))})",
+                tuple(episode.values()),
+            )
+        return episode
+
+    def get(self, episode_id):
+        row = (
+            self._connect()
+            .execute("SELECT * FROM episodes WHERE id = ?", (episode_id,))
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def find(self, filename):
+        row = (
+            self._connect()
+            .execute(
+                "SELECT * FROM episodes WHERE filename = ? ORDER BY created DESC",
+                (filename,),
+            )
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def list(self, limit=50, offset=0):
+        rows = self._connect().execute(
+            "SELECT * FROM episodes ORDER BY created DESC LIMIT ? OFFSET ?",
+            (limit, offset),
+        )
+        return [dict(row) for row in rows]
+
+    def recent(self, since):
+        rows = self._connect().execute(
+            "SELECT * FROM episodes WHERE created >= ? ORDER BY created DESC", (since,)
+        )
+        return [dict(row) for row in rows]
+
+    def topic_vectors(self, episode_ids, model):
+        """Stored topic embeddings for episode_ids, as raw float32 bytes by id."""
+        if not episode_ids:
+            return {}
+        placeholders = ",".join("?" * len(episode_ids))
+        rows = self._connect().execute(
+            f"SELECT episode_id, vector FROM topic_vectors "
+            f"WHERE model = ? AND episode_id IN ({placeholders})",
+            (model, *episode_ids),
+        )
+        return {row["episode_id"]: row["vector"] for row in rows}
+
+    def set_topic_vectors(self, vectors, model):
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO topic_vectors (episode_id, model, vector) "
+                "VALUES (?, ?, ?)",
+                [(episode_id, model, vector) for episode_id, vector in vectors.items()],
+            )
+
+    def remove(self, episode_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM topic_vectors WHERE episode_id = ?", (episode_id,))
+            conn.execute("DELETE FROM episodes WHERE id = ?", (episode_id,))
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def episode_catalog():
+    path = catalog_db_path()
+    with _catalogs_lock:
+        if path not in _catalogs:
+            _catalogs[path] = EpisodeCatalog(path)
+        return _catalogs[path]
@@ -0,0 +1,162 @@
+import difflib
+import json
+import os
+
+import numpy as np
+
+try:
+    from .dialogueParser import HOSTS, REVISED_SPEAKER_PATTERN, clean_line, other_host
+    from .workspace import jobs_dir
+except ImportError:
+    from dialogueParser import HOSTS, REVISED_SPEAKER_PATTERN, clean_line, other_host
+    from workspace import jobs_dir
+
+
+# How similar a rewritten line must be to an old one to keep its voice.
+EDIT_MATCH_RATIO = 0.5
+
+
+def timeline_dir():
+    return os.environ.get("PODCRAFT_TIMELINE_DIR", os.path.join(jobs_dir(), "timelines"))
+
+
+def timeline_paths(episode_id):
+    """(PCM timeline, manifest, pending edit) paths for a published episode."""
+    base = os.path.join(timeline_dir(), episode_id)
+    return f"{base}.pcm", f"{base}.json", f"{base}.edit.txt"
+
+
+class TimelineRecorder:
+    """Keeps the mixed 16-bit PCM of an episode next to a manifest of where each
+    turn lies in it, so single turns can be replaced later without a full render."""
+
+    def __init__(self, pcm_path, manifest_path, **info):
+        self.pcm_path = pcm_path
+        self.manifest_path = manifest_path
+        self.manifest = {**info, "intro": None, "turns": [], "tail": None}
+        self.offset = 0
+        self._file = open(pcm_path, "wb")
+
+    def _append(self, samples):
+        samples = np.ascontiguousarray(samples, dtype=np.int16)
+        self._file.write(samples.tobytes())
+        segment = {"start": self.offset, "length": len(samples)}
+        self.offset += len(samples)
+        return segment
+
+    def intro(self, samples):
+        self.manifest["intro"] = self._append(samples)
+
+    def turn(self, samples, voice, text, clip):
+        self.manifest["turns"].append(
+            {"voice": voice, "text": text, "clip": clip, **self._append(samples)}
+        )
+
+    def tail(self, samples):
+        self.manifest["tail"] = self._append(samples)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        with open(self.manifest_path, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_manifest(manifest_path):
+    with open(manifest_path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def read_timeline(pcm_path):
+    return np.memmap(pcm_path, dtype=np.int16, mode="r")
+
+
+def segment_samples(timeline, segment):
+    if segment is None:
+        return timeline[:0]
+    return timeline[segment["start"] : segment["start"] + segment["length"]]
+
+
+def format_dialogue(turns, voices):
+    """The turns as labelled lines, in the form parse_dialogue_edit reads back."""
+    speakers = {voice: host for host, voice in voices.items()}
+    return "\n".join(f"{speakers[turn['voice']]}: {turn['text']}" for turn in turns)
+
+
+def align_lines(old_texts, new_texts):
+    """Map each edited line to the old line it keeps or rewrites, by text.
+
+    Rewritten lines are paired in order when a block keeps its line count, and
+    otherwise with the most similar old line of the block, if any is close enough.
+    """
+    matcher = difflib.SequenceMatcher(a=old_texts, b=new_texts, autojunk=False)
+    aligned = {}
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        same_length = old_end - old_start == new_end - new_start
+        if tag == "equal" or (tag == "replace" and same_length):
+            for offset in range(new_end - new_start):
+                aligned[new_start + offset] = old_start + offset
+        elif tag == "replace":
+            for new in range(new_start, new_end):
+                ratio, old = max(
+                    (
+                        difflib.SequenceMatcher(
+                            a=old_texts[old], b=new_texts[new], autojunk=False
+                        ).ratio(),
+                        old,
+                    )
+                    for old in range(old_start, old_end)
+                )
+                if ratio >= EDIT_MATCH_RATIO:
+                    aligned[new] = old
+    return aligned
+
+
+def parse_dialogue_edit(dialogue, turns, voices):
+    """(voice, text) for every line of an edited revised dialogue.
+
+    Lines may start with a host label to pick the voice. Unlabelled lines keep the
+    voice of the turn they are aligned to by text, so inserting or deleting a line
+    leaves the other lines with their host; lines with no counterpart alternate
+    from the previous line, as in iter_revised_turns.
+    """
+    speakers = {voice: host for host, voice in voices.items()}
+    lines = []
+    for line in dialogue.splitlines():
+        match = REVISED_SPEAKER_PATTERN.match(line)
+        text = clean_line(line)
+        if text:
+            lines.append((match.group(1) if match else None, text))
+    aligned = align_lines([turn["text"] for turn in turns], [text for _, text in lines])
+
+    speaker = None
+    edited = []
+    for index, (label, text) in enumerate(lines):
+        if label:
+            speaker = label
+        elif index in aligned:
+            speaker = speakers.get(turns[aligned[index]]["voice"], HOSTS[0])
+        else:
+            speaker = HOSTS[0] if speaker is None else other_host(speaker)
+        edited.append((voices[speaker], text))
+    return edited
+
+
+def match_turns(turns, edited):
+    """Map each edited line that is unchanged, text and voice, to its old turn."""
+    matcher = difflib.SequenceMatcher(
+        a=[(turn["voice"], turn["text"]) for turn in turns], b=edited, autojunk=False
+    )
+    reused = {}
+    for tag, old_start, old_end, new_start, _ in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(old_end - old_start):
+                reused[new_start + offset] = old_start + offset
+    return reused
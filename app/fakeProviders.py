@@ -0,0 +1,124 @@
+"""Offline stand-ins for the OpenAI, Gemini and MusicGen providers.
+
+Set PODCRAFT_FAKE_PROVIDERS=1 (or call install()) to run the whole pipeline
+without network access or model weights.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+try:
+    from . import providers
+except ImportError:
+    import providers
+
+
+EMBEDDING_DIMENSIONS = 64
+SPEECH_SAMPLE_RATE = 24000
+SPEECH_SECONDS_PER_WORD = 0.05
+
+
+def fake_embedding(text):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS).tolist()
+
+
+def fake_dialogue(label):
+    return f"Ofir: Let's talk about {label}.\n\nDaniel: Sure, {label} it is.\n"
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.embeddings = SimpleNamespace(create=self._embeddings)
+        self.audio = SimpleNamespace(speech=SimpleNamespace(create=self._speech))
+
+    def _record(self, kind, **kwargs):
+        with self._lock:
+            self.calls.append((kind, kwargs))
+        time.sleep(self.latency)
+
+    def _chat(self, model, messages, **kwargs):
+        self._record("chat", model=model)
+        message = SimpleNamespace(content=messages[-1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def _embeddings(self, input, model):
+        self._record("embeddings", model=model)
+        texts = [input] if isinstance(input, str) else list(input)
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=index, embedding=fake_embedding(text))
+                for index, text in enumerate(texts)
+            ]
+        )
+
+    def _speech(self, model, voice, input, response_format="mp3"):
+        self._record("speech", model=model, voice=voice)
+        samples = int(
+            len(input.split()) * SPEECH_SECONDS_PER_WORD * SPEECH_SAMPLE_RATE
+        )
+        return SimpleNamespace(content=np.zeros(samples, dtype=np.int16).tobytes())
+
+
+class FakeChat:
+    def __init__(self, model):
+        self.model = model
+        self.turns = 0
+
+    def send_message(self, prompt, stream=False, **kwargs):
+        self.turns += 1
+        return self.model.generate_content(f"segment {self.turns}", stream=stream)
+
+
+class FakeGemini:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def start_chat(self, history=None):
+        return FakeChat(self)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+        time.sleep(self.latency)
+        if "Write an outline" in prompt:
+            return [
+                SimpleNamespace(text=f"{number}. Fake topic {number}\n")
+                for number in range(1, 11)
+            ]
+        match = re.search(r"segment (\d+)", prompt)
+        label = f"topic {match.group(1)}" if match else "the news"
+        return [SimpleNamespace(text=fake_dialogue(label))]
+
+
+class FakeMusicGen:
+    sample_rate = 32000
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.params = {}
+
+    def set_generation_params(self, **params):
+        self.params = params
+
+    def generate(self, descriptions):
+        time.sleep(self.latency)
+        samples = int(self.params.get("duration", 1) * self.sample_rate)
+        return [np.zeros((1, samples), dtype=np.float32) for _ in descriptions]
+
+
+def install(latency=0.0):
+    providers.override("openai", FakeOpenAI(latency))
+    providers.override("gemini", FakeGemini(latency))
+    providers.override("music", FakeMusicGen(latency))
@@ -0,0 +1,166 @@
+import asyncio
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_POLL_SECONDS = float(os.environ.get("PODCRAFT_STREAM_POLL_SECONDS", 0.5))
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Return the (start, end) byte range, inclusive, requested by a single-range
+    Range header, or None to send the whole file."""
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            suffix = int(last)
+            if suffix == 0:
+                raise RangeNotSatisfiable(header)
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def iter_file(path, start, end, chunk_size=STREAM_CHUNK_SIZE):
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def read_growing(file, path, finished, chunk_size):
+    # Checked before reading, so nothing written before it finished is lost.
+    done = finished() or not os.path.exists(path)
+    return done, file.read(chunk_size)
+
+
+async def iter_growing_file(
+    path, finished, chunk_size=STREAM_CHUNK_SIZE, poll_seconds=STREAM_POLL_SECONDS
+):
+    """Stream a file that is still being written, from the start, until finished()
+    and its end has been sent. The writer may move the file away once it is done;
+    the open handle keeps reading it. Disk access and finished() run in the thread
+    pool so they never block the event loop."""
+    while not await run_in_threadpool(os.path.exists, path):
+        if await run_in_threadpool(finished):
+            return
+        await asyncio.sleep(poll_seconds)
+    try:
+        file = await run_in_threadpool(open, path, "rb")
+    except FileNotFoundError:
+        return
+    try:
+        while True:
+            done, chunk = await run_in_threadpool(
+                read_growing, file, path, finished, chunk_size
+            )
+            if chunk:
+                yield chunk
+            elif done:
+                return
+            else:
+                await asyncio.sleep(poll_seconds)
+    finally:
+        file.close()
+
+
+def weak_etag(stat):
+    return f'W/"{stat.st_size:x}-{int(stat.st_mtime * 1000):x}"'
+
+
+def etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in candidates or etag.removeprefix("W/") in [
+        tag.removeprefix("W/") for tag in candidates
+    ]
+
+
+def if_range_matches(header, etag):
+    """If-Range needs a strong match (RFC 9110), so weak tags never match; a date
+    isn't trusted either. Either way the client gets the whole file."""
+    header = header.strip()
+    return header == etag and not etag.startswith("W/")
+
+
+def not_modified_since(header, mtime):
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def file_response(request, path, filename=None, etag=None, media_type=None):
+    """Serve path with Range, ETag and conditional GET support, streaming the body
+    in chunks."""
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = etag or weak_etag(stat)
+    media_type = media_type or mimetypes.guess_type(path)[0] or "audio/mpeg"
+    filename = filename or os.path.basename(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif not_modified_since(request.headers.get("if-modified-since"), stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and not if_range_matches(if_range, etag):
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        iter_file(path, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -0,0 +1,409 @@
+import io
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import Future
+import numpy as np
+
+try:
+    from . import telemetry
+    from .diskCache import content_key, open_cache
+    from .jingleLibrary import jingle_library
+    from .musicRequests import MUSIC_RESULT_TTL, music_requests
+except ImportError:
+    import telemetry
+    from diskCache import content_key, open_cache
+    from jingleLibrary import jingle_library
+    from musicRequests import MUSIC_RESULT_TTL, music_requests
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+MUSIC_MODEL_NAME = "facebook/musicgen-small"
+INTRO_PARAMS = {"duration": 7}
+INTRO_CACHE_BYTES = int(os.environ.get("PODCRAFT_INTRO_CACHE_BYTES", 256 * 1024 * 1024))
+# Longest an episode should wait for its own intro before borrowing the nearest
+# jingle from the library, and the generation time assumed before any is measured.
+INTRO_LATENCY_BUDGET = float(os.environ.get("PODCRAFT_INTRO_LATENCY_BUDGET", 30))
+INTRO_GENERATION_SECONDS = float(os.environ.get("PODCRAFT_INTRO_GENERATION_SECONDS", 10))
+# Jingles less similar than this to the wanted description aren't borrowed.
+JINGLE_MIN_SIMILARITY = float(os.environ.get("PODCRAFT_JINGLE_MIN_SIMILARITY", 0.9))
+INTRO_SPECULATIVE_DEPTH = int(os.environ.get("PODCRAFT_INTRO_SPECULATIVE_DEPTH", 2))
+MUSIC_MAX_BATCH = int(os.environ.get("PODCRAFT_MUSIC_MAX_BATCH", 4))
+MUSIC_BATCH_WINDOW = float(os.environ.get("PODCRAFT_MUSIC_BATCH_WINDOW", 0.25))
+MUSIC_POLL_SECONDS = 0.05
+# How long a leader keeps the lock, and MusicGen loaded, with nothing to render.
+MUSIC_IDLE_SECONDS = float(os.environ.get("PODCRAFT_MUSIC_IDLE_SECONDS", 300))
+
+# Requests on behalf of an episode always run before speculative renders.
+FOREGROUND = 0
+BACKGROUND = 1
+
+
+def normalize_description(description):
+    return " ".join(description.lower().split())
+
+
+def intro_key(description, params=INTRO_PARAMS):
+    return content_key(
+        "intro", MUSIC_MODEL_NAME, normalize_description(description), sorted(params.items())
+    )
+
+
+def intro_cache():
+    return open_cache("intro_music", max_bytes=INTRO_CACHE_BYTES)
+
+
+def encode_wav(wav, sample_rate):
+    if isinstance(wav, np.ndarray):
+        samples = np.clip(wav.reshape(-1), -1.0, 1.0)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(sample_rate)
+            output.writeframes((samples * 32767).astype(np.int16).tobytes())
+        return buffer.getvalue()
+
+    from audiocraft.data.audio import audio_write
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = audio_write(
+            os.path.join(tmp, "intro"), wav.cpu(), sample_rate, strategy="loudness"
+        )
+        with open(path, "rb") as file:
+            return file.read()
+
+
+class MusicWorker:
+    """Renders intros off the request path, batching requests from every job.
+
+    Requests go into the shared music request store. The worker thread of one
+    process at a time holds the leader lock: it owns the MusicGen model, waits
+    MUSIC_BATCH_WINDOW for requests to pile up, then renders up to
+    MUSIC_MAX_BATCH descriptions with one generate call. Every process's thread
+    collects the results for its own requests and exits once it has nothing
+    left to wait for. A leader stays up with the model loaded until it has had
+    nothing to render for MUSIC_IDLE_SECONDS, then resigns and drops the model,
+    so MusicGen is only held by the process leading now.
+
+    With an embed function the worker also fills the jingle library: every render
+    is indexed there, and after each batch, if no episode is waiting, it queues
+    pre-renders of the most requested descriptions and the seed descriptions it
+    was given that have no intro yet.
+    """
+
+    def __init__(self, load_model, embed=None, seeds=(), unload_model=None):
+        self.load_model = load_model
+        self.unload_model = unload_model
+        self.embed = embed
+        self.seeds = list(seeds)
+        self.model = None
+        self.generation_seconds = INTRO_GENERATION_SECONDS
+        self.store = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._lock_file = None
+        self._leading = False
+        self._thread = None
+
+    @property
+    def library(self):
+        return jingle_library() if self.embed is not None else None
+
+    def _store(self):
+        # Bound on first use so a worker keeps talking to one store.
+        if self.store is None:
+            self.store = music_requests()
+        return self.store
+
+    def start(self):
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="music-worker", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, description, params=INTRO_PARAMS, priority=FOREGROUND):
+        key = intro_key(description, params)
+        store = self._store()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending[1] <= priority:
+                return pending[0]
+            # A waiting episode promotes an already queued speculative render.
+            future = pending[0] if pending is not None else Future()
+            self._pending[key] = (future, priority, description)
+            # Speculative renders aren't on behalf of the job this process runs.
+            job_id = telemetry.current_job() if priority == FOREGROUND else None
+            store.enqueue(key, description, params, priority, job_id=job_id)
+            self._start_locked()
+        self._wake.set()
+        return future
+
+    def batch_seconds(self):
+        return self._store().get_meta("batch_seconds", self.generation_seconds)
+
+    def estimated_wait(self):
+        """Seconds until a new foreground request would finish rendering."""
+        counts = self._store().active_counts()
+        waiting = sum(
+            count for (priority, _), count in counts.items() if priority == FOREGROUND
+        )
+        batches = -(-(waiting + 1) // MUSIC_MAX_BATCH)
+        # Renders can't be interrupted, so a speculative batch in progress counts.
+        if counts.get((BACKGROUND, "running")):
+            batches += 1
+        return batches * self.batch_seconds()
+
+    def speculate(self):
+        """Queue background renders for wanted descriptions that have no intro yet,
+        unless an episode is waiting for one: a started batch can't be interrupted,
+        so it would hold up that episode's intro."""
+        library = self.library
+        if library is None or INTRO_SPECULATIVE_DEPTH <= 0:
+            return []
+        store = self._store()
+        counts = store.active_counts()
+        if any(priority == FOREGROUND for priority, _ in counts):
+            return []
+        queued = sum(
+            count for (priority, _), count in counts.items() if priority == BACKGROUND
+        )
+        wanted = {}
+        for description in library.trending() + self.seeds:
+            wanted.setdefault(intro_key(description), description)
+        with self._lock:
+            keys = [key for key in wanted if key not in self._pending]
+        requested = store.requested(keys)
+        cache = intro_cache()
+        futures = []
+        for key in keys:
+            if queued + len(futures) >= INTRO_SPECULATIVE_DEPTH:
+                break
+            if key in requested or key in cache or key in library:
+                continue
+            futures.append(self.submit(wanted[key], priority=BACKGROUND))
+        return futures
+
+    def _lead(self):
+        if self._leading:
+            return True
+        if fcntl is None:
+            # No cross-process lock available: each process batches its own work.
+            self._leading = True
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(self.store.path + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self._leading = True
+        # Anything still running was claimed by a leader that has since died.
+        self.store.requeue_running()
+        return True
+
+    def _resign(self):
+        if self._leading and fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._leading = False
+        self.release_model()
+
+    def release_model(self):
+        """Drop MusicGen, so only the process leading right now holds it."""
+        if self.model is None:
+            return
+        self.model = None
+        if self.unload_model is not None:
+            self.unload_model()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _run(self):
+        store = self.store
+        last_render = time.monotonic()
+        while True:
+            rendered = False
+            try:
+                if self._lead():
+                    rendered = self._render_batch()
+                    if rendered:
+                        self.speculate()
+                self._collect()
+            except Exception as e:
+                logging.info(f"Music worker error: {e}")
+            if rendered:
+                last_render = time.monotonic()
+            idle = time.monotonic() - last_render
+            with self._lock:
+                rendering = self._leading and (
+                    idle < MUSIC_IDLE_SECONDS or store.oldest_pending() is not None
+                )
+                busy = self._pending or rendering
+                if not busy:
+                    self._resign()
+                    self._thread = None
+                    return
+            if not rendered:
+                self._wake.wait(MUSIC_POLL_SECONDS)
+                self._wake.clear()
+
+    def _render_batch(self):
+        oldest = self.store.oldest_pending()
+        if oldest is None:
+            return False
+        window = oldest + MUSIC_BATCH_WINDOW - time.time()
+        time.sleep(max(0.0, min(window, MUSIC_BATCH_WINDOW)))
+        batch = self.store.claim(MUSIC_MAX_BATCH)
+        if not batch:
+            return False
+        keys = [request["key"] for request in batch]
+        try:
+            results = self._generate(batch)
+        except Exception as e:
+            logging.info(f"Intro generation failed for {len(batch)} descriptions: {e}")
+            self.store.fail(keys, str(e))
+        else:
+            self.store.complete(results)
+            missing = [key for key in keys if key not in results]
+            if missing:
+                self.store.fail(missing, "MusicGen returned no audio")
+        self.store.purge(time.time() - MUSIC_RESULT_TTL)
+        return True
+
+    def _generate(self, batch):
+        if self.model is None:
+            self.model = self.load_model()
+        priority = batch[0]["priority"]
+        label = "foreground" if priority == FOREGROUND else "background"
+        descriptions = [request["description"] for request in batch]
+        started_at = time.time()
+        for request in batch:
+            telemetry.observe(
+                "music_queue_seconds", started_at - request["enqueued"], priority=label
+            )
+        telemetry.observe("music_batch_size", len(batch), priority=label)
+        stage = "musicgen" if priority == FOREGROUND else "musicgen_speculative"
+        # Recorded on the jobs waiting for the batch, not the leader's own job.
+        jobs = sorted({job_id for request in batch for job_id in request["jobs"]})
+        with telemetry.span(stage, jobs=jobs, descriptions=len(batch)):
+            started = time.perf_counter()
+            self.model.set_generation_params(**batch[0]["params"])
+            wavs = self.model.generate(descriptions)
+            results = {
+                request["key"]: encode_wav(wav, self.model.sample_rate)
+                for request, wav in zip(batch, wavs)
+            }
+        elapsed = time.perf_counter() - started
+        self.store.set_meta(
+            "batch_seconds", 0.8 * self.batch_seconds() + 0.2 * elapsed
+        )
+        return results
+
+    def _collect(self):
+        with self._lock:
+            waiting = dict(self._pending)
+        for key, (status, data, error) in self.store.results(list(waiting)).items():
+            future, _, description = waiting[key]
+            if status == "done":
+                intro_cache().set(key, data)
+                self._index(key, description, data)
+                future.set_result(data)
+            else:
+                future.set_exception(RuntimeError(error))
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _index(self, key, description, data):
+        library = self.library
+        if library is None or key in library:
+            return
+        try:
+            library.add(key, description, self.embed(description), data)
+        except Exception as e:
+            logging.info(f"Could not add '{description}' to the jingle library: {e}")
+
+
+def write_intro(data, output_stem):
+    output_path = f"{output_stem}.wav"
+    with open(output_path, "wb") as file:
+        file.write(data)
+    return output_path
+
+
+def borrow_jingle(worker, description, min_similarity=JINGLE_MIN_SIMILARITY):
+    """Nearest library jingle for description, or None if the library has none
+    at least min_similarity close."""
+    try:
+        match = worker.library.nearest(worker.embed(description))
+    except Exception as e:
+        logging.info(f"Jingle library lookup failed for '{description}': {e}")
+        match = None
+    if match is not None and match[1] < min_similarity:
+        logging.info(
+            f"Nearest intro '{match[0]}' is too far from '{description}' "
+            f"(similarity {match[1]:.3f})"
+        )
+        match = None
+    telemetry.count(
+        "jingle_library_lookups_total", result="miss" if match is None else "hit"
+    )
+    if match is None:
+        return None
+    nearest, similarity, data = match
+    logging.info(
+        f"Borrowing intro '{nearest}' for '{description}' (similarity {similarity:.3f})"
+    )
+    return data
+
+
+def request_intro(
+    worker, description, output_stem, params=INTRO_PARAMS, budget=INTRO_LATENCY_BUDGET
+):
+    result = Future()
+    key = intro_key(description, params)
+    library = worker.library
+    if library is not None:
+        library.record_request(normalize_description(description))
+    data = intro_cache().get(key)
+    if data is None and library is not None:
+        data = library.get(key)
+    if data is not None:
+        logging.info(f"Intro music cache hit for '{description}'")
+        telemetry.count("intro_requests_total", source="cache")
+        result.set_result(write_intro(data, output_stem))
+        worker.speculate()
+        return result
+
+    if library is not None and worker.estimated_wait() > budget:
+        data = borrow_jingle(worker, description)
+        if data is not None:
+            telemetry.count("intro_requests_total", source="library")
+            result.set_result(write_intro(data, output_stem))
+            # Render the real intro when the worker is idle, for next time.
+            worker.submit(description, params, priority=BACKGROUND)
+            return result
+    telemetry.count("intro_requests_total", source="generated")
+
+    def finish(generation):
+        try:
+            result.set_result(write_intro(generation.result(), output_stem))
+        except Exception as e:
+            result.set_exception(e)
+
+    worker.submit(description, params).add_done_callback(finish)
+    return result
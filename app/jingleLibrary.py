@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .diskCache import cache_dir
+    from .similarity import cosine_similarities
+except ImportError:
+    from diskCache import cache_dir
+    from similarity import cosine_similarities
+
+
+JINGLE_LIBRARY_SIZE = int(os.environ.get("PODCRAFT_JINGLE_LIBRARY_SIZE", 64))
+JINGLE_DEMAND_WINDOW_HOURS = float(
+    os.environ.get("PODCRAFT_JINGLE_DEMAND_WINDOW_HOURS", 72)
+)
+
+
+def jingle_db_path():
+    return os.environ.get(
+        "PODCRAFT_JINGLE_DB", os.path.join(cache_dir(), "jingles.sqlite3")
+    )
+
+
+class JingleLibrary:
+    """Bounded set of rendered intros indexed by description embedding, plus the
+    request counts the pre-generation scheduler uses to pick what to render."""
+
+    def __init__(self, path, max_entries=JINGLE_LIBRARY_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jingles ("
+                "key TEXT PRIMARY KEY, description TEXT NOT NULL, "
+                "vector BLOB NOT NULL, data BLOB NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS demand ("
+                "description TEXT PRIMARY KEY, count INTEGER NOT NULL, "
+                "last_requested REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, key, description, vector, data):
+        now = time.time()
+        vector = np.asarray(vector, dtype=np.float32).tobytes()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jingles "
+                "(key, description, vector, data, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, description, vector, data, now, now),
+            )
+            conn.execute(
+                "DELETE FROM jingles WHERE key NOT IN "
+                "(SELECT key FROM jingles ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def _touch(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE jingles SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def get(self, key):
+        row = (
+            self._connect()
+            .execute("SELECT data FROM jingles WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        self._touch(key)
+        return row["data"]
+
+    def __contains__(self, key):
+        return (
+            self._connect()
+            .execute("SELECT 1 FROM jingles WHERE key = ?", (key,))
+            .fetchone()
+            is not None
+        )
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM jingles").fetchone()[0]
+
+    def nearest(self, vector):
+        """Return (description, similarity, data) for the closest jingle, or None."""
+        rows = self._connect().execute("SELECT key, description, vector FROM jingles")
+        rows = rows.fetchall()
+        if not rows:
+            return None
+        vectors = np.vstack(
+            [np.frombuffer(row["vector"], dtype=np.float32) for row in rows]
+        )
+        similarities = cosine_similarities(np.asarray(vector, dtype=np.float32), vectors)
+        best = int(np.argmax(similarities))
+        data = self.get(rows[best]["key"])
+        if data is None:
+            return None
+        return rows[best]["description"], float(similarities[best]), data
+
+    def record_request(self, description):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO demand (description, count, last_requested) "
+                "VALUES (?, 1, ?) ON CONFLICT (description) DO UPDATE SET "
+                "count = count + 1, last_requested = excluded.last_requested",
+                (description, time.time()),
+            )
+
+    def trending(self, limit=None, window_hours=JINGLE_DEMAND_WINDOW_HOURS, now=None):
+        """Most requested descriptions within the demand window, all of them if
+        limit is None."""
+        since = (now or time.time()) - window_hours * 3600
+        rows = self._connect().execute(
+            "SELECT description FROM demand WHERE last_requested >= ? "
+            "ORDER BY count DESC, last_requested DESC LIMIT ?",
+            (since, -1 if limit is None else limit),
+        )
+        return [row["description"] for row in rows]
+
+
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+
+def jingle_library():
+    path = jingle_db_path()
+    with _libraries_lock:
+        if path not in _libraries:
+            _libraries[path] = JingleLibrary(path)
+        return _libraries[path]
@@ -0,0 +1,311 @@
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from . import telemetry
+    from .workspace import jobs_dir
+except ImportError:
+    import telemetry
+    from workspace import jobs_dir
+
+
+JOB_WORKERS = int(os.environ.get("PODCRAFT_JOB_WORKERS", 2))
+MAX_QUEUE_DEPTH = int(os.environ.get("PODCRAFT_MAX_QUEUE_DEPTH", 16))
+
+# Progress at the start of each stage, in order. Script generation, revision and
+# speech synthesis overlap, so "audio" covers most of a job and reports how far
+# through the clips it is.
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "script": 0.05,
+    "audio": 0.15,
+    "publish": 0.95,
+    "completed": 1.0,
+}
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def stage_progress(stage, fraction=None):
+    """Progress for a stage, fraction of the way to the start of the next one."""
+    start = STAGE_PROGRESS.get(stage, 0.0)
+    if fraction is None:
+        return start
+    later = [value for value in STAGE_PROGRESS.values() if value > start]
+    end = min(later) if later else start
+    return start + min(max(fraction, 0.0), 1.0) * (end - start)
+
+
+def jobs_db_path():
+    return os.environ.get("PODCRAFT_JOBS_DB", os.path.join(jobs_dir(), "jobs.sqlite3"))
+
+
+class JobStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, topic TEXT NOT NULL, status TEXT NOT NULL, "
+                "stage TEXT NOT NULL, progress REAL NOT NULL, result TEXT, error TEXT, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                "created REAL NOT NULL, updated REAL NOT NULL, "
+                "kind TEXT NOT NULL DEFAULT 'episode')"
+            )
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if "kind" not in columns:
+                conn.execute(
+                    "ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'episode'"
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, topic, max_active=None, kind="episode"):
+        return self.create_or_join(topic, max_active=max_active, kind=kind)[0]
+
+    def create_or_join(self, topic, key=None, max_active=None, kind="episode"):
+        """Create a job for topic, or return an active job of the same kind whose
+        topic has the same key(topic). Returns (job_id, created)."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if key is not None:
+                for job in self.list(ACTIVE_STATUSES, kind=kind):
+                    if not job["cancel_requested"] and key(job["topic"]) == key(topic):
+                        conn.execute("COMMIT")
+                        return job["id"], False
+            if max_active is not None and self.count_active(kind) >= max_active:
+                raise QueueFull(f"Job queue is full ({max_active} active jobs)")
+            conn.execute(
+                "INSERT INTO jobs "
+                "(id, topic, status, stage, progress, created, updated, kind) "
+                "VALUES (?, ?, 'queued', 'queued', 0.0, ?, ?, ?)",
+                (job_id, topic, now, now, kind),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id, True
+
+    def get(self, job_id):
+        row = (
+            self._connect()
+            .execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        job = dict(row)
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def list(self, statuses, kind=None):
+        placeholders = ",".join("?" * len(statuses))
+        query = f"SELECT * FROM jobs WHERE status IN ({placeholders})"
+        params = list(statuses)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        rows = self._connect().execute(query + " ORDER BY created", params)
+        return [dict(row) for row in rows]
+
+    def update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._connect().execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+        )
+
+    def set_stage(self, job_id, stage, progress=None):
+        if progress is None:
+            progress = stage_progress(stage)
+        self.update(job_id, stage=stage, progress=progress)
+
+    def request_cancel(self, job_id):
+        self.update(job_id, cancel_requested=1)
+
+    def cancel_requested(self, job_id):
+        row = (
+            self._connect()
+            .execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+            .fetchone()
+        )
+        return bool(row and row[0])
+
+    def count_active(self, kind=None):
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        query = f"SELECT COUNT(*) FROM jobs WHERE status IN ({placeholders})"
+        params = list(ACTIVE_STATUSES)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        return self._connect().execute(query, params).fetchone()[0]
+
+
+def run_job(db_path, job_id, topic, task):
+    store = JobStore(db_path)
+    if store.cancel_requested(job_id):
+        store.update(job_id, status="cancelled")
+        return None
+
+    stages = []
+    progress = [0.0]
+
+    def on_stage(stage, fraction=None):
+        """Report the stage the job is in and, optionally, how far through it."""
+        if store.cancel_requested(job_id):
+            raise JobCancelled(job_id)
+        if stages[-1:] != [stage]:
+            stages.append(stage)
+            telemetry.flush()
+        # Estimates can shrink as more work turns up; progress never goes back.
+        progress[0] = max(progress[0], stage_progress(stage, fraction))
+        store.set_stage(job_id, stage, progress[0])
+
+    store.update(job_id, status="running")
+    telemetry.set_job(job_id)
+    try:
+        with telemetry.span("job", topic=topic):
+            result = task(topic, job_id=job_id, on_stage=on_stage)
+    except JobCancelled:
+        store.update(job_id, status="cancelled")
+        return None
+    except Exception as e:
+        store.update(job_id, status="failed", error=str(e))
+        raise
+    finally:
+        telemetry.set_job(None)
+        telemetry.flush()
+    store.update(job_id, status="completed", stage="completed", progress=1.0, result=result)
+    return result
+
+
+class JobQueue:
+    """Persistent job queue that runs generation tasks on a process pool."""
+
+    def __init__(
+        self,
+        task,
+        workers=JOB_WORKERS,
+        max_queue_depth=MAX_QUEUE_DEPTH,
+        executor=None,
+        coalesce_key=None,
+        kind="episode",
+        initializer=None,
+        initargs=(),
+    ):
+        self.task = task
+        self.initializer = initializer
+        self.initargs = initargs
+        self.coalesce_key = coalesce_key
+        self.kind = kind
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = executor
+        self._store = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        path = jobs_db_path()
+        if self._store is None or self._store.path != path:
+            self._store = JobStore(path)
+        return self._store
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            return self._executor
+
+    def submit(self, topic):
+        job_id, created = self.store.create_or_join(
+            topic,
+            key=self.coalesce_key,
+            max_active=self.max_queue_depth,
+            kind=self.kind,
+        )
+        if not created:
+            telemetry.count("jobs_coalesced_total")
+            return job_id
+        self._dispatch(job_id, topic)
+        return job_id
+
+    def _dispatch(self, job_id, topic):
+        future = self.executor().submit(run_job, self.store.path, job_id, topic, self.task)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda done: self._finished(job_id, done))
+
+    def _finished(self, job_id, future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+        if not future.cancelled() and future.exception() is not None:
+            logging.info(f"Job {job_id} failed: {future.exception()}")
+
+    def status(self, job_id):
+        job = self.store.get(job_id)
+        if job is not None:
+            job["timeline"] = telemetry.job_timeline(job_id)
+        return job
+
+    def cancel(self, job_id):
+        job = self.store.get(job_id)
+        if job is None or job["kind"] != self.kind:
+            return None
+        if job["status"] in FINISHED_STATUSES:
+            return job
+        self.store.request_cancel(job_id)
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self.store.update(job_id, status="cancelled")
+        return self.store.get(job_id)
+
+    def recover(self):
+        for job in self.store.list(("running",), kind=self.kind):
+            self.store.update(job["id"], status="failed", error="Interrupted by restart")
+        for job in self.store.list(("queued",), kind=self.kind):
+            self._dispatch(job["id"], job["topic"])
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
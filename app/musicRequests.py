@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from .workspace import jobs_dir
+except ImportError:
+    from workspace import jobs_dir
+
+
+MUSIC_RESULT_TTL = float(os.environ.get("PODCRAFT_MUSIC_RESULT_TTL", 300))
+
+
+def music_db_path():
+    return os.environ.get("PODCRAFT_MUSIC_DB", os.path.join(jobs_dir(), "music.sqlite3"))
+
+
+class MusicRequestStore:
+    """Intro renders requested by every process, so whichever process holds the
+    model can generate them in batches and hand the audio back."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS requests ("
+                "key TEXT PRIMARY KEY, description TEXT NOT NULL, params TEXT NOT NULL, "
+                "priority INTEGER NOT NULL, status TEXT NOT NULL, data BLOB, error TEXT, "
+                "enqueued REAL NOT NULL, updated REAL NOT NULL, "
+                "jobs TEXT NOT NULL DEFAULT '[]')"
+            )
+            columns = conn.execute("PRAGMA table_info(requests)").fetchall()
+            if "jobs" not in [column["name"] for column in columns]:
+                conn.execute(
+                    "ALTER TABLE requests ADD COLUMN jobs TEXT NOT NULL DEFAULT '[]'"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS requests_status ON requests (status, priority)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def enqueue(self, key, description, params, priority, job_id=None):
+        """Queue a render, or join one already queued. job_id is the job waiting
+        for it, so the leader can record the render on that job's timeline."""
+
+        def work(conn):
+            row = conn.execute(
+                "SELECT status, priority, jobs FROM requests WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None or row["status"] == "failed":
+                conn.execute(
+                    "INSERT OR REPLACE INTO requests "
+                    "(key, description, params, priority, status, enqueued, updated, "
+                    "jobs) VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)",
+                    (
+                        key,
+                        description,
+                        json.dumps(params, sort_keys=True),
+                        priority,
+                        now,
+                        now,
+                        json.dumps([job_id] if job_id else []),
+                    ),
+                )
+                return
+            if row["status"] == "pending" and priority < row["priority"]:
+                conn.execute(
+                    "UPDATE requests SET priority = ?, updated = ? WHERE key = ?",
+                    (priority, now, key),
+                )
+            jobs = json.loads(row["jobs"])
+            active = row["status"] in ("pending", "running")
+            if job_id and active and job_id not in jobs:
+                conn.execute(
+                    "UPDATE requests SET jobs = ? WHERE key = ?",
+                    (json.dumps(jobs + [job_id]), key),
+                )
+
+        self._transaction(work)
+
+    def oldest_pending(self):
+        return (
+            self._connect()
+            .execute("SELECT MIN(enqueued) FROM requests WHERE status = 'pending'")
+            .fetchone()[0]
+        )
+
+    def claim(self, max_batch):
+        """Mark up to max_batch pending requests running and return them. A batch
+        shares generation params and priority, so speculative renders never slow
+        down an episode that is waiting."""
+
+        def work(conn):
+            first = conn.execute(
+                "SELECT params, priority FROM requests WHERE status = 'pending' "
+                "ORDER BY priority, enqueued LIMIT 1"
+            ).fetchone()
+            if first is None:
+                return []
+            rows = conn.execute(
+                "SELECT key, description, params, priority, enqueued, jobs "
+                "FROM requests WHERE status = 'pending' AND params = ? AND priority = ? "
+                "ORDER BY enqueued LIMIT ?",
+                (first["params"], first["priority"], max_batch),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE requests SET status = 'running', updated = ? WHERE key = ?",
+                [(time.time(), row["key"]) for row in rows],
+            )
+            return [
+                {
+                    **dict(row),
+                    "params": json.loads(row["params"]),
+                    "jobs": json.loads(row["jobs"]),
+                }
+                for row in rows
+            ]
+
+        return self._transaction(work)
+
+    def complete(self, results):
+        now = time.time()
+        self._transaction(
+            lambda conn: conn.executemany(
+                "UPDATE requests SET status = 'done', data = ?, updated = ? WHERE key = ?",
+                [(sqlite3.Binary(data), now, key) for key, data in results.items()],
+            )
+        )
+
+    def fail(self, keys, error):
+        now = time.time()
+        self._transaction(
+            lambda conn: conn.executemany(
+                "UPDATE requests SET status = 'failed', error = ?, updated = ? "
+                "WHERE key = ?",
+                [(error, now, key) for key in keys],
+            )
+        )
+
+    def results(self, keys):
+        """(status, data, error) for each finished request in keys."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connect().execute(
+            f"SELECT key, status, data, error FROM requests "
+            f"WHERE key IN ({placeholders}) AND status IN ('done', 'failed')",
+            list(keys),
+        )
+        return {row["key"]: (row["status"], row["data"], row["error"]) for row in rows}
+
+    def requested(self, keys):
+        """The keys in keys that are queued, rendering or rendered."""
+        if not keys:
+            return set()
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connect().execute(
+            f"SELECT key FROM requests "
+            f"WHERE key IN ({placeholders}) AND status != 'failed'",
+            list(keys),
+        )
+        return {row["key"] for row in rows}
+
+    def active_counts(self):
+        """Pending and running requests by priority."""
+        rows = self._connect().execute(
+            "SELECT priority, status, COUNT(*) AS count FROM requests "
+            "WHERE status IN ('pending', 'running') GROUP BY priority, status"
+        )
+        return {(row["priority"], row["status"]): row["count"] for row in rows}
+
+    def requeue_running(self):
+        """Return requests claimed by a leader that died back to the queue."""
+        self._connect().execute(
+            "UPDATE requests SET status = 'pending' WHERE status = 'running'"
+        )
+
+    def purge(self, older_than):
+        self._connect().execute(
+            "DELETE FROM requests WHERE status IN ('done', 'failed') AND updated < ?",
+            (older_than,),
+        )
+
+    def get_meta(self, name, default=None):
+        row = (
+            self._connect()
+            .execute("SELECT value FROM meta WHERE name = ?", (name,))
+            .fetchone()
+        )
+        return default if row is None else row["value"]
+
+    def set_meta(self, name, value):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value)
+        )
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def music_requests():
+    path = music_db_path()
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = MusicRequestStore(path)
+        return _stores[path]
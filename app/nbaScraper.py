@@ -0,0 +1,163 @@
+import codecs
+import json
+import logging
+import os
+import threading
+import time
+from html.parser import HTMLParser
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .diskCache import content_key, open_cache
+except ImportError:
+    from diskCache import content_key, open_cache
+
+
+NBA_RECAP_FRESH_SECONDS = float(os.environ.get("PODCRAFT_NBA_RECAP_FRESH", 3600))
+NBA_REQUEST_TIMEOUT = float(os.environ.get("PODCRAFT_NBA_TIMEOUT", 15))
+NOT_FOUND_MESSAGE = "Start or end tag not found."
+NBA_RECAP_TOPICS = ("nba", "basketball")
+
+_session = None
+_session_lock = threading.Lock()
+# Jobs wanting a recap wait for one fetch of it; there is one recap page a day,
+# so a single lock is enough.
+_recap_lock = threading.Lock()
+
+
+def http_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def is_recap_topic(topic):
+    """Whether topic gets yesterday's NBA recap rather than Wikipedia content."""
+    return topic.lower() in NBA_RECAP_TOPICS
+
+
+def recap_cache():
+    return open_cache("nba_recaps", max_entries=64)
+
+
+class RecapParser(HTMLParser):
+    """Collect the text between the <b> heading containing start_marker and the
+    <b> heading containing end_marker, stopping as soon as the end is seen."""
+
+    def __init__(self, start_marker, end_marker):
+        super().__init__()
+        self.start_marker = start_marker
+        self.end_marker = end_marker
+        self.started = False
+        self.finished = False
+        self.pieces = []
+        self._bold = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "b" and self._bold is None:
+            self._bold = []
+
+    def handle_endtag(self, tag):
+        if tag != "b" or self._bold is None:
+            return
+        bold, self._bold = self._bold, None
+        text = "".join(bold)
+        if not self.started:
+            if self.start_marker in text:
+                self.started = True
+                self._keep(bold)
+        elif self.end_marker in text:
+            self.finished = True
+        else:
+            self._keep(bold)
+
+    def handle_data(self, data):
+        if self.finished:
+            return
+        if self._bold is not None:
+            self._bold.append(data)
+        elif self.started:
+            self._keep([data])
+
+    def _keep(self, pieces):
+        self.pieces.extend(piece.strip() for piece in pieces if piece.strip())
+
+
+def parse_recap(chunks, start_date, end_date, encoding=None):
+    parser = RecapParser(start_date, end_date)
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.finished:
+            break
+    if not parser.finished:
+        return None
+    return " ".join(parser.pieces)
+
+
+def recap_unavailable(entry, error):
+    """An episode goes ahead without fresh scores when the recap site is down,
+    using the last recap fetched for the same dates if there is one."""
+    logging.info(f"NBA recap unavailable: {error}")
+    return entry["recap"] if entry else NOT_FOUND_MESSAGE
+
+
+def scrape_nba_games_between_dates(url, start_date, end_date):
+    key = content_key("recap", url, start_date, end_date)
+    with _recap_lock:
+        cached = recap_cache().get(key)
+        entry = json.loads(cached) if cached is not None else None
+        if entry and time.time() - entry["fetched"] < NBA_RECAP_FRESH_SECONDS:
+            return entry["recap"]
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = http_session().get(
+                url, headers=headers, stream=True, timeout=NBA_REQUEST_TIMEOUT
+            )
+        except requests.RequestException as e:
+            return recap_unavailable(entry, e)
+        try:
+            if response.status_code == 304 and entry:
+                logging.info("NBA recap page not modified, reusing parsed recap")
+                recap = entry["recap"]
+            else:
+                response.raise_for_status()
+                elements = parse_recap(
+                    response.iter_content(chunk_size=16384),
+                    start_date,
+                    end_date,
+                    response.encoding,
+                )
+                if elements is None:
+                    return NOT_FOUND_MESSAGE
+                recap = "Recap of yesterday's games: " + elements
+        except requests.RequestException as e:
+            return recap_unavailable(entry, e)
+        finally:
+            response.close()
+
+        entry = {
+            "recap": recap,
+            "fetched": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if response.status_code == 304:
+            entry["etag"] = entry["etag"] or headers.get("If-None-Match")
+            entry["last_modified"] = entry["last_modified"] or headers.get(
+                "If-Modified-Since"
+            )
+        recap_cache().set(key, json.dumps(entry).encode("utf-8"))
+        return recap
@@ -0,0 +1,77 @@
+import os
+import queue
+import threading
+
+
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PODCRAFT_PIPELINE_QUEUE_SIZE", 8))
+POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class Threaded:
+    """Iterator over items produced on a background thread. stop() makes the
+    producer quit before its next item and join() waits for it to exit."""
+
+    def __init__(self, iterable, name=None, maxsize=PIPELINE_QUEUE_SIZE, stop=None):
+        self._iterable = iterable
+        self._items = queue.Queue(maxsize)
+        self._stop = stop or threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._produce, name=name, daemon=True)
+        self._thread.start()
+
+    def _put(self, entry):
+        while not self._stop.is_set():
+            try:
+                self._items.put(entry, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for item in self._iterable:
+                if not self._put((item, None)):
+                    break
+        except BaseException as e:
+            self._put((_DONE, e))
+        else:
+            self._put((_DONE, None))
+        finally:
+            # Lets generators release their own workers when the consumer stops early.
+            close = getattr(self._iterable, "close", None)
+            if close is not None:
+                close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self._finished:
+            try:
+                item, error = self._items.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise StopIteration
+                continue
+            if item is not _DONE:
+                return item
+            self._finished = True
+            if error is not None:
+                raise error
+        raise StopIteration
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+def threaded(iterable, name=None, maxsize=PIPELINE_QUEUE_SIZE, stop=None):
+    """Start consuming iterable on a background thread right away and return an
+    iterator over its items; errors are re-raised in the consumer. At most maxsize
+    items are buffered, and setting stop ends the producer at its next item."""
+    return Threaded(iterable, name=name, maxsize=maxsize, stop=stop)
@@ -1,38 +1,91 @@
 import logging
-import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+import threading
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import os
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 from dotenv import dotenv_values
 
 try:
+    from . import providers, telemetry
+    from .audioAssembly import probe_duration
+    from .episodeCatalog import episode_catalog, episodes_dir
+    from .episodeTimeline import (
+        format_dialogue,
+        load_manifest,
+        timeline_dir,
+        timeline_paths,
+    )
+    from .fileStreaming import file_response, iter_growing_file
+    from .jobQueue import ACTIVE_STATUSES, JobQueue, QueueFull
     from .podcastCreator import (
-        getScriptfromGemini,
-        merge_text_files,
-        total_revision_process,
-        generate_audio,
-        add_intro_music,
+        HOST_VOICES,
+        get_embeddings,
+        rerender_episode,
+        stream_podcast,
     )
+    from .topicDedup import DEDUP_MODEL, find_duplicate, normalize_topic
+    from .workspace import JobWorkspace, jobs_dir
 except ImportError:
+    import providers
+    import telemetry
+    from audioAssembly import probe_duration
+    from episodeCatalog import episode_catalog, episodes_dir
+    from episodeTimeline import (
+        format_dialogue,
+        load_manifest,
+        timeline_dir,
+        timeline_paths,
+    )
+    from fileStreaming import file_response, iter_growing_file
+    from jobQueue import ACTIVE_STATUSES, JobQueue, QueueFull
     from podcastCreator import (
-        getScriptfromGemini,
-        merge_text_files,
-        total_revision_process,
-        generate_audio,
-        add_intro_music,
+        HOST_VOICES,
+        get_embeddings,
+        rerender_episode,
+        stream_podcast,
     )
+    from topicDedup import DEDUP_MODEL, find_duplicate, normalize_topic
+    from workspace import JobWorkspace, jobs_dir
 
 
 class Podcast(BaseModel):
     podcastname: str
     creation_date: datetime
     file_path: str
+    episode_id: Optional[str] = None
+    job_id: Optional[str] = None
+    duration: Optional[float] = None
+    size: Optional[int] = None
+    download_url: Optional[str] = None
+
+
+def to_podcast(episode):
+    return Podcast(
+        podcastname=episode["topic"],
+        creation_date=datetime.fromtimestamp(episode["created"]),
+        file_path=episode["filename"],
+        episode_id=episode["id"],
+        job_id=episode["job_id"],
+        duration=episode["duration"],
+        size=episode["size"],
+        download_url=f"/episodes/{episode['id']}/audio",
+    )
+
+
+class DialogueEdit(BaseModel):
+    dialogue: str
 
 
 config = dotenv_values()
 
+# Built in every job worker as it starts. MusicGen is left to whichever worker
+# leads music rendering, and the API process itself stays lightweight.
+WARM_PROVIDERS = os.environ.get("PODCRAFT_WARM_PROVIDERS", "openai,gemini")
+
 app = FastAPI()
 
 
@@ -43,41 +96,275 @@ async def read_item():
     }
 
 
+@app.on_event("startup")
+async def recover_jobs():
+    job_queue.recover()
+    edit_queue.recover()
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    job_queue.shutdown(wait=False)
+    edit_queue.shutdown(wait=False)
+
+
+def existing_episode(topic):
+    try:
+        return find_duplicate(
+            topic, lambda texts: get_embeddings(texts, model=DEDUP_MODEL)
+        )
+    except Exception as e:
+        logging.info(f"Topic dedup lookup failed, generating anyway: {e}")
+        return None
+
+
 @app.post("/generate_podcast/")
-async def generate_podcast(background_tasks: BackgroundTasks, topic: str):
-    background_tasks.add_task(podcast_generation_task, topic)
-    return {"message": "Podcast generation started in the background"}
+async def generate_podcast(topic: str, fresh: bool = False):
+    episode = None if fresh else await run_in_threadpool(existing_episode, topic)
+    if episode is not None:
+        return {
+            "message": "An episode on this topic already exists",
+            "job_id": episode["job_id"],
+            "episode": to_podcast(episode),
+        }
+    try:
+        job_id = job_queue.submit(topic)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {
+        "message": "Podcast generation started in the background",
+        "job_id": job_id,
+        "stream_url": f"/jobs/{job_id}/audio",
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/audio")
+async def stream_job_audio(job_id: str, request: Request):
+    """Play an episode while it renders: the encoder's output is sent as it grows,
+    and a finished job serves the published episode."""
+    job = job_queue.store.get(job_id)
+    if job is None or job["kind"] != job_queue.kind:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in ACTIVE_STATUSES:
+        episode = episode_catalog().get(job_id)
+        if episode is None:
+            raise HTTPException(
+                status_code=404, detail=f"Job {job['status']} without an episode"
+            )
+        return serve_episode(request, episode)
+
+    def finished():
+        job = job_queue.store.get(job_id)
+        return job is None or job["status"] not in ACTIVE_STATUSES
+
+    workspace = JobWorkspace(os.path.join(jobs_dir(), job_id), job_id)
+    telemetry.count("live_streams_total")
+    return StreamingResponse(
+        iter_growing_file(workspace.episode(job["topic"]), finished),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(
+        telemetry.render_metrics(), media_type="text/plain; version=0.0.4"
+    )
+
 
+@app.get("/episodes", response_model=List[Podcast])
+async def list_episodes(limit: int = 50, offset: int = 0):
+    return [to_podcast(episode) for episode in episode_catalog().list(limit, offset)]
 
-@app.get("/download/{filename}")
-async def download_file(filename: str):
-    file_path = f"./{filename}"
+
+@app.get("/episodes/{episode_id}", response_model=Podcast)
+async def get_episode(episode_id: str):
+    episode = episode_catalog().get(episode_id)
+    if episode is None:
+        raise HTTPException(status_code=404, detail="Episode not found")
+    return to_podcast(episode)
+
+
+def serve_episode(request, episode):
+    if not os.path.exists(episode["path"]):
+        raise HTTPException(status_code=404, detail="File not found")
+    # Only trust the stored ETag while the file is the one that was catalogued.
+    unchanged = os.path.getsize(episode["path"]) == episode["size"]
+    return file_response(
+        request,
+        episode["path"],
+        filename=episode["filename"],
+        etag=episode["etag"] if unchanged else None,
+    )
+
+
+@app.api_route("/episodes/{episode_id}/audio", methods=["GET", "HEAD"])
+async def stream_episode(episode_id: str, request: Request):
+    episode = episode_catalog().get(episode_id)
+    if episode is None:
+        raise HTTPException(status_code=404, detail="Episode not found")
+    return serve_episode(request, episode)
+
+
+def episode_manifest(episode_id):
+    episode = episode_catalog().get(episode_id)
+    if episode is None:
+        raise HTTPException(status_code=404, detail="Episode not found")
+    pcm_path, manifest_path, _ = timeline_paths(episode_id)
+    if not (os.path.exists(pcm_path) and os.path.exists(manifest_path)):
+        raise HTTPException(status_code=409, detail="Episode has no timeline to edit")
+    return episode, load_manifest(manifest_path)
+
+
+@app.get("/episodes/{episode_id}/dialogue")
+async def get_dialogue(episode_id: str):
+    _, manifest = episode_manifest(episode_id)
+    return {
+        "episode_id": episode_id,
+        "dialogue": format_dialogue(manifest["turns"], HOST_VOICES),
+        "turns": [
+            {"voice": turn["voice"], "text": turn["text"]} for turn in manifest["turns"]
+        ],
+    }
+
+
+@app.put("/episodes/{episode_id}/dialogue")
+async def edit_dialogue(episode_id: str, edit: DialogueEdit):
+    episode_manifest(episode_id)
+    _, _, edit_path = timeline_paths(episode_id)
+    with open(edit_path + ".tmp", "w", encoding="utf-8") as file:
+        file.write(edit.dialogue)
+    # The edit job renders whichever edit is pending when it starts.
+    os.replace(edit_path + ".tmp", edit_path)
+    try:
+        job_id = edit_queue.submit(episode_id)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"message": "Episode re-render started in the background", "job_id": job_id}
+
+
+@app.api_route("/download/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request):
+    episode = episode_catalog().find(filename)
+    if episode is not None and os.path.exists(episode["path"]):
+        return serve_episode(request, episode)
+    file_path = os.path.join(episodes_dir() or ".", os.path.basename(filename))
     if os.path.exists(file_path):
-        return FileResponse(path=file_path, filename=filename, media_type="audio/mpeg")
+        return file_response(request, file_path, filename=filename)
     raise HTTPException(status_code=404, detail="File not found")
 
 
-def podcast_generation_task(topic: str):
+def podcast_generation_task(topic: str, job_id=None, on_stage=None):
+    report = on_stage or (lambda stage, fraction=None: None)
+    workspace = JobWorkspace.create(job_id=job_id)
     try:
-        logging.basicConfig(
-            filename="logging.log",
-            filemode="w",
-            level=logging.INFO,
-            format="%(asctime)s:%(levelname)s:%(message)s",
-        )
-        getScriptfromGemini(topic)
-        logging.info("Script downloaded from Gemini")
-        merge_text_files("host1.txt", "host2.txt", "merged_dialogue.txt")
-        logging.info("Dialogue merged")
-        total_revision_process("merged_dialogue.txt")
-        logging.info("Dialogue revised")
-        generate_audio("revised_dialogue.txt", "final_podcast.mp3")
+        telemetry.configure_logging()
+        episode = stream_podcast(topic, workspace=workspace, on_stage=report)
         logging.info("Audio generated")
-        add_intro_music("introMusic.wav", "final_podcast.mp3", topic)
+        report("publish")
+        if episodes_dir():
+            os.makedirs(episodes_dir(), exist_ok=True)
+        published = os.path.join(episodes_dir(), os.path.basename(episode))
+        os.replace(episode, published)
+        telemetry.count("episode_bytes_total", os.path.getsize(published))
+        entry = episode_catalog().add(
+            topic, published, job_id=job_id, duration=probe_duration(published)
+        )
+        publish_timeline(workspace, entry["id"])
         logging.info("Podcast Completed")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+        return entry["filename"]
+    except Exception:
+        logging.exception(f"Podcast generation failed for '{topic}'")
+        raise
+    finally:
+        workspace.cleanup()
+
+
+def publish_timeline(workspace, episode_id):
+    """Keep the mixed timeline of a published episode so it can be edited."""
+    if not (os.path.exists(workspace.timeline) and os.path.exists(workspace.manifest)):
+        return
+    os.makedirs(timeline_dir(), exist_ok=True)
+    pcm_path, manifest_path, _ = timeline_paths(episode_id)
+    os.replace(workspace.timeline, pcm_path)
+    os.replace(workspace.manifest, manifest_path)
+
+
+def episode_edit_task(episode_id: str, job_id=None, on_stage=None):
+    catalog = episode_catalog()
+    episode = catalog.get(episode_id)
+    if episode is None:
+        raise ValueError(f"Episode {episode_id} not found")
+    pcm_path, manifest_path, edit_path = timeline_paths(episode_id)
+    claimed = f"{edit_path}.{job_id or os.getpid()}"
+    try:
+        os.replace(edit_path, claimed)
+    except FileNotFoundError:
+        # An earlier edit job already rendered the latest edit.
+        return episode["filename"]
+    try:
+        telemetry.configure_logging()
+        with open(claimed, encoding="utf-8") as file:
+            dialogue = file.read()
+        rerender_episode(
+            manifest_path, pcm_path, dialogue, episode["path"], on_stage=on_stage
+        )
+        entry = catalog.add(
+            episode["topic"],
+            episode["path"],
+            job_id=episode["job_id"],
+            duration=probe_duration(episode["path"]),
+            episode_id=episode_id,
+        )
+        logging.info("Episode re-rendered")
+        return entry["filename"]
+    finally:
+        os.remove(claimed)
+
+
+def warm_worker(names):
+    """Job worker initializer: build the provider clients before the first job."""
+    if names:
+        threading.Thread(
+            target=providers.warm, args=names, name="provider-warmup", daemon=True
+        ).start()
+
+
+warm_names = tuple(name.strip() for name in WARM_PROVIDERS.split(",") if name.strip())
+job_queue = JobQueue(
+    podcast_generation_task,
+    coalesce_key=normalize_topic,
+    initializer=warm_worker,
+    initargs=(warm_names,),
+)
+# One worker, so edits to the same episode are rendered in order.
+edit_queue = JobQueue(
+    episode_edit_task,
+    workers=1,
+    kind="edit",
+    initializer=warm_worker,
+    initargs=(warm_names,),
+)
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="127.0.0.1", port=8000)
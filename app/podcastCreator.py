@@ -1,24 +1,104 @@
 import datetime
+import json
 import re
-from bs4 import BeautifulSoup, NavigableString
-import google.generativeai as genai
-from audiocraft.models import MusicGen
-from audiocraft.data.audio import audio_write
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from pydub import AudioSegment
 import os
-import openai
-from pathlib import Path
-from openai import OpenAI
 import warnings
 from dotenv import dotenv_values
 import numpy as np
 import wikipedia
-import requests
 import logging
 
+try:
+    from . import fakeProviders, providers, telemetry
+    from .audioAssembly import (
+        PcmTrack,
+        StreamingEncoder,
+        decode_clip,
+        segment_to_pcm,
+    )
+    from .audioMixing import DUCK_LINES, TURN_PAUSE_MS, EpisodeMixer, mix_episode
+    from .dialogueParser import clean_line, iter_revised_turns, iter_turns
+    from .diskCache import content_key, open_cache
+    from .episodeTimeline import (
+        TimelineRecorder,
+        load_manifest,
+        match_turns,
+        parse_dialogue_edit,
+        read_timeline,
+        segment_samples,
+    )
+    from .introMusic import MUSIC_MODEL_NAME, MusicWorker, request_intro
+    from .nbaScraper import is_recap_topic, scrape_nba_games_between_dates
+    from .pipeline import threaded
+    from .scriptGeneration import (
+        SCRIPT_MAX_IN_FLIGHT,
+        SCRIPT_SEGMENTS,
+        iter_concurrent_segments,
+        parse_outline,
+        streamed_text,
+    )
+    from .scriptRevision import REVISION_OVERLAP_LINES, revise_chunks
+    from .similarity import cosine_similarities
+    from .speechSynthesis import (
+        TTS_MAX_IN_FLIGHT,
+        cached_synthesizer,
+        clip_cache,
+        clip_key,
+        iter_synthesized,
+        iter_synthesized_turns,
+    )
+    from .workspace import DEFAULT_WORKSPACE
+except ImportError:
+    import fakeProviders
+    import providers
+    import telemetry
+    from audioAssembly import (
+        PcmTrack,
+        StreamingEncoder,
+        decode_clip,
+        segment_to_pcm,
+    )
+    from audioMixing import DUCK_LINES, TURN_PAUSE_MS, EpisodeMixer, mix_episode
+    from dialogueParser import clean_line, iter_revised_turns, iter_turns
+    from diskCache import content_key, open_cache
+    from episodeTimeline import (
+        TimelineRecorder,
+        load_manifest,
+        match_turns,
+        parse_dialogue_edit,
+        read_timeline,
+        segment_samples,
+    )
+    from introMusic import MUSIC_MODEL_NAME, MusicWorker, request_intro
+    from nbaScraper import is_recap_topic, scrape_nba_games_between_dates
+    from pipeline import threaded
+    from scriptGeneration import (
+        SCRIPT_MAX_IN_FLIGHT,
+        SCRIPT_SEGMENTS,
+        iter_concurrent_segments,
+        parse_outline,
+        streamed_text,
+    )
+    from scriptRevision import REVISION_OVERLAP_LINES, revise_chunks
+    from similarity import cosine_similarities
+    from speechSynthesis import (
+        TTS_MAX_IN_FLIGHT,
+        cached_synthesizer,
+        clip_cache,
+        clip_key,
+        iter_synthesized,
+        iter_synthesized_turns,
+    )
+    from workspace import DEFAULT_WORKSPACE
+
 warnings.filterwarnings(
     "ignore", category=UserWarning, module="torch.nn.utils.weight_norm"
 )
+warnings.filterwarnings("ignore", category=UserWarning, module="wikipedia")
 
 config = dotenv_values()
 if config != {}:
@@ -29,23 +109,99 @@ else:
     google_api_key = os.environ.get("GOOGLE_API_KEY")
 
 
-openai.api_key = openai_api_key
-client = OpenAI(api_key=openai_api_key)
+OPENAI_TIMEOUT = float(os.environ.get("PODCRAFT_OPENAI_TIMEOUT", 60))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("PODCRAFT_OPENAI_MAX_CONNECTIONS", 32))
+GEMINI_MODEL_NAME = "gemini-pro"
+GEMINI_TIMEOUT = float(os.environ.get("PODCRAFT_GEMINI_TIMEOUT", 120))
+INTRO_DESCRIPTION = "soothing and rhythmic music inspired by {}"
+# Broad topics the music worker pre-renders intros for while it is idle.
+JINGLE_CATEGORIES = [
+    category.strip()
+    for category in os.environ.get(
+        "PODCRAFT_JINGLE_CATEGORIES",
+        "sports,technology,science,politics,business,history,music,movies,health",
+    ).split(",")
+    if category.strip()
+]
+
+
+def create_openai_client():
+    import httpx
+    import openai
+    from openai import OpenAI
+
+    openai.api_key = openai_api_key
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=10.0),
+    )
+    # Retries are handled by providers.call so that they respect the rate limits.
+    return OpenAI(api_key=openai_api_key, http_client=http_client, max_retries=0)
 
 
-genai.configure(api_key=google_api_key)
+def create_gemini_model():
+    import google.generativeai as genai
 
-model = genai.GenerativeModel("gemini-pro")
-musicModel = MusicGen.get_pretrained("facebook/musicgen-small")
-musicModel.set_generation_params(duration=7)
+    genai.configure(api_key=google_api_key)
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+
+def create_music_model():
+    from audiocraft.models import MusicGen
+
+    return MusicGen.get_pretrained(MUSIC_MODEL_NAME)
+
+
+providers.register("openai", create_openai_client)
+providers.register("gemini", create_gemini_model)
+providers.register("music", create_music_model)
+
+client = providers.LazyProvider("openai")
+model = providers.LazyProvider("gemini")
+musicModel = providers.LazyProvider("music")
+music_worker = MusicWorker(
+    lambda: providers.get("music"),
+    embed=lambda description: get_embeddings([description])[0],
+    seeds=[INTRO_DESCRIPTION.format(category) for category in JINGLE_CATEGORIES],
+    unload_model=lambda: providers.release("music"),
+)
+
+if os.environ.get("PODCRAFT_FAKE_PROVIDERS"):
+    fakeProviders.install()
 
 
 topic = ""
 
+HOST_VOICES = {"Ofir": "echo", "Daniel": "fable"}
+SCRIPT_MODE = os.environ.get("PODCRAFT_SCRIPT_MODE", "outline")
+REVISION_MODEL = "gpt-3.5-turbo"
+REVISION_PROMPT = "You are a highly skilled editor. Please revise the following podcast script for improved structure, flow, coherence, facts checks and engagement. simply take the script given to you and make it better. if you see multiple outros in the text given to you, keep only the last one but make sure to still include the segments accompanying these outros. make sure to keep it only with the text itself. no comments, announcing new segments or headlines from you. Use every piece of information from the original text while keeping the entire new generated text coherant and logical. Make it sound like a real conversation between two people and maintain the same dynamics Ofir and Daniel are having, including the jokes and puns and even add new ones. The podcast should still be the same length as the script given to you."
+NO_REVISION_MESSAGE = (
+    "No revision was generated. Please check the input script and try again."
+)
+TTS_MODEL = "tts-1"
+TTS_RESPONSE_FORMAT = "pcm"
+TTS_SAMPLE_RATE = 24000
+EMBEDDING_CACHE_SIZE = int(os.environ.get("PODCRAFT_EMBEDDING_CACHE_SIZE", 50000))
+WIKIPEDIA_CACHE_TTL = float(os.environ.get("PODCRAFT_WIKIPEDIA_CACHE_TTL", 6 * 3600))
+WIKIPEDIA_MAX_WORKERS = int(os.environ.get("PODCRAFT_WIKIPEDIA_WORKERS", 4))
+WIKIPEDIA_TIMEOUT = float(os.environ.get("PODCRAFT_WIKIPEDIA_TIMEOUT", 10))
+
+NBA_MARKUP_PATTERN = re.compile(r"<br/?>|</?u>|<b>|\n")
+
+_wikipedia_lock = threading.Lock()
+_wikipedia_lang = None
+_wikipedia_executor = None
+
 
 def get_embedding(text, model="text-embedding-ada-002"):
     text = text.replace("\n", " ")
-    response = client.embeddings.create(input=text, model=model)
+    response = providers.call(
+        "openai", model, client.embeddings.create, input=text, model=model
+    )
     try:
         embedding = response["data"][0]["embedding"]
     except TypeError:
@@ -53,32 +209,111 @@ def get_embedding(text, model="text-embedding-ada-002"):
     return embedding
 
 
+def get_embeddings(texts, model="text-embedding-ada-002"):
+    texts = [text.replace("\n", " ") for text in texts]
+    cache = open_cache("embeddings", max_entries=EMBEDDING_CACHE_SIZE)
+    keys = [content_key(model, text) for text in texts]
+    cached = cache.get_many(keys)
+
+    missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in cached))
+    if missing:
+        response = providers.call(
+            "openai",
+            model,
+            client.embeddings.create,
+            input=missing,
+            model=model,
+        )
+        try:
+            data = response["data"]
+            vectors = [item["embedding"] for item in data]
+        except TypeError:
+            data = sorted(response.data, key=lambda item: item.index)
+            vectors = [item.embedding for item in data]
+        fresh = {
+            content_key(model, text): np.asarray(vector, dtype=np.float32).tobytes()
+            for text, vector in zip(missing, vectors)
+        }
+        cache.set_many(fresh)
+        cached.update(fresh)
+
+    return np.vstack([np.frombuffer(cached[key], dtype=np.float32) for key in keys])
+
+
 def cosine_similarity(v1, v2):
     return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
 
 
-def get_wikipedia_articles_summaries(query, limit=3):
-    logging.basicConfig(
-        filename="logging.log",
-        filemode="w",
-        level=logging.INFO,
-        format="%(asctime)s:%(levelname)s:%(message)s",
-    )
-    warnings.filterwarnings("ignore", category=UserWarning, module="wikipedia")
-    wikipedia.set_lang("en")
+def wikipedia_cache():
+    return open_cache("wikipedia", ttl=WIKIPEDIA_CACHE_TTL)
+
+
+def wikipedia_executor():
+    global _wikipedia_executor
+    with _wikipedia_lock:
+        if _wikipedia_executor is None:
+            _wikipedia_executor = ThreadPoolExecutor(
+                max_workers=WIKIPEDIA_MAX_WORKERS, thread_name_prefix="wikipedia"
+            )
+        return _wikipedia_executor
+
+
+def set_wikipedia_lang(lang):
+    global _wikipedia_lang
+    with _wikipedia_lock:
+        if _wikipedia_lang != lang:
+            wikipedia.set_lang(lang)
+            _wikipedia_lang = lang
+
+
+def fetch_wikipedia_summary(title, lang="en"):
+    key = content_key("summary", lang, title)
+    cached = wikipedia_cache().get(key)
+    if cached is not None:
+        return tuple(json.loads(cached))
+
+    logging.info(f"Retrieving summary for {title}")
+    try:
+        article = (title, wikipedia.summary(title, auto_suggest=False))
+    except wikipedia.exceptions.DisambiguationError as e:
+        logging.info("Disambiguation error, taking first option instead.")
+        page = wikipedia.page(e.options[0])
+        article = (e.options[0], page.summary)
+    logging.info(article[1])
+    wikipedia_cache().set(key, json.dumps(article).encode("utf-8"))
+    return article
+
+
+def search_wikipedia(query, limit=3, lang="en"):
+    key = content_key("search", lang, query, limit)
+    cached = wikipedia_cache().get(key)
+    if cached is not None:
+        return json.loads(cached)
     results = wikipedia.search(query, results=limit)
+    wikipedia_cache().set(key, json.dumps(results).encode("utf-8"))
+    return results
+
+
+def get_wikipedia_articles_summaries(
+    query, limit=3, lang="en", timeout=WIKIPEDIA_TIMEOUT
+):
+    set_wikipedia_lang(lang)
+    results = search_wikipedia(query, limit=limit, lang=lang)
+
+    futures = [
+        wikipedia_executor().submit(fetch_wikipedia_summary, title, lang)
+        for title in results
+    ]
+    wait(futures, timeout=timeout)
 
     articles_summaries = {}
-    for title in results:
+    for title, future in zip(results, futures):
+        if not future.done():
+            logging.info(f"Timed out retrieving summary for {title}")
+            continue
         try:
-            logging.info(f"Retrieving summary for {title}")
-            articles_summaries[title] = wikipedia.summary(title, auto_suggest=False)
-            logging.info(articles_summaries[title])
-        except wikipedia.exceptions.DisambiguationError as e:
-            logging.info("Disambiguation error, taking first option instead.")
-            page = wikipedia.page(e.options[0])
-            articles_summaries[e.options[0]] = page.summary
-            logging.info(articles_summaries[e.options[0]])
+            resolved_title, summary = future.result()
+            articles_summaries[resolved_title] = summary
         except Exception as e:
             logging.info(f"Error retrieving summary for {title}: {e}")
 
@@ -88,45 +323,18 @@ def get_wikipedia_articles_summaries(query, limit=3):
 def find_most_relevant_article(query, summaries):
     if summaries and list(summaries.keys())[0].lower() == query.lower():
         return list(summaries.keys())[0]
-    query_embedding = get_embedding(query)
-
-    max_similarity = -1
-    most_relevant_title = None
-
-    for title, summary in summaries.items():
-        summary_embedding = get_embedding(summary)
-        similarity = cosine_similarity(
-            np.array(query_embedding), np.array(summary_embedding)
-        )
+    if not summaries:
+        return None
 
-        if similarity > max_similarity:
-            max_similarity = similarity
-            most_relevant_title = title
+    titles = list(summaries.keys())
+    embeddings = get_embeddings([query] + [summaries[title] for title in titles])
+    similarities = cosine_similarities(embeddings[0], embeddings[1:])
+    most_relevant_title = titles[int(np.argmax(similarities))]
 
     logging.info(f"Most relevant article: {most_relevant_title}")
     return most_relevant_title
 
 
-def scrape_nba_games_between_dates(url, start_date, end_date):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    start_tag = soup.find(lambda tag: tag.name == "b" and start_date in tag.text)
-    end_tag = soup.find(lambda tag: tag.name == "b" and end_date in tag.text)
-
-    if not start_tag or not end_tag:
-        return "Start or end tag not found."
-
-    elements_between_dates = []
-    for element in start_tag.next_elements:
-        if element == end_tag:
-            break
-        if isinstance(element, NavigableString) and element.strip():
-            elements_between_dates.append(element.strip())
-
-    return "Recap of yesterday's games: " + " ".join(elements_between_dates)
-
-
 def getNBAPodcastContent():
     yesterdays_date = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime(
         "%A, %B %d, %Y"
@@ -138,44 +346,32 @@ def getNBAPodcastContent():
     end_date = "NBA Daily For " + two_days_ago_date
     url = "http://www.insidehoops.com/daily.shtml"
     nba_game_info = scrape_nba_games_between_dates(url, start_date, end_date)
-    clean_nba_game_info = (
-        nba_game_info.replace("<br/>", "")
-        .replace("<u>", "")
-        .replace("</u>", "")
-        .replace("<br>", "")
-        .replace("<b>", "")
-        .replace("\n", " ")
-        .strip()
-    )
+    clean_nba_game_info = NBA_MARKUP_PATTERN.sub(
+        lambda match: " " if match.group() == "\n" else "", nba_game_info
+    ).strip()
     return clean_nba_game_info
 
 
-def getScriptfromGemini(topic):
-    dialogue = ""
+def gather_podcast_content(topic):
     nba_message = ""
-    if topic == None or topic == "":
-        topic = "podcast"
-    descriptions = ["soothing and rhythmic music inspired by " + topic]
-
-    for idx, description in enumerate(descriptions):
-        wav = musicModel.generate([description])
-        audio_write(
-            f"introMusic", wav[0].cpu(), musicModel.sample_rate, strategy="loudness"
-        )
-
-    wikipedia_summaries = get_wikipedia_articles_summaries(topic)
+    with telemetry.span("wikipedia"):
+        wikipedia_summaries = get_wikipedia_articles_summaries(topic)
     logging.info(f"Summaries from wikipedia retrieved")
-    most_relevant_title = find_most_relevant_article(topic, wikipedia_summaries)
+    with telemetry.span("embeddings", articles=len(wikipedia_summaries)):
+        most_relevant_title = find_most_relevant_article(topic, wikipedia_summaries)
     podcast_content = wikipedia_summaries.get(most_relevant_title)
 
-    if topic.lower() == "nba" or topic.lower() == "basketball":
-        podcast_content = getNBAPodcastContent()
+    if is_recap_topic(topic):
+        with telemetry.span("nba"):
+            podcast_content = getNBAPodcastContent()
         nba_message = (
             "The following is a recap of yesterday's NBA games. Use this information:\n"
         )
-    logging.info("Starting Script Generation")
-    chat = model.start_chat(history=[])
-    response = chat.send_message(
+    return podcast_content, nba_message
+
+
+def script_prompts(topic, podcast_content, nba_message):
+    yield (
         f"{nba_message} Considering the following informantion: '{podcast_content}', write a podcast dialogue inspired by the topic '{topic}',"
         + "if no topic was inserted, make up a podcast about a topic of your desire.'\n"
         + "The podcast's content should be updated to news from the past week."
@@ -192,75 +388,152 @@ def getScriptfromGemini(topic):
         + "The show should have 10 segments. There should be a newline in between the hosts' dialogue. Stop before ending each segment. Wait and I will tell you how to continue."
         + " Don't mention or announce that a segment is over, Just stop the dialogue."
     )
-    for chunk in response:
-        dialogue = dialogue + chunk.text
-
     for i in range(9):
         i = i + 1
         if i != 9:
-            response = chat.send_message(
-                "write the next segment of the podcast. Do not announce that the segment is starting or that it is a new topic. Just go straight into the discussion.",
-                stream=True,
-            )
-            for chunk in response:
-                dialogue = dialogue + chunk.text
+            yield "write the next segment of the podcast. Do not announce that the segment is starting or that it is a new topic. Just go straight into the discussion."
         else:
-            response = chat.send_message(
-                "write the last segment of the podcast. After the segment, write an outro to the podcast.",
-                stream=True,
+            yield "write the last segment of the podcast. After the segment, write an outro to the podcast."
+
+
+def iter_sequential_segments(topic, podcast_content, nba_message):
+    chat = model.start_chat(history=[])
+    for index, prompt in enumerate(script_prompts(topic, podcast_content, nba_message)):
+        with telemetry.span("gemini", segment=index + 1):
+            segment = providers.call(
+                "gemini",
+                GEMINI_MODEL_NAME,
+                streamed_text,
+                chat.send_message,
+                prompt,
+                stream=index > 0,
+                request_options={"timeout": GEMINI_TIMEOUT},
             )
-            for chunk in response:
-                dialogue = dialogue + chunk.text
+        yield segment
+
+
+def outline_prompt(topic, podcast_content, nba_message):
+    return (
+        f"{nba_message} Considering the following informantion: '{podcast_content}', plan a podcast episode inspired by the topic '{topic}'."
+        + " The podcast is called Podcraft AI and it is two people (Ofir and Daniel) talking about recent news on the topic."
+        + " If the topic is too broad you can narrow it down to something more specific."
+        + f" Write an outline of exactly {SCRIPT_SEGMENTS} segments as a numbered list, one line per segment,"
+        + " each with a short title and a one sentence summary of what the hosts discuss. Write nothing else."
+    )
+
+
+def segment_prompt(topic, podcast_content, nba_message, outline, index):
+    number = index + 1
+    prompt = (
+        f"{nba_message} Considering the following informantion: '{podcast_content}', you are writing segment {number} of {len(outline)}"
+        + f" of the podcast Podcraft AI about '{topic}', where two people (Ofir and Daniel) talk about recent news."
+        + " This is the outline of the whole episode:\n"
+        + "\n".join(f"{i + 1}. {summary}" for i, summary in enumerate(outline))
+        + f"\nWrite only the dialogue of segment {number}: {outline[index] or topic}."
+    )
+    if index > 0:
+        prompt += f" The previous segment covered: {outline[index - 1]}. Pick up naturally from it."
+    else:
+        prompt += " Introduce the podcast with Ofir talking first."
+    if index < len(outline) - 1:
+        prompt += f" The next segment will cover: {outline[index + 1]}. Don't discuss it yet."
+    else:
+        prompt += " After the segment, write an outro to the podcast."
+    return (
+        prompt
+        + " Make sure to maintain podcast dynamics between the hosts during the conversation,"
+        + "make them have critical thinking but also be open to new ideas and opinions, make them creative al well."
+        + "make them even tease each other a bit. Add some jokes and puns as well but don't literally say that you try to be funny or witty."
+        + "use your common sense to decide if the topic is appropriate for laughing at. if not then don't add jokes and just keep it serious."
+        + " Don't add any more people to the conversation (no guests). There should be a newline in between the hosts' dialogue."
+        + " Don't announce that a segment is starting or over, just write the conversation."
+    )
+
 
-    extract_dialogue(dialogue)
+def generate_text(prompt, **attrs):
+    with telemetry.span("gemini", **attrs):
+        return providers.call(
+            "gemini",
+            GEMINI_MODEL_NAME,
+            streamed_text,
+            model.generate_content,
+            prompt,
+            stream=True,
+            request_options={"timeout": GEMINI_TIMEOUT},
+        )
 
 
-def extract_dialogue(script):
-    logging.basicConfig(
-        filename="logging.log",
-        level=logging.INFO,
-        format="%(asctime)s:%(levelname)s:%(message)s",
+def iter_outlined_segments(
+    topic, podcast_content, nba_message, max_in_flight=SCRIPT_MAX_IN_FLIGHT
+):
+    outline = parse_outline(
+        generate_text(
+            outline_prompt(topic, podcast_content, nba_message), segment="outline"
+        )
+    )
+    logging.info(f"Episode outline: {outline}")
+    prompts = (
+        (index + 1, segment_prompt(topic, podcast_content, nba_message, outline, index))
+        for index in range(len(outline))
     )
-    lines = script.split("\n")
-
-    host1_dialogue = []
-    host2_dialogue = []
-    current_host = None
-    current_dialogue = ""
-
-    for line in lines:
-        logging.info(line)
-        line = re.sub(r"\*\*Segment \d+:.*?\*\*", "", line)
-
-        if line.startswith("**Ofir:**") or line.startswith("Ofir:"):
-            if current_host == "host2" and current_dialogue:
-                host2_dialogue.append(current_dialogue.strip())
-                current_dialogue = ""
-            if line.startswith("**Ofir:**"):
-                current_dialogue += " " + line.replace("**Ofir:** ", "").strip()
-            elif line.startswith("Ofir:"):
-                current_dialogue += " " + line.replace("Ofir:", "").strip()
-            current_host = "host1"
-        elif line.startswith("**Daniel:**") or line.startswith("Daniel:"):
-            if current_host == "host1" and current_dialogue:
-                host1_dialogue.append(current_dialogue.strip())
-                current_dialogue = ""
-            if line.startswith("**Daniel:**"):
-                current_dialogue += " " + line.replace("**Daniel:** ", "").strip()
-            elif line.startswith("Daniel:"):
-                current_dialogue += " " + line.replace("Daniel:", "").strip()
-            current_host = "host2"
-
-    if current_host == "host1" and current_dialogue:
-        host1_dialogue.append(current_dialogue.strip())
-    elif current_host == "host2" and current_dialogue:
-        host2_dialogue.append(current_dialogue.strip())
-
-    with open("host1.txt", "w", encoding="utf-8") as file1:
+
+    def generate_segment(numbered_prompt):
+        number, prompt = numbered_prompt
+        return generate_text(prompt, segment=number)
+
+    for segment in iter_concurrent_segments(generate_segment, prompts, max_in_flight):
+        yield segment + "\n"
+
+
+def iter_script_segments(topic, podcast_content, nba_message, mode=None):
+    mode = mode or SCRIPT_MODE
+    if mode == "sequential":
+        return iter_sequential_segments(topic, podcast_content, nba_message)
+    if mode == "outline":
+        return iter_outlined_segments(topic, podcast_content, nba_message)
+    raise ValueError(f"Unknown script generation mode: {mode}")
+
+
+def intro_descriptions(topic):
+    return [INTRO_DESCRIPTION.format(topic)]
+
+
+def request_intros(topic, workspace=DEFAULT_WORKSPACE):
+    return [
+        request_intro(music_worker, description, workspace.intro_stem)
+        for description in intro_descriptions(topic)
+    ]
+
+
+def generate_script(topic, workspace=DEFAULT_WORKSPACE):
+    if topic == None or topic == "":
+        topic = "podcast"
+    intros = request_intros(topic, workspace)
+
+    podcast_content, nba_message = gather_podcast_content(topic)
+    logging.info("Starting Script Generation")
+    dialogue = "".join(iter_script_segments(topic, podcast_content, nba_message))
+
+    for intro in intros:
+        intro.result()
+    return dialogue
+
+
+def getScriptfromGemini(topic, workspace=DEFAULT_WORKSPACE):
+    extract_dialogue(generate_script(topic, workspace), workspace)
+
+
+def extract_dialogue(script, workspace=DEFAULT_WORKSPACE):
+    turns = list(iter_turns(script.split("\n")))
+    logging.debug(f"Extracted {len(turns)} dialogue turns")
+    host1_dialogue = [turn.text for turn in turns if turn.speaker == "Ofir"]
+    host2_dialogue = [turn.text for turn in turns if turn.speaker == "Daniel"]
+
+    with open(workspace.host1, "w", encoding="utf-8") as file1:
         for dialogue in host1_dialogue:
             file1.write(dialogue + "\n")
 
-    with open("host2.txt", "w", encoding="utf-8") as file2:
+    with open(workspace.host2, "w", encoding="utf-8") as file2:
         for dialogue in host2_dialogue:
             file2.write(dialogue + "\n")
 
@@ -283,17 +556,24 @@ def read_script(file_path):
     return script_text
 
 
-def generate_revised_script(script_text):
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
+def generate_revised_script(script_text, context=""):
+    messages = [{"role": "system", "content": REVISION_PROMPT}]
+    if context:
+        messages.append(
             {
-                "role": "system",
-                "content": "You are a highly skilled editor. Please revise the following podcast script for improved structure, flow, coherence, facts checks and engagement. simply take the script given to you and make it better. if you see multiple outros in the text given to you, keep only the last one but make sure to still include the segments accompanying these outros. make sure to keep it only with the text itself. no comments, announcing new segments or headlines from you. Use every piece of information from the original text while keeping the entire new generated text coherant and logical. Make it sound like a real conversation between two people and maintain the same dynamics Ofir and Daniel are having, including the jokes and puns and even add new ones. The podcast should still be the same length as the script given to you.",
-            },
-            {"role": "user", "content": script_text},
-        ],
+                "role": "user",
+                "content": "For continuity only, the conversation so far ended with the lines below. Do not repeat or revise them:\n"
+                + context,
+            }
+        )
+    messages.append({"role": "user", "content": script_text})
+
+    response = providers.call(
+        "openai",
+        REVISION_MODEL,
+        client.chat.completions.create,
+        model=REVISION_MODEL,
+        messages=messages,
         temperature=0.7,
         max_tokens=4096,
         top_p=1.0,
@@ -305,89 +585,404 @@ def generate_revised_script(script_text):
         revised_script = response.choices[0].message.content
         return revised_script.strip()
     else:
-        return "No revision was generated. Please check the input script and try again."
+        return NO_REVISION_MESSAGE
+
+
+def revise_chunk(chunk, context=""):
+    with telemetry.span("revision", chars=len(chunk)):
+        revised_script = generate_revised_script(chunk, context)
+    if revised_script == NO_REVISION_MESSAGE:
+        return None
+    return revised_script
+
+
+def revise_script(script_text, context=""):
+    return revise_chunks(
+        script_text,
+        revise_chunk,
+        key_parts=(REVISION_MODEL, REVISION_PROMPT),
+        context=context,
+    )
 
 
 def clean_revised_dialogue(file_path):
     with open(file_path, "r", encoding="utf-8") as file:
         lines = file.readlines()
 
-    cleaned_lines = []
-    for line in lines:
-        cleaned_line = re.sub(
-            r"^\*\*(Ofir|Daniel):\*\*\s*|^(\*\*Ofir\*\*:\s*|\*\*Daniel\*\*:\s*)|(Ofir:|Daniel:)\s*",
-            "",
-            line,
-        )
-        cleaned_line = re.sub(r"\*\*(.*?)\*\*", r"\1", cleaned_line)
-        cleaned_line = re.sub(
-            r"\bsegment\s+\d+\b", "", cleaned_line, flags=re.IGNORECASE
-        ).strip()
-        cleaned_line = re.sub(
-            r"\boutro\b", "", cleaned_line, flags=re.IGNORECASE
-        ).strip()
-        cleaned_line = re.sub(r"\s{2,}", " ", cleaned_line)
-        cleaned_lines.append(cleaned_line)
+    cleaned_lines = [clean_line(line) for line in lines]
 
     with open(file_path, "w", encoding="utf-8") as file:
         for line in cleaned_lines:
             file.write(line + "\n")
 
 
+def revise_segments(segments, workspace=DEFAULT_WORKSPACE):
+    # The revised end of each segment is continuity context for the next one.
+    tail = deque(maxlen=REVISION_OVERLAP_LINES)
+    with open(workspace.revised, "w", encoding="utf-8") as revised_file:
+        for segment in segments:
+            turns = list(iter_turns(segment.split("\n")))
+            if not turns:
+                continue
+            segment_script = "\n".join(f"{turn.speaker}: {turn.text}" for turn in turns)
+            revised_script = revise_script(segment_script, context="\n".join(tail))
+            for turn in iter_revised_turns(
+                revised_script.split("\n"), turns[0].speaker
+            ):
+                revised_file.write(turn.text + "\n")
+                revised_file.flush()
+                tail.append(f"{turn.speaker}: {turn.text}")
+                yield HOST_VOICES[turn.speaker], turn.text
+
+
 def save_revised_script(script_text, file_path="revised_dialogue.txt"):
     normalized_text = re.sub(r"\n\s*\n", "\n", script_text).strip()
     with open(file_path, "w", encoding="utf-8") as file:
         file.write(normalized_text)
 
 
-def total_revision_process(file_path):
+def total_revision_process(file_path, workspace=DEFAULT_WORKSPACE):
     current_script = read_script(file_path=file_path)
-    revised_script = generate_revised_script(current_script)
-    save_revised_script(revised_script, file_path="revised_dialogue.txt")
-    clean_revised_dialogue("revised_dialogue.txt")
-
+    revised_script = revise_script(current_script)
+    save_revised_script(revised_script, file_path=workspace.revised)
+    clean_revised_dialogue(workspace.revised)
+
+
+def synthesize_speech(voice, text, model=TTS_MODEL):
+    # iter_synthesized_turns already retries failed clips, so only rate limit here.
+    with telemetry.span("tts", voice=voice, chars=len(text)):
+        response = providers.call(
+            "openai",
+            model,
+            client.audio.speech.create,
+            model=model,
+            voice=voice,
+            input=text,
+            response_format=TTS_RESPONSE_FORMAT,
+            max_retries=0,
+        )
+    telemetry.count("tts_bytes_total", len(response.content), model=model)
+    return response.content
 
-def generate_audio(file_path, output_filename):
-    combined_audio = AudioSegment.empty()
-    pause = AudioSegment.silent(duration=400)
 
+def iter_speech_pcm(file_path, max_in_flight=TTS_MAX_IN_FLIGHT):
     with open(file_path, "r", encoding="utf-8") as file:
-        for index, line in enumerate(file):
-            voice = "echo" if index % 2 == 0 else "fable"
-            response = client.audio.speech.create(
-                model="tts-1", voice=voice, input=line
-            )
+        lines = file.readlines()
+
+    synthesize = cached_synthesizer(
+        synthesize_speech, TTS_MODEL, response_format=TTS_RESPONSE_FORMAT
+    )
+    for index, voice, clip in iter_synthesized(
+        lines, synthesize, max_in_flight=max_in_flight
+    ):
+        yield decode_clip(clip, TTS_RESPONSE_FORMAT, TTS_SAMPLE_RATE)
+
+    logging.info(f"TTS clip cache: {clip_cache().stats()}")
 
-            temp_filename = f"temp_{index}.mp3"
-            warnings.filterwarnings(
-                "ignore",
-                category=DeprecationWarning,
-            )
-            response.stream_to_file(Path(temp_filename))
-            line_audio = AudioSegment.from_mp3(temp_filename)
-            combined_audio += line_audio + pause
-            os.remove(temp_filename)
 
-    combined_audio.export(output_filename, format="mp3")
+def generate_audio(file_path, output_filename, max_in_flight=TTS_MAX_IN_FLIGHT):
+    track = PcmTrack(TTS_SAMPLE_RATE)
+    mixer = EpisodeMixer(TTS_SAMPLE_RATE)
 
+    for samples in iter_speech_pcm(file_path, max_in_flight=max_in_flight):
+        track.append(mixer.add(samples))
 
-def add_intro_music(introAud, speechAud, topic):
-    safe_topic = topic.replace(" ", "_")
-    final_podcast_filename = f"{safe_topic}.mp3"
+    track.export(output_filename)
+
+
+def load_intro(introAud, sample_rate=TTS_SAMPLE_RATE):
+    return segment_to_pcm(AudioSegment.from_file(introAud, format="wav"), sample_rate)
+
+
+def load_intros(intros, sample_rate=TTS_SAMPLE_RATE):
+    """Wait for the requested intros and join them into one PCM array."""
+    return np.concatenate(
+        [np.zeros(0, dtype=np.int16)]
+        + [load_intro(intro.result(), sample_rate) for intro in intros]
+    )
+
+
+def regenerate_intros(descriptions, output_stem, sample_rate=TTS_SAMPLE_RATE):
+    """Intro PCM for descriptions, rendered again if it has left the intro cache.
+    Never borrows a library jingle, so an edit keeps the episode's own intro."""
+    intros = [
+        request_intro(
+            music_worker, description, f"{output_stem}.intro{index}", budget=float("inf")
+        )
+        for index, description in enumerate(descriptions)
+    ]
+    try:
+        return load_intros(intros, sample_rate)
+    finally:
+        for intro in intros:
+            if intro.done() and intro.exception() is None:
+                os.remove(intro.result())
+
+
+def render_episode(
+    introAud,
+    file_path,
+    topic,
+    format="mp3",
+    max_in_flight=TTS_MAX_IN_FLIGHT,
+    workspace=DEFAULT_WORKSPACE,
+):
+    final_podcast_filename = workspace.episode(topic, format)
+    mixer = EpisodeMixer(TTS_SAMPLE_RATE, load_intro(introAud))
+
+    with StreamingEncoder(final_podcast_filename, TTS_SAMPLE_RATE) as encoder:
+        encoder.write(mixer.start())
+        for samples in iter_speech_pcm(file_path, max_in_flight=max_in_flight):
+            encoder.write(mixer.add(samples))
+        encoder.write(mixer.finish())
+
+    logging.info(
+        f"Encoded {final_podcast_filename} ({encoder.duration_seconds():.1f}s)"
+    )
+    return final_podcast_filename
+
+
+def add_intro_music(introAud, speechAud, topic, workspace=DEFAULT_WORKSPACE):
+    final_podcast_filename = workspace.episode(topic)
 
-    intro_music = AudioSegment.from_file(introAud, format="wav")
     speech_audio = AudioSegment.from_file(speechAud, format="mp3")
-    final_podcast = intro_music.fade_in(1500).fade_out(1500) + speech_audio
+    final_podcast = PcmTrack(TTS_SAMPLE_RATE)
+    final_podcast.append(
+        mix_episode(
+            load_intro(introAud),
+            [segment_to_pcm(speech_audio, TTS_SAMPLE_RATE)],
+            TTS_SAMPLE_RATE,
+            pause_ms=0,
+        )
+    )
 
     final_podcast.export(final_podcast_filename, format="mp3")
 
 
+def stream_podcast(
+    topic,
+    workspace=DEFAULT_WORKSPACE,
+    format="mp3",
+    max_in_flight=TTS_MAX_IN_FLIGHT,
+    on_stage=None,
+):
+    report = on_stage or (lambda stage, fraction=None: None)
+    script_topic = topic or "podcast"
+
+    report("script")
+    intros = request_intros(script_topic, workspace)
+    podcast_content, nba_message = gather_podcast_content(script_topic)
+    logging.info("Starting Script Generation")
+    # Shared by both producers, so a cancelled or failed job stops calling Gemini
+    # and OpenAI instead of finishing the script in the background.
+    stop = threading.Event()
+    segments = threaded(
+        iter_script_segments(script_topic, podcast_content, nba_message),
+        name="script-segments",
+        stop=stop,
+    )
+    revised_segments = [0]
+
+    def count_segments(segments):
+        for segment in segments:
+            yield segment
+            revised_segments[0] += 1
+
+    def audio_fraction(clips):
+        # Lines are only known once their segment is revised, so extrapolate the
+        # total from the segments revised so far.
+        if revised_segments[0] >= SCRIPT_SEGMENTS:
+            return clips / len(spoken)
+        return clips * max(revised_segments[0], 1) / (len(spoken) * SCRIPT_SEGMENTS)
+
+    turns = threaded(
+        revise_segments(count_segments(segments), workspace), name="revision", stop=stop
+    )
+
+    synthesize = cached_synthesizer(
+        synthesize_speech, TTS_MODEL, response_format=TTS_RESPONSE_FORMAT
+    )
+    final_podcast_filename = workspace.episode(topic, format)
+    spoken = []
+    mixer = None
+
+    def remember(turns):
+        for voice, text in turns:
+            spoken.append(text)
+            yield voice, text
+
+    def start_mix():
+        # The intro is only needed once the first line is ready.
+        mixer = EpisodeMixer(TTS_SAMPLE_RATE, load_intros(intros))
+        lead = mixer.start()
+        encoder.write(lead)
+        timeline.intro(lead)
+        return mixer
+
+    try:
+        with StreamingEncoder(
+            final_podcast_filename, TTS_SAMPLE_RATE
+        ) as encoder, TimelineRecorder(
+            workspace.timeline,
+            workspace.manifest,
+            topic=topic,
+            format=format,
+            sample_rate=TTS_SAMPLE_RATE,
+            pause_ms=TURN_PAUSE_MS,
+            ducked=DUCK_LINES,
+            intro_descriptions=intro_descriptions(script_topic),
+        ) as timeline:
+            for index, voice, clip in iter_synthesized_turns(
+                remember(turns), synthesize, max_in_flight=max_in_flight
+            ):
+                mixer = mixer or start_mix()
+                report("audio", audio_fraction(index + 1))
+                samples = mixer.add(
+                    decode_clip(clip, TTS_RESPONSE_FORMAT, TTS_SAMPLE_RATE)
+                )
+                encoder.write(samples)
+                text = spoken[index]
+                timeline.turn(
+                    samples,
+                    voice,
+                    text,
+                    clip_key(voice, TTS_MODEL, text, TTS_RESPONSE_FORMAT),
+                )
+            mixer = mixer or start_mix()
+            tail = mixer.finish()
+            encoder.write(tail)
+            timeline.tail(tail)
+    finally:
+        stop.set()
+        turns.join()
+        segments.join()
+
+    logging.info(f"TTS clip cache: {clip_cache().stats()}")
+    logging.info(
+        f"Encoded {final_podcast_filename} ({encoder.duration_seconds():.1f}s)"
+    )
+    return final_podcast_filename
+
+
+def rerender_episode(
+    manifest_path,
+    timeline_path,
+    dialogue,
+    output_path,
+    max_in_flight=TTS_MAX_IN_FLIGHT,
+    on_stage=None,
+):
+    """Re-render a published episode from an edited revised dialogue.
+
+    Only lines whose text or voice changed are synthesized; every other turn is
+    copied from the stored PCM timeline, and the result is encoded once. The
+    episode, its timeline and its manifest are replaced when the render is
+    complete. Returns the number of lines that were synthesized.
+    """
+    report = on_stage or (lambda stage, fraction=None: None)
+    manifest = load_manifest(manifest_path)
+    old_timeline = read_timeline(timeline_path)
+    turns = manifest["turns"]
+    edited = parse_dialogue_edit(dialogue, turns, HOST_VOICES)
+    reused = match_turns(turns, edited)
+
+    # Ducked lines carry part of the intro, so they can only be copied as a block.
+    ducked = manifest["ducked"]
+    keep_prefix = all(
+        reused.get(index) == index
+        for index in range(min(ducked, max(len(turns), len(edited))))
+    )
+    if not keep_prefix:
+        for index in range(ducked):
+            reused.pop(index, None)
+    changed = [index for index in range(len(edited)) if index not in reused]
+    logging.info(f"Re-rendering {len(changed)} of {len(edited)} lines")
+
+    report("audio", 0.0)
+    sample_rate = manifest["sample_rate"]
+    stem, extension = os.path.splitext(output_path)
+    synthesize = cached_synthesizer(
+        synthesize_speech, TTS_MODEL, response_format=TTS_RESPONSE_FORMAT
+    )
+    clips = {}
+    for position, voice, clip in iter_synthesized_turns(
+        (edited[index] for index in changed), synthesize, max_in_flight=max_in_flight
+    ):
+        clips[changed[position]] = clip
+        report("audio", len(clips) / len(changed))
+
+    if keep_prefix:
+        mixer = EpisodeMixer(sample_rate, pause_ms=manifest["pause_ms"], duck_lines=0)
+    else:
+        intro = regenerate_intros(manifest["intro_descriptions"], stem, sample_rate)
+        mixer = EpisodeMixer(
+            sample_rate, intro, pause_ms=manifest["pause_ms"], duck_lines=ducked
+        )
+
+    info = {
+        name: value
+        for name, value in manifest.items()
+        if name not in ("intro", "turns", "tail")
+    }
+    partial_output = f"{stem}.partial{extension}"
+    with telemetry.span("rerender", lines=len(edited), changed=len(changed)):
+        with StreamingEncoder(
+            partial_output, sample_rate, format=manifest["format"]
+        ) as encoder, TimelineRecorder(
+            timeline_path + ".partial", manifest_path + ".partial", **info
+        ) as timeline:
+            lead = (
+                segment_samples(old_timeline, manifest["intro"])
+                if keep_prefix
+                else mixer.start()
+            )
+            encoder.write(lead)
+            timeline.intro(lead)
+            for index, (voice, text) in enumerate(edited):
+                if index in reused:
+                    samples = segment_samples(old_timeline, turns[reused[index]])
+                else:
+                    samples = mixer.add(
+                        decode_clip(clips[index], TTS_RESPONSE_FORMAT, sample_rate)
+                    )
+                encoder.write(samples)
+                timeline.turn(
+                    samples,
+                    voice,
+                    text,
+                    clip_key(voice, TTS_MODEL, text, TTS_RESPONSE_FORMAT),
+                )
+            tail = (
+                segment_samples(old_timeline, manifest["tail"])
+                if keep_prefix
+                else mixer.finish()
+            )
+            encoder.write(tail)
+            timeline.tail(tail)
+
+    del old_timeline
+    report("publish")
+    os.replace(timeline_path + ".partial", timeline_path)
+    os.replace(manifest_path + ".partial", manifest_path)
+    os.replace(partial_output, output_path)
+    telemetry.count("rerendered_lines_total", len(changed))
+    return len(changed)
+
+
+def create_podcast(topic, workspace=DEFAULT_WORKSPACE):
+    script = generate_script(topic, workspace)
+    dialogue = "\n".join(turn.text for turn in iter_turns(script.split("\n")))
+    revised_script = revise_script(dialogue)
+    save_revised_script(revised_script, file_path=workspace.revised)
+    clean_revised_dialogue(workspace.revised)
+    return render_episode(
+        workspace.intro, workspace.revised, topic, workspace=workspace
+    )
+
+
 def main():
-    getScriptfromGemini(topic)
-    merge_text_files("host1.txt", "host2.txt", "merged_dialogue.txt")
-    total_revision_process("merged_dialogue.txt")
-    generate_audio("revised_dialogue.txt", "final_podcast.mp3")
-    add_intro_music("introMusic.wav", "final_podcast.mp3", topic)
+    telemetry.configure_logging()
+    stream_podcast(topic)
 
 
 if __name__ == "__main__":
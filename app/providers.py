@@ -0,0 +1,147 @@
+import logging
+import os
+import random
+import threading
+import time
+
+try:
+    from . import telemetry
+    from .rateLimit import rate_limiter
+except ImportError:
+    import telemetry
+    from rateLimit import rate_limiter
+
+
+PROVIDER_MAX_RETRIES = int(os.environ.get("PODCRAFT_PROVIDER_MAX_RETRIES", 5))
+
+_factories = {}
+_instances = {}
+_overridden = set()
+_lock = threading.RLock()
+
+
+def register(name, factory):
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def override(name, instance):
+    with _lock:
+        _instances[name] = instance
+        _overridden.add(name)
+
+
+def reset(name=None):
+    with _lock:
+        if name is None:
+            _instances.clear()
+            _overridden.clear()
+        else:
+            _instances.pop(name, None)
+            _overridden.discard(name)
+
+
+def release(name):
+    """Drop a provider built by its factory, so its memory can be freed; the next
+    get() builds it again. Overrides are kept."""
+    with _lock:
+        if name not in _overridden:
+            _instances.pop(name, None)
+
+
+def get(name):
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            logging.info(f"Initializing provider '{name}'")
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def warm(*names):
+    for name in names or list(_factories):
+        get(name)
+
+
+def is_retryable(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None and isinstance(getattr(exc, "code", None), int):
+        # Google API errors, such as those raised mid-stream by Gemini.
+        status = exc.code
+    return status == 429 or (status is not None and status >= 500)
+
+
+def retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def with_backoff(
+    call, max_retries=PROVIDER_MAX_RETRIES, base_delay=0.5, max_delay=30.0
+):
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except Exception as exc:
+            if attempt == max_retries or not is_retryable(exc):
+                raise
+            delay = retry_after(exc)
+            if delay is None:
+                delay = min(max_delay, base_delay * 2**attempt)
+                delay *= 0.5 + random.random() / 2
+            logging.info(f"Retrying provider request in {delay:.2f}s: {exc}")
+            time.sleep(delay)
+
+
+def call(
+    name, model, request, /, *args, cost=1, max_retries=PROVIDER_MAX_RETRIES, **kwargs
+):
+    """Run request(*args, **kwargs) against the rate limit of the name/model bucket,
+    retrying 429 and 5xx responses with backoff; every attempt takes a token."""
+    bucket = f"{name}/{model}"
+
+    def attempt():
+        rate_limiter().acquire(bucket, cost)
+        telemetry.count("api_calls_total", provider=name, model=model)
+        started = time.perf_counter()
+        try:
+            return request(*args, **kwargs)
+        except Exception as exc:
+            status = getattr(exc, "status_code", None) or type(exc).__name__
+            telemetry.count(
+                "api_errors_total", provider=name, model=model, status=status
+            )
+            raise
+        finally:
+            telemetry.observe(
+                "api_seconds", time.perf_counter() - started, provider=name, model=model
+            )
+
+    return with_backoff(attempt, max_retries=max_retries)
+
+
+class LazyProvider:
+    """Stand-in for a registered provider that builds it on first attribute access."""
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr):
+        return getattr(get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(get(self._name), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(get(self._name), attr)
+
+    def __repr__(self):
+        return f"<LazyProvider {self._name!r}>"
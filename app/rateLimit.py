@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from .workspace import jobs_dir
+except ImportError:
+    from workspace import jobs_dir
+
+
+# Requests per minute for each provider/model bucket. Buckets that are not listed
+# are not limited.
+RATE_LIMITS = {
+    "openai/tts-1": 500,
+    "openai/gpt-3.5-turbo": 3500,
+    "openai/text-embedding-ada-002": 3000,
+    "gemini/gemini-pro": 60,
+}
+RATE_LIMIT_BURST_SECONDS = float(os.environ.get("PODCRAFT_RATE_LIMIT_BURST", 10))
+FAIR_SHARE_WINDOW = float(os.environ.get("PODCRAFT_FAIR_SHARE_WINDOW", 30))
+
+
+def parse_rate_limits(spec):
+    """Parse "openai/tts-1=50,gemini/gemini-pro=30" into a bucket -> rpm dict."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        bucket, _, rpm = item.partition("=")
+        limits[bucket.strip()] = float(rpm)
+    return limits
+
+
+def configured_limits():
+    limits = dict(RATE_LIMITS)
+    limits.update(parse_rate_limits(os.environ.get("PODCRAFT_RATE_LIMITS", "")))
+    return limits
+
+
+def rate_limit_db_path():
+    return os.environ.get(
+        "PODCRAFT_RATE_LIMIT_DB", os.path.join(jobs_dir(), "ratelimits.sqlite3")
+    )
+
+
+class FairRateLimiter:
+    """Token buckets shared by every process using the same database.
+
+    Each bucket's rate is split evenly between the clients (one per job worker
+    process by default) that used it within the fair-share window, so a single
+    job gets the whole quota and concurrent jobs get equal slices of it.
+    """
+
+    def __init__(self, path, limits=None, window=FAIR_SHARE_WINDOW):
+        self.path = path
+        self.limits = configured_limits() if limits is None else limits
+        self.window = window
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "bucket TEXT NOT NULL, client TEXT NOT NULL, tokens REAL NOT NULL, "
+                "updated REAL NOT NULL, PRIMARY KEY (bucket, client))"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self, bucket, cost=1, client=None, now=None):
+        """Take cost tokens if available; return 0 on success or the seconds to
+        wait before trying again."""
+        rpm = self.limits.get(bucket)
+        if not rpm:
+            return 0.0
+        client = client or str(os.getpid())
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM buckets WHERE bucket = ? AND updated < ?",
+                (bucket, now - self.window),
+            )
+            clients = conn.execute(
+                "SELECT COUNT(*) FROM buckets WHERE bucket = ? AND client != ?",
+                (bucket, client),
+            ).fetchone()[0] + 1
+            rate = rpm / 60.0 / clients
+            capacity = max(float(cost), rate * RATE_LIMIT_BURST_SECONDS)
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE bucket = ? AND client = ?",
+                (bucket, client),
+            ).fetchone()
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, row[0] + (now - row[1]) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (bucket, client, tokens, updated) "
+                "VALUES (?, ?, ?, ?)",
+                (bucket, client, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, bucket, cost=1, client=None):
+        while True:
+            wait = self.try_acquire(bucket, cost, client)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter():
+    path = rate_limit_db_path()
+    with _limiters_lock:
+        if path not in _limiters:
+            _limiters[path] = FairRateLimiter(path)
+        return _limiters[path]
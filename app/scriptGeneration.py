@@ -0,0 +1,49 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+SCRIPT_SEGMENTS = 10
+SCRIPT_MAX_IN_FLIGHT = int(os.environ.get("PODCRAFT_SCRIPT_CONCURRENCY", 4))
+
+OUTLINE_ITEM_PATTERN = re.compile(r"^\W*(\d+)\s*[.):\-]\s*(.+?)\s*$")
+
+
+def response_text(response):
+    return "".join(chunk.text for chunk in response)
+
+
+def streamed_text(request, *args, **kwargs):
+    """Call request and read the whole streamed reply, so that a provider retry
+    covers errors in the middle of the stream as well as opening it."""
+    return response_text(request(*args, **kwargs))
+
+
+def parse_outline(text, segments=SCRIPT_SEGMENTS):
+    """Return one summary per segment from a numbered outline; segments the
+    outline does not mention get an empty summary."""
+    summaries = [""] * segments
+    for line in text.split("\n"):
+        match = OUTLINE_ITEM_PATTERN.match(line)
+        if match is None:
+            continue
+        number = int(match.group(1))
+        if 1 <= number <= segments and not summaries[number - 1]:
+            summaries[number - 1] = match.group(2).strip("* ")
+    return summaries
+
+
+def iter_concurrent_segments(generate, prompts, max_in_flight=SCRIPT_MAX_IN_FLIGHT):
+    """Run generate(prompt) for every prompt with at most max_in_flight requests
+    outstanding and yield the results in prompt order."""
+    with ThreadPoolExecutor(
+        max_workers=max_in_flight, thread_name_prefix="script-segment"
+    ) as executor:
+        pending = deque()
+        for prompt in prompts:
+            pending.append(executor.submit(generate, prompt))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
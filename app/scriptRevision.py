@@ -0,0 +1,97 @@
+import logging
+import math
+import os
+
+try:
+    from .diskCache import content_key, open_cache
+except ImportError:
+    from diskCache import content_key, open_cache
+
+
+REVISION_CHUNK_TOKENS = int(os.environ.get("PODCRAFT_REVISION_CHUNK_TOKENS", 1500))
+REVISION_OVERLAP_LINES = int(os.environ.get("PODCRAFT_REVISION_OVERLAP_LINES", 2))
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Cheap upper-leaning estimate of the editor's token count for text."""
+    return max(math.ceil(len(text) / CHARS_PER_TOKEN), len(text.split()))
+
+
+def is_segment_boundary(line):
+    stripped = line.strip().strip("*").lower()
+    return stripped.startswith("segment ") or stripped.startswith("outro")
+
+
+def split_chunks(lines, max_tokens=REVISION_CHUNK_TOKENS):
+    """Group script lines into chunks of at most max_tokens, breaking only between
+    lines and preferring to break at segment headings."""
+    chunks = []
+    chunk = []
+    size = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        tokens = estimate_tokens(line)
+        over_budget = size + tokens > max_tokens
+        new_segment = is_segment_boundary(line) and size >= max_tokens // 2
+        if chunk and (over_budget or new_segment):
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+        chunk.append(line)
+        size += tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def revision_cache():
+    return open_cache("revisions", max_entries=4096)
+
+
+def revise_chunks(
+    script_text,
+    revise,
+    key_parts=(),
+    max_tokens=REVISION_CHUNK_TOKENS,
+    overlap=REVISION_OVERLAP_LINES,
+    cache=None,
+    context="",
+):
+    """Revise script_text chunk by chunk and stitch the results in order.
+
+    revise(chunk, context) gets the last `overlap` revised lines before the chunk
+    as read-only context and returns the revised chunk, or None to keep the
+    original; a chunk whose revision raises keeps its original text too. The
+    first chunk gets context instead, e.g. the end of the previous segment.
+    Chunks run one after another, since each needs the revision before it.
+    """
+    cache = cache or revision_cache()
+    chunks = split_chunks(script_text.split("\n"), max_tokens)
+    logging.info(f"Revising {len(chunks)} chunks")
+
+    revised = []
+    for index, chunk in enumerate(chunks):
+        text = "\n".join(chunk)
+        key = content_key(*key_parts, context, text)
+        cached = cache.get(key)
+        if cached is not None:
+            result = cached.decode("utf-8")
+        else:
+            try:
+                result = revise(text, context)
+            except Exception as e:
+                logging.info(
+                    f"Revision of chunk {index + 1}/{len(chunks)} failed, "
+                    f"keeping the original: {e}"
+                )
+                result = None
+            if result:
+                cache.set(key, result.encode("utf-8"))
+            else:
+                result = text
+        revised.append(result)
+        lines = [line for line in result.split("\n") if line.strip()]
+        context = "\n".join(lines[-overlap:]) if overlap else ""
+    return "\n".join(revised)
@@ -0,0 +1,9 @@
+import numpy as np
+
+
+def cosine_similarities(query, vectors):
+    """Cosine similarity of query to each row of vectors; zero vectors score 0."""
+    query = query / (np.linalg.norm(query) or 1.0)
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    return vectors @ query / norms
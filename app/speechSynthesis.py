@@ -0,0 +1,70 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    from .diskCache import content_key, open_cache
+    from .providers import with_backoff
+except ImportError:
+    from diskCache import content_key, open_cache
+    from providers import with_backoff
+
+
+TTS_MAX_IN_FLIGHT = int(os.environ.get("PODCRAFT_TTS_CONCURRENCY", 8))
+TTS_MAX_RETRIES = int(os.environ.get("PODCRAFT_TTS_MAX_RETRIES", 5))
+TTS_CACHE_BYTES = int(os.environ.get("PODCRAFT_TTS_CACHE_BYTES", 512 * 1024 * 1024))
+
+VOICES = ("echo", "fable")
+
+
+def voice_for_line(index):
+    return VOICES[index % 2]
+
+
+def normalize_line(text):
+    return " ".join(text.split())
+
+
+def clip_key(voice, model, text, response_format="mp3"):
+    return content_key("tts", voice, model, response_format, normalize_line(text))
+
+
+def clip_cache():
+    return open_cache("tts_clips", max_bytes=TTS_CACHE_BYTES)
+
+
+def cached_synthesizer(synthesize, model, cache=None, response_format="mp3"):
+    def synthesize_cached(voice, text):
+        store = cache if cache is not None else clip_cache()
+        key = clip_key(voice, model, text, response_format)
+        clip = store.get(key)
+        if clip is None:
+            clip = synthesize(voice, normalize_line(text))
+            store.set(key, clip)
+        return clip
+
+    return synthesize_cached
+
+
+def iter_synthesized(lines, synthesize, max_in_flight=TTS_MAX_IN_FLIGHT):
+    """Yield (index, voice, audio_bytes) in line order while keeping at most
+    max_in_flight synthesis calls running."""
+    turns = ((voice_for_line(index), line) for index, line in enumerate(lines))
+    return iter_synthesized_turns(turns, synthesize, max_in_flight=max_in_flight)
+
+
+def iter_synthesized_turns(turns, synthesize, max_in_flight=TTS_MAX_IN_FLIGHT):
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = deque()
+        for index, (voice, text) in enumerate(turns):
+            future = executor.submit(
+                with_backoff, partial(synthesize, voice, text), TTS_MAX_RETRIES
+            )
+            pending.append((index, voice, future))
+            if len(pending) >= max_in_flight:
+                index, voice, future = pending.popleft()
+                yield index, voice, future.result()
+        while pending:
+            index, voice, future = pending.popleft()
+            yield index, voice, future.result()
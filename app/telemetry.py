@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from .workspace import jobs_dir
+except ImportError:
+    from workspace import jobs_dir
+
+
+LOG_FILE = os.environ.get("PODCRAFT_LOG_FILE", "logging.log")
+LOG_LEVEL = os.environ.get("PODCRAFT_LOG_LEVEL", "INFO")
+METRIC_PREFIX = "podcraft_"
+
+_logging_configured = False
+_state_lock = threading.Lock()
+_current_job = None
+_counters = {}
+_summaries = {}
+
+
+def configure_logging():
+    """Set up the shared log file once per process; later calls are no-ops."""
+    global _logging_configured
+    with _state_lock:
+        if _logging_configured:
+            return
+        logging.basicConfig(
+            filename=LOG_FILE,
+            filemode="a",
+            level=LOG_LEVEL,
+            format="%(asctime)s:%(process)d:%(levelname)s:%(message)s",
+        )
+        _logging_configured = True
+
+
+def telemetry_db_path():
+    return os.environ.get(
+        "PODCRAFT_TELEMETRY_DB", os.path.join(jobs_dir(), "telemetry.sqlite3")
+    )
+
+
+class TelemetryStore:
+    """Spans and metric totals shared by the API and the job worker processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS spans ("
+                "job_id TEXT NOT NULL, stage TEXT NOT NULL, start REAL NOT NULL, "
+                "duration REAL NOT NULL, status TEXT NOT NULL, attrs TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS spans_job ON spans (job_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS metrics ("
+                "name TEXT NOT NULL, labels TEXT NOT NULL, kind TEXT NOT NULL, "
+                "value REAL NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (name, labels))"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add_span(self, job_id, stage, start, duration, status, attrs):
+        self._connect().execute(
+            "INSERT INTO spans (job_id, stage, start, duration, status, attrs) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, stage, start, duration, status, json.dumps(attrs)),
+        )
+
+    def add_metrics(self, rows):
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO metrics (name, labels, kind, value, count) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (name, labels) DO UPDATE SET "
+                "value = value + excluded.value, count = count + excluded.count",
+                rows,
+            )
+
+    def timeline(self, job_id):
+        rows = self._connect().execute(
+            "SELECT stage, start, duration, status, attrs FROM spans "
+            "WHERE job_id = ? ORDER BY start",
+            (job_id,),
+        )
+        return [
+            {
+                "stage": row["stage"],
+                "start": row["start"],
+                "duration": row["duration"],
+                "status": row["status"],
+                **json.loads(row["attrs"] or "{}"),
+            }
+            for row in rows
+        ]
+
+    def metrics(self):
+        return [
+            dict(row)
+            for row in self._connect().execute(
+                "SELECT * FROM metrics ORDER BY name, labels"
+            )
+        ]
+
+
+_stores = {}
+
+
+def telemetry_store():
+    path = telemetry_db_path()
+    with _state_lock:
+        if path not in _stores:
+            _stores[path] = TelemetryStore(path)
+        return _stores[path]
+
+
+def set_job(job_id):
+    """Attribute spans recorded by this process to job_id (None to stop)."""
+    global _current_job
+    _current_job = job_id
+
+
+def current_job():
+    return _current_job
+
+
+def _labels(labels):
+    return json.dumps(labels, sort_keys=True)
+
+
+def count(name, value=1, **labels):
+    key = (name, _labels(labels))
+    with _state_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = (name, _labels(labels))
+    with _state_lock:
+        total, samples = _summaries.get(key, (0.0, 0))
+        _summaries[key] = (total + value, samples + 1)
+
+
+def record(stage, start, duration, status="ok", jobs=None, **attrs):
+    """Record a span for the process's current job, or for each of jobs when the
+    work was done on behalf of other jobs."""
+    observe("stage_seconds", duration, stage=stage)
+    logging.debug(f"{stage} took {duration:.3f}s {attrs}")
+    if jobs is None:
+        jobs = [] if _current_job is None else [_current_job]
+    for job_id in jobs:
+        telemetry_store().add_span(job_id, stage, start, duration, status, attrs)
+
+
+@contextmanager
+def span(stage, jobs=None, **attrs):
+    start = time.time()
+    began = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record(stage, start, time.perf_counter() - began, status, jobs=jobs, **attrs)
+
+
+def flush():
+    global _counters, _summaries
+    with _state_lock:
+        counters, _counters = _counters, {}
+        summaries, _summaries = _summaries, {}
+    rows = [
+        (name, labels, "counter", value, 0)
+        for (name, labels), value in counters.items()
+    ]
+    rows += [
+        (name, labels, "summary", total, samples)
+        for (name, labels), (total, samples) in summaries.items()
+    ]
+    if rows:
+        telemetry_store().add_metrics(rows)
+
+
+def job_timeline(job_id):
+    return telemetry_store().timeline(job_id)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    items = json.loads(labels)
+    if not items:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in items.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def render_metrics():
+    """Render every metric in the Prometheus text exposition format."""
+    flush()
+    lines = []
+    typed = set()
+    for row in telemetry_store().metrics():
+        name = METRIC_PREFIX + row["name"]
+        labels = _format_labels(row["labels"])
+        if name not in typed:
+            lines.append(f"# TYPE {name} {row['kind']}")
+            typed.add(name)
+        if row["kind"] == "counter":
+            lines.append(f"{name}{labels} {row['value']:g}")
+        else:
+            lines.append(f"{name}_sum{labels} {row['value']:.6f}")
+            lines.append(f"{name}_count{labels} {row['count']}")
+    return "\n".join(lines) + "\n"
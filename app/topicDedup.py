@@ -0,0 +1,104 @@
+import datetime
+import logging
+import os
+import time
+
+import numpy as np
+
+try:
+    from . import telemetry
+    from .episodeCatalog import episode_catalog
+    from .nbaScraper import is_recap_topic
+    from .similarity import cosine_similarities
+except ImportError:
+    import telemetry
+    from episodeCatalog import episode_catalog
+    from nbaScraper import is_recap_topic
+    from similarity import cosine_similarities
+
+
+DEDUP_THRESHOLD = float(os.environ.get("PODCRAFT_DEDUP_THRESHOLD", 0.95))
+DEDUP_WINDOW_HOURS = float(os.environ.get("PODCRAFT_DEDUP_WINDOW_HOURS", 24))
+DEDUP_MODEL = "text-embedding-ada-002"
+
+
+def normalize_topic(topic):
+    """Key under which spelling variants such as "open ai" and "OpenAI" match."""
+    return "".join(char for char in topic.casefold() if char.isalnum())
+
+
+def comparable(topic, episode, now):
+    """Recap episodes are about the games of the day before they were made, so
+    they only stand in for a recap topic requested on the same day."""
+    recap = is_recap_topic(episode["topic"])
+    if recap != is_recap_topic(topic):
+        return False
+    return not recap or (
+        datetime.date.fromtimestamp(episode["created"])
+        == datetime.date.fromtimestamp(now)
+    )
+
+
+def find_duplicate(
+    topic,
+    embed,
+    threshold=DEDUP_THRESHOLD,
+    window_hours=DEDUP_WINDOW_HOURS,
+    model=DEDUP_MODEL,
+    catalog=None,
+    now=None,
+):
+    """Return the newest fresh episode whose topic matches topic, or None.
+
+    Topics that normalize to the same key match without an embedding call;
+    otherwise embed(texts) is called once for the query and any candidate topics
+    not yet in the index, and the closest topic above threshold wins.
+    """
+    if window_hours <= 0:
+        return None
+    catalog = catalog or episode_catalog()
+    now = now or time.time()
+    since = now - window_hours * 3600
+    candidates = [
+        episode
+        for episode in catalog.recent(since)
+        if os.path.exists(episode["path"]) and comparable(topic, episode, now)
+    ]
+    if not candidates:
+        return None
+
+    key = normalize_topic(topic)
+    for episode in candidates:
+        if normalize_topic(episode["topic"]) == key:
+            telemetry.count("dedup_hits_total", match="exact")
+            return episode
+    if threshold > 1:
+        return None
+
+    with telemetry.span("dedup", candidates=len(candidates)):
+        stored = catalog.topic_vectors([episode["id"] for episode in candidates], model)
+        missing = [episode for episode in candidates if episode["id"] not in stored]
+        embedded = np.asarray(
+            embed([topic] + [episode["topic"] for episode in missing]), dtype=np.float32
+        )
+        fresh = {
+            episode["id"]: vector.tobytes() for episode, vector in zip(missing, embedded[1:])
+        }
+        if fresh:
+            catalog.set_topic_vectors(fresh, model)
+        stored.update(fresh)
+
+        vectors = np.vstack(
+            [np.frombuffer(stored[episode["id"]], dtype=np.float32) for episode in candidates]
+        )
+        similarities = cosine_similarities(embedded[0], vectors)
+    best = int(np.argmax(similarities))
+    if similarities[best] < threshold:
+        telemetry.count("dedup_misses_total")
+        return None
+    logging.info(
+        f"Topic {topic!r} matches episode {candidates[best]['id']} "
+        f"({candidates[best]['topic']!r}, similarity {similarities[best]:.3f})"
+    )
+    telemetry.count("dedup_hits_total", match="semantic")
+    return candidates[best]
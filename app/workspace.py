@@ -0,0 +1,75 @@
+import os
+import shutil
+import uuid
+
+
+def jobs_dir():
+    return os.environ.get("PODCRAFT_JOBS_DIR", "jobs")
+
+
+def safe_topic(topic):
+    return topic.replace(" ", "_")
+
+
+class JobWorkspace:
+    """Directory holding every artifact of one generation run."""
+
+    def __init__(self, root="", job_id=None):
+        self.root = root
+        self.job_id = job_id
+
+    @classmethod
+    def create(cls, base_dir=None, job_id=None):
+        job_id = job_id or uuid.uuid4().hex
+        root = os.path.join(base_dir or jobs_dir(), job_id)
+        os.makedirs(root, exist_ok=True)
+        return cls(root, job_id)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    @property
+    def host1(self):
+        return self.path("host1.txt")
+
+    @property
+    def host2(self):
+        return self.path("host2.txt")
+
+    @property
+    def merged(self):
+        return self.path("merged_dialogue.txt")
+
+    @property
+    def revised(self):
+        return self.path("revised_dialogue.txt")
+
+    @property
+    def intro_stem(self):
+        return self.path("introMusic")
+
+    @property
+    def intro(self):
+        return self.intro_stem + ".wav"
+
+    @property
+    def speech(self):
+        return self.path("final_podcast.mp3")
+
+    @property
+    def timeline(self):
+        return self.path("timeline.pcm")
+
+    @property
+    def manifest(self):
+        return self.path("manifest.json")
+
+    def episode(self, topic, format="mp3"):
+        return self.path(f"{safe_topic(topic)}.{format}")
+
+    def cleanup(self):
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+DEFAULT_WORKSPACE = JobWorkspace()
@@ -0,0 +1,83 @@
+"""Time the streaming dialogue parser against the file round-trip it replaced.
+
+Run with ``python -m benchmarks.bench_dialogue_parser [turns]``.
+"""
+
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from app.dialogueParser import clean_line, iter_lines, iter_turns
+from app.podcastCreator import extract_dialogue, merge_text_files
+from app.workspace import JobWorkspace
+
+WORDS = "the game was close until the final quarter when both teams traded threes".split()
+
+
+def synthetic_script(turns, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for index in range(turns):
+        if index % 40 == 0:
+            lines.append(f"**Segment {index // 40 + 1}: Highlights**")
+        host = "Ofir" if index % 2 == 0 else "Daniel"
+        label = f"**{host}:** " if rng.random() < 0.5 else f"{host}: "
+        for _ in range(rng.randint(1, 3)):
+            lines.append(label + " ".join(rng.choices(WORDS, k=rng.randint(8, 30))))
+        if rng.random() < 0.1:
+            lines.append("(music fades)")
+    return "\n".join(lines)
+
+
+def legacy_clean(line):
+    cleaned_line = re.sub(
+        r"^\*\*(Ofir|Daniel):\*\*\s*|^(\*\*Ofir\*\*:\s*|\*\*Daniel\*\*:\s*)|(Ofir:|Daniel:)\s*",
+        "",
+        line,
+    )
+    cleaned_line = re.sub(r"\*\*(.*?)\*\*", r"\1", cleaned_line)
+    cleaned_line = re.sub(
+        r"\bsegment\s+\d+\b", "", cleaned_line, flags=re.IGNORECASE
+    ).strip()
+    cleaned_line = re.sub(r"\boutro\b", "", cleaned_line, flags=re.IGNORECASE).strip()
+    return re.sub(r"\s{2,}", " ", cleaned_line)
+
+
+def file_round_trip(script):
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = JobWorkspace(tmp)
+        extract_dialogue(script, workspace)
+        merge_text_files(workspace.host1, workspace.host2, workspace.merged)
+        with open(workspace.merged, encoding="utf-8") as merged:
+            return [legacy_clean(line) for line in merged]
+
+
+def streaming(script):
+    chunks = (script[i : i + 4096] for i in range(0, len(script), 4096))
+    return [clean_line(turn.text) for turn in iter_turns(iter_lines(chunks))]
+
+
+def timed(function, script, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(script)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    script = synthetic_script(turns)
+    print(f"{turns} turns, {len(script) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+    baseline = timed(file_round_trip, script)
+    candidate = timed(streaming, script)
+    print(f"file round-trip: {baseline * 1000:8.1f} ms")
+    print(f"streaming:       {candidate * 1000:8.1f} ms  ({baseline / candidate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Time the NumPy episode mix against the pydub fades and concatenation it replaced.
+
+Run with ``python -m benchmarks.bench_mixing [turns]``.
+"""
+
+import sys
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from app.audioMixing import mix_episode
+
+SAMPLE_RATE = 24000
+INTRO_SECONDS = 7
+TURN_SECONDS = 6
+
+
+def synthetic_audio(turns, seed=0):
+    rng = np.random.default_rng(seed)
+    intro = (rng.standard_normal(SAMPLE_RATE * INTRO_SECONDS) * 3000).astype(np.int16)
+    clips = [
+        (rng.standard_normal(SAMPLE_RATE * TURN_SECONDS) * rng.uniform(500, 8000)).astype(
+            np.int16
+        )
+        for _ in range(turns)
+    ]
+    return intro, clips
+
+
+def segment(samples):
+    return AudioSegment(
+        data=samples.tobytes(), sample_width=2, frame_rate=SAMPLE_RATE, channels=1
+    )
+
+
+def pydub_mix(intro, clips):
+    episode = segment(intro).fade_in(1500).fade_out(1500)
+    pause = AudioSegment.silent(duration=400, frame_rate=SAMPLE_RATE)
+    for clip in clips:
+        episode += segment(clip) + pause
+    return np.frombuffer(episode.raw_data, dtype=np.int16)
+
+
+def numpy_mix(intro, clips):
+    return mix_episode(intro, clips, SAMPLE_RATE)
+
+
+def timed(function, intro, clips, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(intro, clips)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    intro, clips = synthetic_audio(turns)
+    minutes = (INTRO_SECONDS + turns * (TURN_SECONDS + 0.4)) / 60
+    print(f"{turns} turns, {minutes:.1f} minutes of audio at {SAMPLE_RATE} Hz")
+    baseline = timed(pydub_mix, intro, clips)
+    candidate = timed(numpy_mix, intro, clips)
+    print(f"pydub (no normalization): {baseline * 1000:8.1f} ms")
+    print(
+        f"numpy (normalized):       {candidate * 1000:8.1f} ms  "
+        f"({baseline / candidate:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""End-to-end pipeline benchmark against local fakes.
+
+Runs full episodes through the job queue at several concurrency levels and
+reports per-stage wall-clock time, throughput and peak RSS. Each level runs
+--repeat times and the medians are compared with a stored baseline: lower
+throughput or higher peak RSS fails the run, slower stages are reported as
+advisory. Provider rate
+limits are lifted unless PODCRAFT_RATE_LIMITS is set, so the numbers reflect the
+pipeline rather than the API quota.
+
+    python -m benchmarks.bench_pipeline                  # compare with baseline
+    python -m benchmarks.bench_pipeline --update-baseline
+    python -m benchmarks.bench_pipeline --jobs 1,4 --latency 0.05 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from app import telemetry
+from app.jobQueue import JobQueue
+from app.podcastCreator import stream_podcast
+from app.rateLimit import RATE_LIMITS
+from app.workspace import JobWorkspace
+
+from benchmarks import fakes
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_JOBS = "1,4,16"
+DEFAULT_LATENCY = 0.1
+DEFAULT_REPEAT = 3
+# Medians of the same commit still differ by ~20% in throughput between runs,
+# and single stages by 50% or more, so stages are only reported (see compare).
+DEFAULT_TOLERANCE = 0.3
+STAGE_NOISE_SECONDS = 0.15
+UNLIMITED_RATES = ",".join(f"{bucket}=1000000" for bucket in RATE_LIMITS)
+
+_installed = False
+
+
+def benchmark_task(topic, job_id=None, on_stage=None):
+    global _installed
+    if not _installed:
+        fakes.install(float(os.environ["PODCRAFT_BENCH_LATENCY"]))
+        _installed = True
+
+    workspace = JobWorkspace.create(job_id=job_id)
+    # Every job starts cold so cached clips from earlier jobs don't hide work.
+    os.environ["PODCRAFT_CACHE_DIR"] = workspace.path("cache")
+    return stream_podcast(topic, workspace=workspace, format="wav", on_stage=on_stage)
+
+
+def stage_walls(timeline):
+    """Wall-clock seconds per stage, from its first span's start to its last end."""
+    bounds = {}
+    for span in timeline:
+        start, end = span["start"], span["start"] + span["duration"]
+        first, last = bounds.get(span["stage"], (start, end))
+        bounds[span["stage"]] = (min(first, start), max(last, end))
+    return {stage: end - start for stage, (start, end) in bounds.items()}
+
+
+def peak_rss_mb():
+    usage = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return usage / 1024
+
+
+def run_level(jobs):
+    queue = JobQueue(benchmark_task, workers=jobs, max_queue_depth=jobs)
+    started = time.perf_counter()
+    job_ids = [
+        queue.submit("nba" if index % 4 == 0 else f"benchmark topic {index}")
+        for index in range(jobs)
+    ]
+    queue.shutdown(wait=True)
+    elapsed = time.perf_counter() - started
+
+    statuses = [queue.status(job_id) for job_id in job_ids]
+    failed = [job for job in statuses if job["status"] != "completed"]
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} benchmark jobs failed: {failed[0]['error']}"
+        )
+
+    walls = [stage_walls(job["timeline"]) for job in statuses]
+    stages = sorted({stage for wall in walls for stage in wall})
+    return {
+        "jobs": jobs,
+        "seconds": round(elapsed, 3),
+        "episodes_per_minute": round(60 * jobs / elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": {
+            stage: round(
+                sum(wall.get(stage, 0.0) for wall in walls) / len(walls), 3
+            )
+            for stage in stages
+        },
+    }
+
+
+def run_isolated(jobs, latency):
+    """Run one concurrency level in a fresh interpreter so RSS and caches are clean."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            PODCRAFT_JOBS_DIR=os.path.join(tmp, "jobs"),
+            PODCRAFT_CACHE_DIR=os.path.join(tmp, "cache"),
+            PODCRAFT_BENCH_LATENCY=str(latency),
+            PODCRAFT_LOG_FILE=os.path.join(tmp, "benchmark.log"),
+            PODCRAFT_RATE_LIMITS=os.environ.get("PODCRAFT_RATE_LIMITS", UNLIMITED_RATES),
+            OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "benchmark"),
+            GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY", "benchmark"),
+        )
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_pipeline", "--level", str(jobs)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def median_result(runs):
+    """Median of every metric over repeated runs of one concurrency level."""
+    stages = sorted({stage for run in runs for stage in run["stages"]})
+    return {
+        "jobs": runs[0]["jobs"],
+        "runs": len(runs),
+        **{
+            name: round(statistics.median(run[name] for run in runs), 3)
+            for name in ("seconds", "episodes_per_minute", "peak_rss_mb")
+        },
+        "stages": {
+            stage: round(
+                statistics.median(run["stages"].get(stage, 0.0) for run in runs), 3
+            )
+            for stage in stages
+        },
+    }
+
+
+def run_repeated(jobs, latency, repeat):
+    return median_result([run_isolated(jobs, latency) for _ in range(repeat)])
+
+
+def compare(results, baseline, tolerance):
+    """Return (regressions, slower_stages): descriptions of every metric that got
+    worse than baseline by more than tolerance. Only throughput and peak RSS
+    fail the run; per-stage wall times swing with CPU contention between jobs,
+    so they are advisory, and changes within STAGE_NOISE_SECONDS are ignored."""
+    regressions, slower_stages = [], []
+    for result in results:
+        reference = baseline.get("levels", {}).get(str(result["jobs"]))
+        if reference is None:
+            continue
+        checks = [
+            (
+                regressions,
+                "episodes_per_minute",
+                -reference["episodes_per_minute"],
+                -result["episodes_per_minute"],
+                0.0,
+            ),
+            (
+                regressions,
+                "peak_rss_mb",
+                reference["peak_rss_mb"],
+                result["peak_rss_mb"],
+                0.0,
+            ),
+        ]
+        checks += [
+            (
+                slower_stages,
+                f"stage {stage}",
+                seconds,
+                result["stages"].get(stage, 0.0),
+                STAGE_NOISE_SECONDS,
+            )
+            for stage, seconds in reference["stages"].items()
+        ]
+        for found, name, before, after, noise in checks:
+            if not before or after - before <= noise:
+                continue
+            change = (after - before) / abs(before)
+            if change > tolerance:
+                found.append(
+                    f"{result['jobs']} jobs: {name} {abs(before):g} -> {abs(after):g}"
+                )
+    return regressions, slower_stages
+
+
+def print_report(results):
+    for result in results:
+        print(
+            f"{result['jobs']:>3} jobs: {result['seconds']:8.2f}s  "
+            f"{result['episodes_per_minute']:7.2f} episodes/min  "
+            f"peak RSS {result['peak_rss_mb']:.0f} MB  "
+            f"(median of {result.get('runs', 1)})"
+        )
+        for stage, seconds in sorted(result["stages"].items()):
+            print(f"      {stage:<12} {seconds:8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", default=DEFAULT_JOBS)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.level:
+        telemetry.configure_logging()
+        print(json.dumps(run_level(args.level)))
+        return
+
+    results = [
+        run_repeated(int(jobs), args.latency, args.repeat)
+        for jobs in args.jobs.split(",")
+    ]
+    print_report(results)
+
+    if args.update_baseline:
+        baseline = {
+            "latency": args.latency,
+            "levels": {str(result["jobs"]): result for result in results},
+        }
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Wrote baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline.")
+        return
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("latency") != args.latency:
+        print(f"Baseline was recorded with --latency {baseline.get('latency')}.")
+        return
+    regressions, slower_stages = compare(results, baseline, args.tolerance)
+    for stage in slower_stages:
+        print(f"slower (advisory) {stage}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
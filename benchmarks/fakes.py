@@ -0,0 +1,100 @@
+"""Deterministic local stand-ins for every external dependency of the pipeline."""
+
+import datetime
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Imported first so registering the real providers can't replace the fakes.
+from app import podcastCreator  # noqa: F401
+from app import fakeProviders, providers
+
+# Seconds per call for each fake, multiplied by the --latency scale.
+LATENCIES = {
+    "gemini": 0.4,
+    "openai": 0.1,
+    "music": 1.0,
+    "wikipedia": 0.05,
+    "nba": 0.1,
+}
+
+
+class DisambiguationError(Exception):
+    def __init__(self, options):
+        super().__init__(options)
+        self.options = options
+
+
+class StubWikipedia:
+    """Replacement for the wikipedia module with canned search results."""
+
+    exceptions = SimpleNamespace(DisambiguationError=DisambiguationError)
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def set_lang(self, lang):
+        pass
+
+    def search(self, query, results=3):
+        time.sleep(self.latency)
+        return [f"{query} ({number})" for number in range(1, results + 1)]
+
+    def summary(self, title, auto_suggest=False):
+        time.sleep(self.latency)
+        return f"{title} is a frequently discussed subject. " * 20
+
+    def page(self, title):
+        return SimpleNamespace(summary=self.summary(title))
+
+
+def nba_page():
+    now = datetime.datetime.now()
+    heading = "<b>NBA Daily For {}</b>"
+    days = [
+        (now - datetime.timedelta(days=offset)).strftime("%A, %B %d, %Y")
+        for offset in (1, 2)
+    ]
+    games = "".join(
+        f"<p>Team {i} beat Team {i + 1} by {i + 3} points.<br/></p>" for i in range(30)
+    )
+    return (
+        "<html><body>"
+        + heading.format(days[0])
+        + games
+        + heading.format(days[1])
+        + "<p>Older games</p></body></html>"
+    ).encode("utf-8")
+
+
+class CannedNBASession:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        time.sleep(self.latency)
+        page = nba_page()
+        return SimpleNamespace(
+            status_code=200,
+            headers={},
+            encoding="utf-8",
+            iter_content=lambda chunk_size: [
+                page[i : i + chunk_size] for i in range(0, len(page), chunk_size)
+            ],
+            raise_for_status=lambda: None,
+            close=lambda: None,
+        )
+
+
+def install(scale=1.0):
+    """Swap every provider and network dependency for its local fake."""
+    latency = {name: seconds * scale for name, seconds in LATENCIES.items()}
+    providers.override("openai", fakeProviders.FakeOpenAI(latency["openai"]))
+    providers.override("gemini", fakeProviders.FakeGemini(latency["gemini"]))
+    providers.override("music", fakeProviders.FakeMusicGen(latency["music"]))
+    session = CannedNBASession(latency["nba"])
+    for patcher in (
+        patch("app.podcastCreator.wikipedia", StubWikipedia(latency["wikipedia"])),
+        patch("app.nbaScraper.http_session", lambda: session),
+    ):
+        patcher.start()
@@ -0,0 +1,15 @@
+import pytest
+from app import introMusic, telemetry
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_dirs(tmp_path, monkeypatch):
+    monkeypatch.setenv("PODCRAFT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("PODCRAFT_JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setenv("PODCRAFT_EPISODES_DIR", str(tmp_path / "episodes"))
+    # Music worker threads exit as soon as they are idle unless a test says otherwise.
+    monkeypatch.setattr(introMusic, "MUSIC_IDLE_SECONDS", 0)
+    yield
+    # Keep metrics recorded by one test out of the next test's store.
+    telemetry.flush()
+    telemetry.set_job(None)
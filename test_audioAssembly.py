@@ -0,0 +1,49 @@
+import wave
+import numpy as np
+from app.audioAssembly import PcmTrack, StreamingEncoder, decode_clip
+
+
+def test_decode_pcm_clip_without_copying_through_disk():
+    samples = np.array([0, 1000, -1000, 32767], dtype=np.int16)
+
+    decoded = decode_clip(samples.tobytes(), "pcm", 24000)
+
+    assert decoded.tolist() == samples.tolist()
+
+
+def test_pcm_track_joins_chunks_in_order():
+    track = PcmTrack(1000)
+    pause = track.silence(2)
+    track.append(np.array([1, 2], dtype=np.int16))
+    track.append(pause)
+    track.append(np.array([3], dtype=np.int16))
+    track.append(pause)
+
+    assert track.to_array().tolist() == [1, 2, 0, 0, 3, 0, 0]
+    assert track.duration_seconds() == 0.007
+
+
+def test_pcm_track_exports_once(tmpdir):
+    track = PcmTrack(8000)
+    track.append(np.arange(800, dtype=np.int16))
+    output = str(tmpdir.join("speech.wav"))
+
+    track.export(output)
+
+    with wave.open(output) as exported:
+        assert exported.getframerate() == 8000
+        assert exported.getnframes() == 800
+    assert track.chunks == []
+
+
+def test_streaming_encoder_writes_incrementally(tmpdir):
+    output = str(tmpdir.join("episode.wav"))
+
+    with StreamingEncoder(output, 8000) as encoder:
+        encoder.write(np.ones(100, dtype=np.int16))
+        encoder.write(np.zeros(50, dtype=np.int16))
+        assert encoder.duration_seconds() == 150 / 8000
+
+    with wave.open(output) as exported:
+        samples = np.frombuffer(exported.readframes(exported.getnframes()), np.int16)
+    assert samples.tolist() == [1] * 100 + [0] * 50
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from app.audioMixing import (
+    EpisodeMixer,
+    fade,
+    fade_curve,
+    mix_episode,
+    normalize,
+    rms_dbfs,
+    to_float,
+    to_pcm16,
+)
+
+RATE = 1000
+
+
+def sine(amplitude, samples=RATE, frequency=50):
+    time = np.arange(samples) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * time)).astype(np.int16)
+
+
+def test_normalize_reaches_target_loudness_in_place():
+    quiet = to_float(sine(1000))
+    loud = to_float(sine(20000))
+
+    assert normalize(quiet, -20) is quiet
+    normalize(loud, -20)
+
+    assert rms_dbfs(quiet) == pytest.approx(-20, abs=0.05)
+    assert rms_dbfs(loud) == pytest.approx(-20, abs=0.05)
+
+
+def test_normalize_limits_gain_and_peaks():
+    whisper = to_float(sine(10))
+    normalize(whisper, -20, max_gain_db=20)
+    assert np.max(np.abs(whisper)) == pytest.approx(100 / 32768, rel=0.01)
+
+    spike = np.zeros(RATE, dtype=np.float32)
+    spike[0] = 0.1
+    normalize(spike, -3)
+    assert spike[0] == pytest.approx(10 ** (-1 / 20))
+
+    silent = np.zeros(10, dtype=np.float32)
+    assert not normalize(silent, -20).any()
+
+
+@pytest.mark.parametrize("curve", ["linear", "equal_power", "logarithmic"])
+def test_fade_curves_ramp_from_silence_to_unity(curve):
+    ramp = fade_curve(100, curve)
+    assert ramp[0] == 0 and ramp[-1] == pytest.approx(1)
+    assert np.all(np.diff(ramp) >= 0)
+    samples = np.ones(1000, dtype=np.float32)
+    fade(samples, RATE, fade_in_ms=100, fade_out_ms=200, curve=curve)
+    assert samples[0] == 0 and samples[-1] == 0
+    assert samples[500] == 1
+
+
+def test_to_pcm16_clips_instead_of_wrapping():
+    assert to_pcm16(np.array([-2.0, -0.5, 0.5, 2.0], dtype=np.float32)).tolist() == [
+        -32768,
+        -16384,
+        16384,
+        32767,
+    ]
+
+
+def test_mixer_adds_pause_after_every_turn():
+    mixer = EpisodeMixer(RATE, intro=sine(5000, 2000), pause_ms=100, duck_lines=0)
+
+    intro = mixer.start()
+    first = mixer.add(sine(3000, 300))
+    second = mixer.add(sine(9000, 300))
+
+    assert len(intro) == 2000
+    assert len(first) == len(second) == 400
+    assert not first[300:].any()
+    assert rms_dbfs(to_float(first[:300])) == pytest.approx(
+        rms_dbfs(to_float(second[:300])), abs=0.1
+    )
+    assert len(mixer.finish()) == 0
+
+
+def test_mixer_ducks_music_under_the_first_lines():
+    intro = sine(5000, 6000)
+    mixer = EpisodeMixer(RATE, intro=intro, pause_ms=0, duck_lines=2, fade_ms=500)
+
+    lead = mixer.start()
+    lines = [mixer.add(np.zeros(1000, dtype=np.int16)) for _ in range(3)]
+
+    # Three seconds of intro lead in, then the rest plays quietly under two
+    # lines and fades out at the end of the second.
+    assert len(lead) == 3000
+    assert np.abs(lines[0][500:]).max() < np.abs(lead[1000:2500]).max() / 4
+    assert lines[1][-1] == 0
+    assert not lines[2].any()
+
+
+def test_mix_episode_matches_streaming_mixer():
+    intro, clips = sine(4000, 2500), [sine(2000, 500), sine(8000, 700)]
+
+    mixed = mix_episode(intro, clips, RATE, pause_ms=50)
+
+    mixer = EpisodeMixer(RATE, intro, pause_ms=50)
+    streamed = np.concatenate(
+        [mixer.start(), *(mixer.add(clip) for clip in clips), mixer.finish()]
+    )
+    assert mixed.dtype == np.int16
+    assert mixed.tolist() == streamed.tolist()
+    assert len(mixed) == 2500 + 550 + 750
@@ -0,0 +1,58 @@
+from app.dialogueParser import Turn, clean_line, iter_lines, iter_revised_turns, iter_turns
+
+
+def test_iter_turns_merges_consecutive_lines_of_one_host():
+    script = [
+        "**Segment 1: Opening**",
+        "Ofir: Welcome to the show.",
+        "Ofir: Today we talk about space.",
+        "Daniel: Sounds great.",
+        "Some stage direction",
+        "Ofir: Let's go.",
+    ]
+
+    assert list(iter_turns(script)) == [
+        Turn("Ofir", "Welcome to the show. Today we talk about space."),
+        Turn("Daniel", "Sounds great."),
+        Turn("Ofir", "Let's go."),
+    ]
+
+
+def test_iter_turns_handles_bold_labels():
+    script = ["**Ofir:** Hello there", "**Daniel:** Hi", "**Ofir:**Hey"]
+
+    assert list(iter_turns(script)) == [
+        Turn("Ofir", "Hello there"),
+        Turn("Daniel", "Hi"),
+        Turn("Ofir", "**Ofir:**Hey"),
+    ]
+
+
+def test_iter_turns_skips_empty_turns():
+    assert list(iter_turns(["Ofir:", "Daniel:   ", "No speakers here"])) == []
+
+
+def test_iter_turns_consumes_streamed_chunks():
+    chunks = ["Ofir: Hel", "lo\nDan", "iel: Hi\nOfir: Bye"]
+
+    assert list(iter_turns(iter_lines(chunks))) == [
+        Turn("Ofir", "Hello"),
+        Turn("Daniel", "Hi"),
+        Turn("Ofir", "Bye"),
+    ]
+
+
+def test_clean_line_strips_labels_and_markup():
+    assert clean_line("**Ofir:** This is **bold** segment 2  outro  text") == (
+        "This is bold text"
+    )
+
+
+def test_iter_revised_turns_keeps_speakers():
+    revised = "**Ofir:** Welcome back!\n\nDaniel: Thanks, segment 2 time.\nAnd more."
+
+    assert list(iter_revised_turns(revised.split("\n"))) == [
+        Turn("Ofir", "Welcome back!"),
+        Turn("Daniel", "Thanks, time."),
+        Turn("Ofir", "And more."),
+    ]
@@ -0,0 +1,57 @@
+import time
+from app.diskCache import DiskCache, content_key, open_cache
+
+
+def test_content_key_is_stable_and_separates_parts():
+    assert content_key("a", "b") == content_key("a", "b")
+    assert content_key("ab", "") != content_key("a", "b")
+
+
+def test_disk_cache_round_trip_and_counters(tmpdir):
+    cache = DiskCache(str(tmpdir.join("cache.sqlite3")))
+    cache.set("key", b"value")
+
+    assert cache.get("key") == b"value"
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_cache_evicts_least_recently_used(tmpdir):
+    cache = DiskCache(str(tmpdir.join("cache.sqlite3")), max_entries=2)
+    cache.set("a", b"1")
+    time.sleep(0.01)
+    cache.set("b", b"2")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", b"3")
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": b"1", "c": b"3"}
+
+
+def test_disk_cache_respects_byte_cap(tmpdir):
+    cache = DiskCache(str(tmpdir.join("cache.sqlite3")), max_bytes=10)
+    cache.set("a", b"123456")
+    time.sleep(0.01)
+    cache.set("b", b"123456")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == b"123456"
+
+
+def test_disk_cache_expires_entries(tmpdir):
+    cache = DiskCache(str(tmpdir.join("cache.sqlite3")), ttl=0.01)
+    cache.set("a", b"1")
+    assert "a" in cache
+    time.sleep(0.02)
+
+    assert "a" not in cache
+    assert cache.get("a") is None
+
+
+def test_open_cache_persists_between_instances(tmpdir, monkeypatch):
+    monkeypatch.setenv("PODCRAFT_CACHE_DIR", str(tmpdir))
+    open_cache("shared").set("a", b"1")
+
+    assert DiskCache(str(tmpdir.join("shared.sqlite3"))).get("a") == b"1"
@@ -0,0 +1,59 @@
+from app.episodeCatalog import EpisodeCatalog, episode_catalog, file_etag
+
+
+def test_add_and_lookup_episode(tmp_path):
+    audio = tmp_path / "topic_podcast.mp3"
+    audio.write_bytes(b"audio")
+    catalog = EpisodeCatalog(str(tmp_path / "catalog.sqlite3"))
+
+    episode = catalog.add("topic", str(audio), job_id="job1", duration=12.5)
+
+    assert episode["id"] == "job1"
+    assert episode["filename"] == "topic_podcast.mp3"
+    assert episode["size"] == 5
+    assert episode["etag"] == file_etag(str(audio))
+    assert catalog.get("job1") == episode
+    assert catalog.find("topic_podcast.mp3") == episode
+    assert catalog.get("missing") is None
+
+
+def test_republishing_a_path_replaces_the_old_entry(tmp_path):
+    audio = tmp_path / "topic_podcast.mp3"
+    audio.write_bytes(b"first")
+    catalog = EpisodeCatalog(str(tmp_path / "catalog.sqlite3"))
+    catalog.add("topic", str(audio), job_id="job1")
+    audio.write_bytes(b"second take")
+    catalog.add("topic", str(audio), job_id="job2")
+
+    assert [episode["id"] for episode in catalog.list()] == ["job2"]
+    assert catalog.find("topic_podcast.mp3")["size"] == len(b"second take")
+
+
+def test_updating_an_episode_keeps_its_created_time(tmp_path):
+    audio = tmp_path / "topic_podcast.mp3"
+    audio.write_bytes(b"first")
+    catalog = EpisodeCatalog(str(tmp_path / "catalog.sqlite3"))
+    created = catalog.add("topic", str(audio), job_id="job1")["created"]
+    audio.write_bytes(b"edited")
+
+    episode = catalog.add("topic", str(audio), episode_id="job1")
+
+    assert episode["created"] == catalog.get("job1")["created"] == created
+    assert episode["size"] == len(b"edited")
+
+
+def test_list_is_newest_first_and_paginated(tmp_path):
+    catalog = EpisodeCatalog(str(tmp_path / "catalog.sqlite3"))
+    for index in range(3):
+        audio = tmp_path / f"episode{index}.mp3"
+        audio.write_bytes(b"x")
+        catalog.add(f"topic {index}", str(audio), job_id=f"job{index}")
+
+    assert [episode["id"] for episode in catalog.list()] == ["job2", "job1", "job0"]
+    assert [episode["id"] for episode in catalog.list(limit=1, offset=1)] == ["job1"]
+    catalog.remove("job1")
+    assert [episode["id"] for episode in catalog.list()] == ["job2", "job0"]
+
+
+def test_episode_catalog_is_shared_per_path():
+    assert episode_catalog() is episode_catalog()
@@ -0,0 +1,110 @@
+import numpy as np
+from app.episodeTimeline import (
+    TimelineRecorder,
+    format_dialogue,
+    load_manifest,
+    match_turns,
+    parse_dialogue_edit,
+    read_timeline,
+    segment_samples,
+    timeline_paths,
+)
+
+VOICES = {"Ofir": "echo", "Daniel": "fable"}
+
+
+def test_timeline_recorder_round_trip(tmp_path):
+    pcm_path, manifest_path = str(tmp_path / "t.pcm"), str(tmp_path / "t.json")
+    with TimelineRecorder(pcm_path, manifest_path, sample_rate=24000) as timeline:
+        timeline.intro(np.full(3, 1, dtype=np.int16))
+        timeline.turn(np.full(2, 2, dtype=np.int16), "echo", "Hi", "clip-a")
+        timeline.turn(np.full(4, 3, dtype=np.int16), "fable", "Hello", "clip-b")
+        timeline.tail(np.zeros(0, dtype=np.int16))
+
+    manifest = load_manifest(manifest_path)
+    samples = read_timeline(pcm_path)
+    assert manifest["sample_rate"] == 24000
+    assert manifest["turns"][1] == {
+        "voice": "fable",
+        "text": "Hello",
+        "clip": "clip-b",
+        "start": 5,
+        "length": 4,
+    }
+    assert segment_samples(samples, manifest["intro"]).tolist() == [1, 1, 1]
+    assert segment_samples(samples, manifest["turns"][1]).tolist() == [3] * 4
+    assert len(segment_samples(samples, manifest["tail"])) == 0
+
+
+def test_timeline_paths_are_per_episode():
+    pcm_path, manifest_path, edit_path = timeline_paths("abc")
+    assert pcm_path.endswith("abc.pcm")
+    assert manifest_path.endswith("abc.json")
+    assert edit_path.endswith("abc.edit.txt")
+
+
+def test_parse_dialogue_edit_keeps_voices_by_position():
+    turns = [{"voice": "fable", "text": "One"}, {"voice": "echo", "text": "Two"}]
+    assert parse_dialogue_edit("One\nTwo, edited\n", turns, VOICES) == [
+        ("fable", "One"),
+        ("echo", "Two, edited"),
+    ]
+
+
+SIX_TURNS = [
+    {"voice": voice, "text": text}
+    for voice, text in zip(
+        ["echo", "fable", "fable", "echo", "fable", "echo"],
+        ["Line A", "Line B", "Line C", "Line D", "Line E", "Line F"],
+    )
+]
+
+
+def test_parse_dialogue_edit_keeps_voices_when_a_line_is_deleted():
+    dialogue = "\n".join(turn["text"] for turn in SIX_TURNS[1:])
+    assert parse_dialogue_edit(dialogue, SIX_TURNS, VOICES) == [
+        (turn["voice"], turn["text"]) for turn in SIX_TURNS[1:]
+    ]
+
+
+def test_parse_dialogue_edit_keeps_voices_when_a_line_is_inserted():
+    texts = [turn["text"] for turn in SIX_TURNS]
+    dialogue = "\n".join(texts[:2] + ["Something new"] + texts[2:])
+    edited = parse_dialogue_edit(dialogue, SIX_TURNS, VOICES)
+    assert edited[:2] + edited[3:] == [
+        (turn["voice"], turn["text"]) for turn in SIX_TURNS
+    ]
+    # A new line answers the one before it.
+    assert edited[2] == ("echo", "Something new")
+
+
+def test_parse_dialogue_edit_keeps_voice_of_a_rewritten_line_next_to_a_deletion():
+    dialogue = "\n".join(["Line B, reworded"] + [t["text"] for t in SIX_TURNS[2:]])
+    assert parse_dialogue_edit(dialogue, SIX_TURNS, VOICES)[0] == (
+        "fable",
+        "Line B, reworded",
+    )
+
+
+def test_format_dialogue_round_trips_through_parse_dialogue_edit():
+    dialogue = format_dialogue(SIX_TURNS, VOICES)
+    assert dialogue.splitlines()[1] == "Daniel: Line B"
+    assert parse_dialogue_edit(dialogue, [], VOICES) == [
+        (turn["voice"], turn["text"]) for turn in SIX_TURNS
+    ]
+
+
+def test_parse_dialogue_edit_uses_labels_and_alternates_new_lines():
+    turns = [{"voice": "echo", "text": "One"}]
+    edited = parse_dialogue_edit("Daniel: One\nTwo\n\nThree", turns, VOICES)
+    assert edited == [("fable", "One"), ("echo", "Two"), ("fable", "Three")]
+
+
+def test_match_turns_maps_unchanged_lines_to_old_turns():
+    turns = [
+        {"voice": "echo", "text": "One"},
+        {"voice": "fable", "text": "Two"},
+        {"voice": "echo", "text": "Three"},
+    ]
+    edited = [("echo", "Zero"), ("echo", "One"), ("fable", "Two!"), ("echo", "Three")]
+    assert match_turns(turns, edited) == {1: 0, 3: 2}
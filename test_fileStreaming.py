@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import pytest
+from types import SimpleNamespace
+from app.fileStreaming import (
+    RangeNotSatisfiable,
+    etag_matches,
+    file_response,
+    iter_file,
+    iter_growing_file,
+    parse_range,
+)
+
+
+def request(method="GET", **headers):
+    return SimpleNamespace(
+        method=method,
+        headers={key.replace("_", "-"): value for key, value in headers.items()},
+    )
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    # Unsupported or malformed ranges fall back to the whole file.
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=abc", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def test_iter_file_reads_only_the_range(tmp_path):
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(bytes(range(100)))
+    chunks = list(iter_file(str(path), 10, 29, chunk_size=8))
+    assert [len(chunk) for chunk in chunks] == [8, 8, 4]
+    assert b"".join(chunks) == bytes(range(10, 30))
+
+
+def test_etag_matches_ignores_weakness():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+
+
+def test_file_response_status_codes(tmp_path):
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(b"0123456789")
+
+    full = file_response(request(), str(path), etag='"v1"')
+    assert full.status_code == 200
+    assert full.headers["content-length"] == "10"
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = file_response(request(range="bytes=2-5"), str(path), etag='"v1"')
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 2-5/10"
+    assert partial.headers["content-length"] == "4"
+
+    stale = file_response(
+        request(range="bytes=2-5", if_range='"v0"'), str(path), etag='"v1"'
+    )
+    assert stale.status_code == 200
+    resumed = file_response(
+        request(range="bytes=2-5", if_range='"v1"'), str(path), etag='"v1"'
+    )
+    assert resumed.status_code == 206
+    # If-Range compares strongly, so the default weak ETag never resumes a range.
+    weak_etag = file_response(request(), str(path)).headers["etag"]
+    assert weak_etag.startswith("W/")
+    weak = file_response(request(range="bytes=2-5", if_range=weak_etag), str(path))
+    assert weak.status_code == 200
+
+    cached = file_response(request(if_none_match='"v1"'), str(path), etag='"v1"')
+    assert cached.status_code == 304
+
+    unsatisfiable = file_response(request(range="bytes=20-"), str(path))
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */10"
+
+
+def test_iter_growing_file_follows_the_writer_until_it_finishes(tmp_path):
+    path = tmp_path / "episode.mp3"
+    published = tmp_path / "published.mp3"
+    finished = threading.Event()
+
+    def writer():
+        with open(path, "wb") as file:
+            for chunk in (b"intro", b"turn1", b"turn2"):
+                file.write(chunk)
+                file.flush()
+                finished.wait(0.05)
+        os.replace(path, published)
+        finished.set()
+
+    async def read_all():
+        chunks = iter_growing_file(
+            str(path), finished.is_set, chunk_size=4, poll_seconds=0.01
+        )
+        return b"".join([chunk async for chunk in chunks])
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert asyncio.run(read_all()) == b"introturn1turn2"
+    finally:
+        thread.join()
+
+
+def test_iter_growing_file_stops_if_the_file_never_appears(tmp_path):
+    async def read_all():
+        chunks = iter_growing_file(str(tmp_path / "missing.mp3"), lambda: True)
+        return [chunk async for chunk in chunks]
+
+    assert asyncio.run(read_all()) == []
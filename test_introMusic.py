@@ -0,0 +1,205 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from app import telemetry
+from app.introMusic import (
+    BACKGROUND,
+    FOREGROUND,
+    INTRO_PARAMS,
+    MusicWorker,
+    intro_cache,
+    intro_key,
+    request_intro,
+)
+from app.jingleLibrary import jingle_library
+
+
+def fake_music_model():
+    model = MagicMock()
+    model.sample_rate = 32000
+    model.generate.side_effect = lambda descriptions: [
+        MagicMock(name=description) for description in descriptions
+    ]
+    return model
+
+
+def test_intro_key_normalizes_description():
+    assert intro_key("Soothing  Music") == intro_key("soothing music")
+    assert intro_key("soothing music", {"duration": 7}) != intro_key(
+        "soothing music", {"duration": 10}
+    )
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-intro")
+def test_request_intro_generates_once_and_reuses_cache(mock_encode_wav, tmpdir):
+    model = fake_music_model()
+    load_model = MagicMock(return_value=model)
+    worker = MusicWorker(load_model)
+
+    first = request_intro(worker, "jazz", str(tmpdir.join("first")))
+    assert first.result(timeout=5) == str(tmpdir.join("first.wav"))
+    second = request_intro(worker, "Jazz ", str(tmpdir.join("second")))
+
+    assert second.done()
+    assert tmpdir.join("second.wav").read_binary() == b"RIFF-intro"
+    model.generate.assert_called_once_with(["jazz"])
+    model.set_generation_params.assert_called_once_with(duration=7)
+    load_model.assert_called_once()
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-intro")
+def test_music_worker_coalesces_identical_requests(mock_encode_wav):
+    release = threading.Event()
+    model = fake_music_model()
+    worker = MusicWorker(lambda: release.wait(5) and model)
+
+    futures = [worker.submit("rock"), worker.submit("rock")]
+    release.set()
+
+    assert futures[0] is futures[1]
+    assert futures[0].result(timeout=5) == b"RIFF-intro"
+    model.generate.assert_called_once()
+
+
+def test_music_worker_propagates_generation_errors():
+    model = fake_music_model()
+    model.generate.side_effect = RuntimeError("out of memory")
+    worker = MusicWorker(lambda: model)
+
+    with pytest.raises(RuntimeError) as exc_info:
+        worker.submit("metal").result(timeout=5)
+    assert "out of memory" in str(exc_info.value)
+
+
+def embed(description):
+    return [1.0, float(len(description))]
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-library")
+def test_request_over_budget_borrows_nearest_jingle(mock_encode_wav, tmpdir):
+    jingle_library().add("other", "calm jazz", [1.0, 9.0], b"RIFF-jazz")
+    model = fake_music_model()
+    worker = MusicWorker(lambda: model, embed=embed)
+    worker.generation_seconds = 60
+
+    intro = request_intro(worker, "soft jazz", str(tmpdir.join("intro")), budget=30)
+
+    assert intro.done()
+    assert tmpdir.join("intro.wav").read_binary() == b"RIFF-jazz"
+    # The topic's own intro is still rendered in the background for next time.
+    worker.submit("soft jazz", priority=BACKGROUND).result(timeout=5)
+    assert intro_key("soft jazz") in jingle_library()
+    telemetry.flush()
+    assert 'podcraft_intro_requests_total{source="library"} 1' in telemetry.render_metrics()
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-far")
+def test_request_over_budget_waits_when_no_jingle_is_close(mock_encode_wav, tmpdir):
+    jingle_library().add("other", "heavy metal", [1.0, 0.0], b"RIFF-metal")
+    model = fake_music_model()
+    worker = MusicWorker(lambda: model, embed=embed)
+    worker.generation_seconds = 60
+
+    intro = request_intro(worker, "soft jazz", str(tmpdir.join("intro")), budget=30)
+
+    intro.result(timeout=5)
+    assert tmpdir.join("intro.wav").read_binary() == b"RIFF-far"
+    model.generate.assert_called_once_with(["soft jazz"])
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-seed")
+def test_idle_worker_prerenders_seed_descriptions(mock_encode_wav):
+    model = fake_music_model()
+    worker = MusicWorker(lambda: model, embed=embed, seeds=["sports", "science", "art"])
+
+    futures = worker.speculate()
+    for future in futures:
+        future.result(timeout=5)
+
+    assert len(futures) == 2
+    assert intro_key("sports") in jingle_library()
+    assert intro_key("science") in jingle_library()
+    # After that batch the idle worker queues the remaining seed itself.
+    deadline = time.time() + 5
+    while intro_key("art") not in jingle_library() and time.time() < deadline:
+        time.sleep(0.01)
+    assert intro_key("art") in jingle_library()
+
+
+def test_no_speculation_while_an_episode_waits_for_its_intro():
+    worker = MusicWorker(fake_music_model, embed=embed, seeds=["sports"])
+    key = intro_key("news")
+    worker._store().enqueue(key, "news", INTRO_PARAMS, FOREGROUND)
+
+    assert worker.speculate() == []
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-seed")
+def test_speculation_skips_descriptions_with_an_intro(mock_encode_wav):
+    jingle_library().record_request("jazz")
+    intro_cache().set(intro_key("jazz"), b"RIFF-jazz")
+    model = fake_music_model()
+    worker = MusicWorker(lambda: model, embed=embed, seeds=["jazz", "rock"])
+
+    futures = worker.speculate()
+
+    assert [future.result(timeout=5) for future in futures] == [b"RIFF-seed"]
+    model.generate.assert_called_once_with(["rock"])
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-batch")
+def test_requests_from_concurrent_jobs_share_one_batch(mock_encode_wav):
+    model = fake_music_model()
+    load_model = MagicMock(return_value=model)
+    # One worker per job process; they coordinate through the shared store.
+    workers = [MusicWorker(load_model) for _ in range(3)]
+
+    futures = [worker.submit(f"genre {index}") for index, worker in enumerate(workers)]
+
+    assert [future.result(timeout=5) for future in futures] == [b"RIFF-batch"] * 3
+    model.generate.assert_called_once_with(["genre 0", "genre 1", "genre 2"])
+    load_model.assert_called_once()
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-batch")
+def test_renders_are_recorded_on_the_requesting_jobs(mock_encode_wav):
+    release = threading.Event()
+    model = fake_music_model()
+    workers = [MusicWorker(lambda: release.wait(5) and model) for _ in range(2)]
+
+    futures = []
+    for job_id, worker in zip(["job-a", "job-b"], workers):
+        telemetry.set_job(job_id)
+        futures.append(worker.submit(f"music for {job_id}"))
+    # The leader's own process has moved on to an unrelated job.
+    telemetry.set_job("job-c")
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    telemetry.set_job(None)
+
+    for job_id in ("job-a", "job-b"):
+        assert [s["stage"] for s in telemetry.job_timeline(job_id)] == ["musicgen"]
+    assert telemetry.job_timeline("job-c") == []
+
+
+@patch("app.introMusic.encode_wav", return_value=b"RIFF-intro")
+def test_leader_keeps_the_model_between_requests(mock_encode_wav, monkeypatch):
+    monkeypatch.setattr("app.introMusic.MUSIC_IDLE_SECONDS", 0.5)
+    model = fake_music_model()
+    load_model = MagicMock(return_value=model)
+    unload_model = MagicMock()
+    worker = MusicWorker(load_model, unload_model=unload_model)
+
+    worker.submit("jazz").result(timeout=5)
+    worker.submit("rock").result(timeout=5)
+
+    load_model.assert_called_once()
+    unload_model.assert_not_called()
+    # The leader resigns and drops the model once it has been idle long enough.
+    deadline = time.time() + 5
+    while worker.model is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert worker.model is None
+    unload_model.assert_called_once()
@@ -0,0 +1,36 @@
+import time
+from app.jingleLibrary import JingleLibrary
+
+
+def test_nearest_returns_closest_jingle(tmp_path):
+    library = JingleLibrary(str(tmp_path / "jingles.sqlite3"))
+    library.add("k1", "calm piano", [1.0, 0.0], b"piano")
+    library.add("k2", "fast drums", [0.0, 1.0], b"drums")
+
+    description, similarity, data = library.nearest([0.2, 0.9])
+
+    assert (description, data) == ("fast drums", b"drums")
+    assert 0.9 < similarity <= 1.0
+    assert JingleLibrary(str(tmp_path / "empty.sqlite3")).nearest([1.0, 0.0]) is None
+
+
+def test_library_evicts_least_recently_used(tmp_path):
+    library = JingleLibrary(str(tmp_path / "jingles.sqlite3"), max_entries=2)
+    library.add("k1", "one", [1.0], b"1")
+    library.add("k2", "two", [1.0], b"2")
+    time.sleep(0.01)
+    assert library.get("k1") == b"1"
+    library.add("k3", "three", [1.0], b"3")
+
+    assert "k1" in library and "k3" in library
+    assert "k2" not in library
+    assert len(library) == 2
+
+
+def test_trending_orders_recent_requests_by_count(tmp_path):
+    library = JingleLibrary(str(tmp_path / "jingles.sqlite3"))
+    for description in ["jazz", "rock", "rock", "folk", "rock", "jazz"]:
+        library.record_request(description)
+
+    assert library.trending(2) == ["rock", "jazz"]
+    assert library.trending(5, window_hours=1, now=time.time() + 7200) == []
@@ -0,0 +1,213 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+from app import telemetry
+from app.jobQueue import JobQueue, JobStore, QueueFull, run_job
+
+
+def finished_task(topic, job_id=None, on_stage=None):
+    on_stage("script")
+    on_stage("audio")
+    return f"{topic}.mp3"
+
+
+def failing_task(topic, job_id=None, on_stage=None):
+    on_stage("script")
+    raise RuntimeError("gemini unavailable")
+
+
+def test_run_job_records_stages_and_result(tmpdir):
+    store = JobStore(str(tmpdir.join("jobs.sqlite3")))
+    job_id = store.create("topic")
+
+    run_job(store.path, job_id, "topic", finished_task)
+
+    job = store.get(job_id)
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert job["result"] == "topic.mp3"
+
+
+def traced_task(topic, job_id=None, on_stage=None):
+    on_stage("script")
+    with telemetry.span("gemini", segment=1):
+        pass
+    on_stage("audio")
+    with telemetry.span("tts", voice="echo"):
+        pass
+    return f"{topic}.mp3"
+
+
+def test_job_status_includes_stage_timeline():
+    queue = JobQueue(traced_task, executor=ThreadPoolExecutor(max_workers=1))
+
+    job_id = queue.submit("topic")
+    queue.shutdown()
+
+    timeline = queue.status(job_id)["timeline"]
+    assert [span["stage"] for span in timeline] == ["job", "gemini", "tts"]
+    assert timeline[0]["topic"] == "topic"
+    assert timeline[0]["duration"] >= timeline[1]["duration"]
+
+
+def test_run_job_records_failures(tmpdir):
+    store = JobStore(str(tmpdir.join("jobs.sqlite3")))
+    job_id = store.create("topic")
+
+    with pytest.raises(RuntimeError):
+        run_job(store.path, job_id, "topic", failing_task)
+
+    job = store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["stage"] == "script"
+    assert job["error"] == "gemini unavailable"
+
+
+def test_store_rejects_jobs_beyond_max_depth(tmpdir):
+    store = JobStore(str(tmpdir.join("jobs.sqlite3")))
+    store.create("first", max_active=2)
+    store.create("second", max_active=2)
+
+    with pytest.raises(QueueFull):
+        store.create("third", max_active=2)
+
+
+def test_queue_runs_jobs_on_its_executor():
+    queue = JobQueue(finished_task, executor=ThreadPoolExecutor(max_workers=1))
+
+    job_id = queue.submit("topic")
+    queue.shutdown()
+
+    assert queue.status(job_id)["status"] == "completed"
+
+
+def test_queue_cancels_running_job_at_next_stage():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_task(topic, job_id=None, on_stage=None):
+        on_stage("script")
+        started.set()
+        release.wait(5)
+        on_stage("audio")
+        return "never.mp3"
+
+    queue = JobQueue(slow_task, executor=ThreadPoolExecutor(max_workers=1))
+    job_id = queue.submit("topic")
+    started.wait(5)
+
+    assert queue.cancel(job_id)["cancel_requested"]
+    release.set()
+    queue.shutdown()
+
+    assert queue.status(job_id)["status"] == "cancelled"
+
+
+def test_queue_cancels_pending_job_before_it_starts():
+    release = threading.Event()
+
+    def blocking_task(topic, job_id=None, on_stage=None):
+        release.wait(5)
+        return "done.mp3"
+
+    queue = JobQueue(blocking_task, executor=ThreadPoolExecutor(max_workers=1))
+    queue.submit("first")
+    second = queue.submit("second")
+
+    assert queue.cancel(second)["status"] == "cancelled"
+    release.set()
+    queue.shutdown()
+
+
+def test_store_coalesces_active_jobs_with_the_same_key(tmpdir):
+    store = JobStore(str(tmpdir.join("jobs.sqlite3")))
+    key = lambda topic: topic.lower().replace(" ", "")
+    first, created = store.create_or_join("Open AI", key=key, max_active=1)
+
+    # Joining an active job doesn't need a free slot in the queue.
+    assert store.create_or_join("openai", key=key, max_active=1) == (first, False)
+    store.update(first, status="completed")
+    second, created = store.create_or_join("OPENAI", key=key, max_active=1)
+    assert created and second != first
+
+
+def test_queue_recovers_only_its_own_kind_of_job():
+    episodes = JobQueue(finished_task, executor=ThreadPoolExecutor(max_workers=1))
+    edits = JobQueue(
+        finished_task, executor=ThreadPoolExecutor(max_workers=1), kind="edit"
+    )
+    episode_job = episodes.store.create("topic")
+    edit_job = edits.store.create("episode1", kind="edit")
+
+    edits.recover()
+    edits.shutdown()
+
+    assert edits.status(edit_job)["status"] == "completed"
+    assert edits.status(edit_job)["kind"] == "edit"
+    assert episodes.status(episode_job)["status"] == "queued"
+
+
+def test_store_adds_kind_to_existing_databases(tmpdir):
+    path = str(tmpdir.join("jobs.sqlite3"))
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, topic TEXT NOT NULL, "
+            "status TEXT NOT NULL, stage TEXT NOT NULL, progress REAL NOT NULL, "
+            "result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+            "created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO jobs VALUES ('old', 'topic', 'queued', 'queued', 0, "
+            "NULL, NULL, 0, 0, 0)"
+        )
+
+    store = JobStore(path)
+
+    assert store.get("old")["kind"] == "episode"
+    assert store.list(("queued",), kind="edit") == []
+
+
+def test_queue_runs_the_initializer_in_each_worker_process():
+    queue = JobQueue(finished_task, initializer=print, initargs=("warm",))
+    with patch("app.jobQueue.ProcessPoolExecutor") as mock_pool:
+        queue.executor()
+
+    assert mock_pool.call_args.kwargs["initializer"] is print
+    assert mock_pool.call_args.kwargs["initargs"] == ("warm",)
+
+
+def test_queue_depth_and_cancel_are_per_kind(tmpdir):
+    store = JobStore(str(tmpdir.join("jobs.sqlite3")))
+    store.create("topic", max_active=1)
+    # Edits have their own queue depth.
+    edit_job = store.create("episode1", max_active=1, kind="edit")
+    with pytest.raises(QueueFull):
+        store.create("episode2", max_active=1, kind="edit")
+
+    episodes = JobQueue(finished_task, executor=ThreadPoolExecutor(max_workers=1))
+    with patch("app.jobQueue.jobs_db_path", return_value=store.path):
+        assert episodes.cancel(edit_job) is None
+    assert store.get(edit_job)["cancel_requested"] is False
+
+
+def test_progress_moves_through_the_audio_stage_and_never_goes_back(tmpdir):
+    store = JobStore(str(tmpdir.join("jobs.sqlite3")))
+    job_id = store.create("topic")
+    seen = []
+
+    def task(topic, job_id=None, on_stage=None):
+        for stage, fraction in [
+            ("script", None),
+            ("audio", 0.5),
+            ("audio", 0.25),
+            ("audio", 1.0),
+        ]:
+            on_stage(stage, fraction)
+            seen.append(store.get(job_id)["progress"])
+        return "done.mp3"
+
+    run_job(store.path, job_id, "topic", task)
+
+    assert seen == pytest.approx([0.05, 0.55, 0.55, 0.95])
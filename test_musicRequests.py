@@ -0,0 +1,62 @@
+import time
+from app.musicRequests import MusicRequestStore
+
+
+def test_claim_batches_by_priority_and_params(tmpdir):
+    store = MusicRequestStore(str(tmpdir.join("music.sqlite3")))
+    store.enqueue("a", "jazz", {"duration": 7}, 1)
+    store.enqueue("b", "rock", {"duration": 7}, 0)
+    store.enqueue("c", "folk", {"duration": 10}, 0)
+    store.enqueue("d", "funk", {"duration": 7}, 0)
+    store.enqueue("a", "jazz", {"duration": 7}, 0)
+
+    batch = store.claim(max_batch=4)
+
+    assert [request["key"] for request in batch] == ["a", "b", "d"]
+    assert batch[0]["params"] == {"duration": 7}
+    assert [request["key"] for request in store.claim(max_batch=4)] == ["c"]
+    assert store.claim(max_batch=4) == []
+
+
+def test_results_requeue_and_purge(tmpdir):
+    store = MusicRequestStore(str(tmpdir.join("music.sqlite3")))
+    for key in "abc":
+        store.enqueue(key, key, {"duration": 7}, 0)
+    store.claim(max_batch=3)
+    store.complete({"a": b"audio"})
+    store.fail(["b"], "out of memory")
+
+    assert store.results(["a", "b", "c"]) == {
+        "a": ("done", b"audio", None),
+        "b": ("failed", None, "out of memory"),
+    }
+    store.requeue_running()
+    assert store.active_counts() == {(0, "pending"): 1}
+    # A failed request is retried when it is asked for again.
+    store.enqueue("b", "b", {"duration": 7}, 0)
+    assert store.active_counts() == {(0, "pending"): 2}
+    store.purge(time.time() + 1)
+    assert store.results(["a"]) == {}
+
+
+def test_claim_returns_the_jobs_waiting_for_each_render(tmpdir):
+    store = MusicRequestStore(str(tmpdir.join("music.sqlite3")))
+    store.enqueue("a", "jazz", {"duration": 7}, 0, job_id="job-1")
+    store.enqueue("a", "jazz", {"duration": 7}, 0, job_id="job-2")
+    store.enqueue("a", "jazz", {"duration": 7}, 0, job_id="job-1")
+    store.enqueue("b", "rock", {"duration": 7}, 0)
+
+    assert [request["jobs"] for request in store.claim(max_batch=2)] == [
+        ["job-1", "job-2"],
+        [],
+    ]
+
+
+def test_requested_skips_failed_and_unknown_keys(tmpdir):
+    store = MusicRequestStore(str(tmpdir.join("music.sqlite3")))
+    for key in "abc":
+        store.enqueue(key, key, {"duration": 7}, 1)
+    store.claim(max_batch=2)
+    store.fail(["b"], "out of memory")
+
+    assert store.requested(["a", "b", "c", "d"]) == {"a", "c"}
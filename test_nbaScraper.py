@@ -0,0 +1,87 @@
+from unittest.mock import MagicMock, patch
+import requests
+from app.nbaScraper import (
+    NOT_FOUND_MESSAGE,
+    parse_recap,
+    scrape_nba_games_between_dates,
+)
+
+
+PAGE = (
+    b"<html><body><b>NBA Daily For Tuesday</b><p>Lakers <u>beat</u> Celtics</p>"
+    b"<br/><p>Knicks won</p><b>NBA Daily For Monday</b><p>Older news</p>"
+)
+
+
+def fake_response(chunks, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.encoding = "utf-8"
+    response.iter_content.return_value = iter(chunks)
+    return response
+
+
+def test_parse_recap_stops_at_end_marker():
+    chunks = iter([PAGE[:40], PAGE[40:], b"<p>never read</p>"])
+
+    recap = parse_recap(chunks, "NBA Daily For Tuesday", "NBA Daily For Monday")
+
+    assert recap == "NBA Daily For Tuesday Lakers beat Celtics Knicks won"
+    assert next(chunks) == b"<p>never read</p>"
+
+
+def test_parse_recap_requires_both_markers():
+    assert parse_recap([PAGE], "NBA Daily For Sunday", "NBA Daily For Monday") is None
+
+
+@patch("app.nbaScraper.NBA_RECAP_FRESH_SECONDS", 3600)
+@patch("app.nbaScraper.http_session")
+def test_scrape_reuses_fresh_recap_without_fetching(mock_session):
+    mock_session.return_value.get.return_value = fake_response([PAGE])
+
+    first = scrape_nba_games_between_dates("url", "For Tuesday", "For Monday")
+    second = scrape_nba_games_between_dates("url", "For Tuesday", "For Monday")
+
+    assert first == second
+    mock_session.return_value.get.assert_called_once()
+
+
+@patch("app.nbaScraper.NBA_RECAP_FRESH_SECONDS", 0)
+@patch("app.nbaScraper.http_session")
+def test_scrape_revalidates_with_conditional_get(mock_session):
+    get = mock_session.return_value.get
+    get.side_effect = [
+        fake_response([PAGE], headers={"ETag": '"v1"', "Last-Modified": "Tue"}),
+        fake_response([], status_code=304),
+    ]
+
+    first = scrape_nba_games_between_dates("url", "For Tuesday", "For Monday")
+    second = scrape_nba_games_between_dates("url", "For Tuesday", "For Monday")
+
+    assert first == second
+    assert get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Tue",
+    }
+
+
+@patch("app.nbaScraper.NBA_RECAP_FRESH_SECONDS", 0)
+@patch("app.nbaScraper.http_session")
+def test_scrape_degrades_when_the_recap_site_is_down(mock_session):
+    get = mock_session.return_value.get
+    unavailable = fake_response([], status_code=503)
+    unavailable.raise_for_status.side_effect = requests.HTTPError("503")
+    get.side_effect = [
+        requests.ConnectionError("refused"),
+        fake_response([PAGE]),
+        unavailable,
+    ]
+
+    assert scrape_nba_games_between_dates("url", "For Tuesday", "For Monday") == (
+        NOT_FOUND_MESSAGE
+    )
+    fetched = scrape_nba_games_between_dates("url", "For Tuesday", "For Monday")
+    # The last recap fetched stands in while the site is down.
+    assert scrape_nba_games_between_dates("url", "For Tuesday", "For Monday") == fetched
+    unavailable.close.assert_called_once()
@@ -0,0 +1,74 @@
+import threading
+import time
+import pytest
+from app.pipeline import threaded
+
+
+def test_threaded_preserves_order():
+    assert list(threaded(iter(range(100)))) == list(range(100))
+
+
+def test_threaded_starts_producing_before_consumption():
+    started = threading.Event()
+
+    def produce():
+        started.set()
+        yield 1
+
+    items = threaded(produce())
+
+    assert started.wait(5)
+    assert list(items) == [1]
+
+
+def test_threaded_reraises_producer_errors():
+    def produce():
+        yield 1
+        raise ValueError("segment failed")
+
+    items = threaded(produce())
+
+    assert next(items) == 1
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_threaded_buffers_at_most_maxsize_items():
+    produced = []
+
+    def produce():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    items = threaded(produce(), maxsize=2)
+    assert next(items) == 0
+    time.sleep(0.3)
+
+    # One item taken, two buffered and one waiting to be put.
+    assert len(produced) <= 4
+    items.stop()
+    items.join(5)
+    assert len(produced) <= 4
+
+
+def test_threaded_stop_ends_producer_and_closes_its_generator():
+    closed = threading.Event()
+
+    def produce():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.set()
+
+    stop = threading.Event()
+    items = threaded(produce(), maxsize=1, stop=stop)
+    downstream = threaded(items, maxsize=1, stop=stop)
+    assert next(downstream) == 1
+
+    stop.set()
+    downstream.join(5)
+    items.join(5)
+
+    assert closed.is_set()
@@ -1,6 +1,14 @@
+import os
+import threading
 import pytest
 from httpx import AsyncClient
-from app.podcastAPI import app
+import numpy as np
+from unittest.mock import patch
+from app import telemetry
+from app.episodeCatalog import episode_catalog
+from app.episodeTimeline import TimelineRecorder, timeline_dir, timeline_paths
+from app.podcastAPI import app, edit_queue, job_queue
+from app.workspace import JobWorkspace
 
 
 @pytest.mark.asyncio
@@ -18,6 +26,40 @@ async def test_generate_podcast():
     async with AsyncClient(app=app, base_url="http://test") as ac:
         response = await ac.post(f"/generate_podcast/?topic={test_topic}")
     assert response.status_code == 200
+    assert "job_id" in response.json()
+    assert response.json()["stream_url"] == f"/jobs/{response.json()['job_id']}/audio"
+
+
+@pytest.mark.asyncio
+async def test_get_job_status():
+    with patch.object(job_queue, "executor") as mock_executor:
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            job_id = (await ac.post("/generate_podcast/?topic=Jobs")).json()["job_id"]
+            response = await ac.get(f"/jobs/{job_id}")
+            missing = await ac.get("/jobs/unknown")
+    mock_executor.return_value.submit.assert_called_once()
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    assert response.json()["topic"] == "Jobs"
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    telemetry.count("api_calls_total", provider="openai", model="tts-1")
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'podcraft_api_calls_total{model="tts-1",provider="openai"}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_generate_podcast_rejects_when_queue_is_full():
+    with patch.object(job_queue, "max_queue_depth", 0):
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            response = await ac.post("/generate_podcast/?topic=Overflow")
+    assert response.status_code == 429
 
 
 @pytest.mark.asyncio
@@ -26,3 +68,126 @@ async def test_download_file():
     async with AsyncClient(app=app, base_url="http://test") as ac:
         response = await ac.get(f"/download/{test_filename}")
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_catalogued_episode_download(tmp_path):
+    audio = tmp_path / "Catalog_podcast.mp3"
+    audio.write_bytes(b"0123456789")
+    episode = episode_catalog().add("Catalog", str(audio), job_id="job42")
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        listing = await ac.get("/episodes")
+        detail = await ac.get("/episodes/job42")
+        full = await ac.get("/download/Catalog_podcast.mp3")
+        partial = await ac.get("/episodes/job42/audio", headers={"Range": "bytes=4-"})
+        cached = await ac.get(
+            "/episodes/job42/audio", headers={"If-None-Match": episode["etag"]}
+        )
+        head = await ac.head("/download/Catalog_podcast.mp3")
+        missing = await ac.get("/episodes/unknown")
+    assert [item["episode_id"] for item in listing.json()] == ["job42"]
+    assert detail.json()["download_url"] == "/episodes/job42/audio"
+    assert detail.json()["size"] == 10
+    assert full.status_code == 200
+    assert full.content == b"0123456789"
+    assert full.headers["etag"] == episode["etag"]
+    assert partial.status_code == 206
+    assert partial.content == b"456789"
+    assert cached.status_code == 304
+    assert head.status_code == 200
+    assert head.headers["content-length"] == "10"
+    assert head.content == b""
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_generate_podcast_serves_existing_episode(tmp_path):
+    audio = tmp_path / "OpenAI_podcast.mp3"
+    audio.write_bytes(b"audio")
+    episode_catalog().add("OpenAI", str(audio), job_id="job7")
+    with patch.object(job_queue, "executor") as mock_executor:
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            duplicate = await ac.post("/generate_podcast/?topic=open ai")
+            forced = await ac.post("/generate_podcast/?topic=open ai&fresh=true")
+            coalesced = await ac.post("/generate_podcast/?topic=Open AI&fresh=true")
+    assert duplicate.json()["job_id"] == "job7"
+    assert duplicate.json()["episode"]["download_url"] == "/episodes/job7/audio"
+    assert forced.json()["job_id"] != "job7"
+    assert coalesced.json()["job_id"] == forced.json()["job_id"]
+    mock_executor.return_value.submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_edit_episode_dialogue(tmp_path):
+    audio = tmp_path / "Edit_podcast.mp3"
+    audio.write_bytes(b"audio")
+    episode_catalog().add("Edit", str(audio), job_id="job9")
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        untracked = await ac.get("/episodes/job9/dialogue")
+        missing = await ac.put("/episodes/unknown/dialogue", json={"dialogue": "Hi"})
+    assert untracked.status_code == 409
+    assert missing.status_code == 404
+
+    os.makedirs(timeline_dir(), exist_ok=True)
+    pcm_path, manifest_path, edit_path = timeline_paths("job9")
+    with TimelineRecorder(pcm_path, manifest_path, ducked=0) as timeline:
+        timeline.turn(np.zeros(10, dtype=np.int16), "echo", "Hello there", "a")
+    with patch.object(edit_queue, "executor") as mock_executor:
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            dialogue = await ac.get("/episodes/job9/dialogue")
+            edit = await ac.put(
+                "/episodes/job9/dialogue", json={"dialogue": "Hello again"}
+            )
+    assert dialogue.json()["dialogue"] == "Ofir: Hello there"
+    assert edit.status_code == 200
+    assert edit.json()["job_id"]
+    with open(edit_path, encoding="utf-8") as pending:
+        assert pending.read() == "Hello again"
+    submitted = mock_executor.return_value.submit.call_args.args
+    assert submitted[3:] == ("job9", edit_queue.task)
+
+
+@pytest.mark.asyncio
+async def test_stream_job_audio_while_rendering(tmp_path):
+    job_id = job_queue.store.create("Live Topic")
+    workspace = JobWorkspace.create(job_id=job_id)
+    with open(workspace.episode("Live Topic"), "wb") as episode:
+        episode.write(b"intro")
+    job_queue.store.update(job_id, status="running")
+
+    def finish_rendering():
+        with open(workspace.episode("Live Topic"), "ab") as episode:
+            episode.write(b"turn1")
+        published = tmp_path / "Live_Topic.mp3"
+        os.replace(workspace.episode("Live Topic"), published)
+        episode_catalog().add("Live Topic", str(published), job_id=job_id)
+        job_queue.store.update(job_id, status="completed")
+
+    timer = threading.Timer(0.2, finish_rendering)
+    timer.start()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        live = await ac.get(f"/jobs/{job_id}/audio")
+        finished = await ac.get(f"/jobs/{job_id}/audio")
+        missing = await ac.get("/jobs/unknown/audio")
+    timer.join()
+    assert live.status_code == 200
+    assert live.headers["content-type"] == "audio/mpeg"
+    assert live.content == b"introturn1"
+    assert finished.status_code == 200
+    assert finished.headers["etag"]
+    assert finished.content == b"introturn1"
+    assert missing.status_code == 404
+
+
+def test_providers_are_warmed_in_job_workers_not_the_api_process():
+    from app import podcastAPI
+
+    assert job_queue.initializer is podcastAPI.warm_worker
+    assert "music" not in job_queue.initargs[0]
+    with patch("app.podcastAPI.providers.warm") as mock_warm:
+        podcastAPI.warm_worker(("openai",))
+        podcastAPI.warm_worker(())
+        for thread in threading.enumerate():
+            if thread.name == "provider-warmup":
+                thread.join(5)
+    mock_warm.assert_called_once_with("openai")
@@ -7,36 +7,105 @@ from app.podcastCreator import (
     save_revised_script,
     get_wikipedia_articles_summaries,
     get_embedding,
+    get_embeddings,
+    find_most_relevant_article,
     scrape_nba_games_between_dates,
     cosine_similarity,
     add_intro_music,
+    generate_audio,
+    total_revision_process,
+    render_episode,
+    rerender_episode,
+    revise_segments,
+    stream_podcast,
     getScriptfromGemini,
+    iter_script_segments,
+    create_podcast,
     getNBAPodcastContent,
+    generate_text,
 )
 import pytest
 import builtins
 import numpy as np
 from unittest.mock import MagicMock
 import datetime
-
-
-@patch("app.podcastCreator.client.embeddings.create")
-def test_get_embedding_success(mock_embeddings_create):
+import wave
+import threading
+from pydub import AudioSegment
+import time
+from concurrent.futures import Future
+from app import fakeProviders, providers
+from app.episodeTimeline import TimelineRecorder, load_manifest
+from app.introMusic import MusicWorker
+from app.workspace import JobWorkspace
+
+
+@pytest.fixture
+def openai_client():
+    client = MagicMock()
+    providers.override("openai", client)
+    yield client
+    providers.reset("openai")
+
+
+@pytest.fixture
+def gemini_model():
+    model = MagicMock()
+    providers.override("gemini", model)
+    yield model
+    providers.reset("gemini")
+
+
+def test_get_embedding_success(openai_client):
     expected_embedding = [0.1, 0.2, 0.3]
-    mock_embeddings_create.return_value = {"data": [{"embedding": expected_embedding}]}
+    openai_client.embeddings.create.return_value = {
+        "data": [{"embedding": expected_embedding}]
+    }
 
     embedding = get_embedding("Sample text for embedding.")
     assert embedding == expected_embedding
 
-@patch("app.podcastCreator.client.embeddings.create")
-def test_get_embedding_failure(mock_embeddings_create):
-    mock_embeddings_create.side_effect = Exception("API Error")
+def test_get_embedding_failure(openai_client):
+    openai_client.embeddings.create.side_effect = Exception("API Error")
 
     with pytest.raises(Exception) as exc_info:
         get_embedding("Sample text for embedding.")
     assert "API Error" in str(exc_info.value)
 
 
+def test_get_embeddings_batches_and_caches(openai_client):
+    openai_client.embeddings.create.return_value = {
+        "data": [{"embedding": [1.0, 0.0]}, {"embedding": [0.0, 1.0]}]
+    }
+
+    limiter = MagicMock()
+    with patch("app.providers.rate_limiter", return_value=limiter):
+        first = get_embeddings(["query", "summary", "query"])
+        second = get_embeddings(["summary", "query"])
+
+    # One batched request counts as one request against the per-minute limit.
+    limiter.acquire.assert_called_once_with("openai/text-embedding-ada-002", 1)
+    openai_client.embeddings.create.assert_called_once_with(
+        input=["query", "summary"], model="text-embedding-ada-002"
+    )
+    assert first.tolist() == [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]]
+    assert second.tolist() == [[0.0, 1.0], [1.0, 0.0]]
+
+
+def test_find_most_relevant_article(openai_client):
+    openai_client.embeddings.create.return_value = {
+        "data": [
+            {"embedding": [1.0, 0.0]},
+            {"embedding": [0.0, 1.0]},
+            {"embedding": [0.9, 0.1]},
+        ]
+    }
+    summaries = {"Other": "Unrelated summary", "Best": "Matching summary"}
+
+    assert find_most_relevant_article("query", summaries) == "Best"
+    openai_client.embeddings.create.assert_called_once()
+
+
 def test_cosine_similarity():
     vec1 = np.array([1, 0, 0])
     vec2 = np.array([0, 1, 0])
@@ -51,10 +120,7 @@ def test_cosine_similarity():
 def test_get_wikipedia_articles_summaries(mock_summary, mock_search):
     mock_search.return_value = ["Article1", "Article2"]
 
-    mock_summary.side_effect = [
-        "Summary for Article1",
-        "Summary for Article2",
-    ]
+    mock_summary.side_effect = lambda title, auto_suggest: f"Summary for {title}"
 
     summaries = get_wikipedia_articles_summaries("Example query")
 
@@ -69,6 +135,54 @@ def test_get_wikipedia_articles_summaries(mock_summary, mock_search):
     mock_summary.assert_any_call("Article2", auto_suggest=False)
 
 
+class StubDisambiguationError(Exception):
+    def __init__(self, options):
+        self.options = options
+
+
+def make_wikipedia_stub(pages, disambiguations=()):
+    stub = MagicMock()
+    stub.exceptions.DisambiguationError = StubDisambiguationError
+    stub.search.side_effect = lambda query, results: list(pages)[:results]
+
+    def summary(title, auto_suggest):
+        if title in disambiguations:
+            raise StubDisambiguationError([f"{title} (topic)"])
+        if title not in pages:
+            raise KeyError(title)
+        return pages[title]
+
+    stub.summary.side_effect = summary
+    stub.page.side_effect = lambda title: MagicMock(summary=f"Page for {title}")
+    return stub
+
+
+def test_get_wikipedia_articles_summaries_uses_persistent_cache():
+    stub = make_wikipedia_stub({"Jazz": "Music genre", "Mercury": "Ambiguous"}, ["Mercury"])
+
+    with patch("app.podcastCreator.wikipedia", stub):
+        first = get_wikipedia_articles_summaries("jazz")
+        second = get_wikipedia_articles_summaries("jazz")
+
+    assert first == second == {
+        "Jazz": "Music genre",
+        "Mercury (topic)": "Page for Mercury (topic)",
+    }
+    stub.search.assert_called_once_with("jazz", results=3)
+    assert stub.summary.call_count == 2
+    stub.page.assert_called_once_with("Mercury (topic)")
+
+
+def test_get_wikipedia_articles_summaries_skips_failed_titles():
+    stub = make_wikipedia_stub({"Jazz": "Music genre"})
+    stub.search.side_effect = lambda query, results: ["Jazz", "Missing"]
+
+    with patch("app.podcastCreator.wikipedia", stub):
+        summaries = get_wikipedia_articles_summaries("jazz")
+
+    assert summaries == {"Jazz": "Music genre"}
+
+
 def _fixed_datetime(target):
     class FixedDateTime(datetime.datetime):
         @classmethod
@@ -78,12 +192,21 @@ def _fixed_datetime(target):
     return FixedDateTime
 
 
-@patch("app.podcastCreator.requests.get")
+def fake_page(content, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.encoding = "utf-8"
+    response.iter_content.return_value = [content]
+    return response
+
+
+@patch("app.nbaScraper.http_session")
 @patch(
     "app.podcastCreator.datetime.datetime",
     _fixed_datetime(datetime.datetime(2022, 3, 2)),
 )
-def test_getNBAPodcastContent_success(mock_get):
+def test_getNBAPodcastContent_success(mock_session):
     yesterdays_date = "Tuesday, March 01, 2022"
     two_days_ago_date = "Monday, February 28, 2022"
     expected_start = f"NBA Daily For {yesterdays_date}"
@@ -98,8 +221,9 @@ def test_getNBAPodcastContent_success(mock_get):
     </body>
     </html>
     """
-    mock_get.return_value = MagicMock()
-    mock_get.return_value.content = mock_html_content.encode("utf-8")
+    mock_session.return_value.get.return_value = fake_page(
+        mock_html_content.encode("utf-8")
+    )
 
     content = getNBAPodcastContent()
 
@@ -109,9 +233,11 @@ def test_getNBAPodcastContent_success(mock_get):
     assert expected_start in content or expected_end in content
 
 
-@patch("app.podcastCreator.requests.get")
-def test_scrape_nba_games_between_dates_success(mock_get):
-    mock_get.return_value.content = b"<b>Start Date</b><p>Game Info</p><b>End Date</b>"
+@patch("app.nbaScraper.http_session")
+def test_scrape_nba_games_between_dates_success(mock_session):
+    mock_session.return_value.get.return_value = fake_page(
+        b"<b>Start Date</b><p>Game Info</p><b>End Date</b>"
+    )
 
     result = scrape_nba_games_between_dates("fake_url", "Start Date", "End Date")
 
@@ -119,35 +245,45 @@ def test_scrape_nba_games_between_dates_success(mock_get):
     assert result.startswith("Recap of yesterday's games:")
 
 
-@patch("requests.get")
-def test_scrape_nba_games_between_dates_failure(mock_get):
-    mock_get.return_value.content = b"<b>Some Other Date</b>"
+@patch("app.nbaScraper.http_session")
+def test_scrape_nba_games_between_dates_failure(mock_session):
+    mock_session.return_value.get.return_value = fake_page(b"<b>Some Other Date</b>")
     result = scrape_nba_games_between_dates("fake_url", "Start Date", "End Date")
     assert "Start or end tag not found." in result
 
 
-@patch("app.podcastCreator.model.start_chat")
-def test_getScriptfromGemini_success(mock_start_chat):
+@patch("app.podcastCreator.SCRIPT_MODE", "sequential")
+@patch("app.podcastCreator.gather_podcast_content", return_value=("content", ""))
+@patch("app.podcastCreator.request_intros", return_value=[])
+def test_getScriptfromGemini_success(
+    mock_request_intros, mock_gather, gemini_model, tmpdir
+):
     mock_chat_instance = MagicMock()
-    mock_start_chat.return_value = mock_chat_instance
+    gemini_model.start_chat.return_value = mock_chat_instance
 
     mock_response_text = "This is a generated script based on the given topic."
     mock_chat_instance.send_message.return_value = MagicMock(text=mock_response_text)
 
     topic = "Artificial Intelligence"
-    _ = getScriptfromGemini(topic)
+    _ = getScriptfromGemini(topic, JobWorkspace.create(str(tmpdir)))
 
-    mock_start_chat.assert_called_once()
+    gemini_model.start_chat.assert_called_once()
     mock_chat_instance.send_message.assert_called()
 
 
-@patch("app.podcastCreator.model.start_chat")
-def test_getScriptfromGemini_api_failure(mock_start_chat):
-    mock_start_chat.side_effect = Exception("Failed to start chat with the model")
+@patch("app.podcastCreator.SCRIPT_MODE", "sequential")
+@patch("app.podcastCreator.gather_podcast_content", return_value=("content", ""))
+@patch("app.podcastCreator.request_intros", return_value=[])
+def test_getScriptfromGemini_api_failure(
+    mock_request_intros, mock_gather, gemini_model, tmpdir
+):
+    gemini_model.start_chat.side_effect = Exception(
+        "Failed to start chat with the model"
+    )
 
     topic = "Artificial Intelligence"
     with pytest.raises(Exception) as exc_info:
-        getScriptfromGemini(topic)
+        getScriptfromGemini(topic, JobWorkspace.create(str(tmpdir)))
     assert "Failed to start chat with the model" in str(exc_info.value)
 
 
@@ -205,6 +341,36 @@ def test_extract_dialogue_with_only_markers():
         mocked_open().write.assert_has_calls(expected_calls, any_order=True)
 
 
+def test_extract_dialogue_writes_into_job_workspace(tmpdir):
+    workspace = JobWorkspace.create(str(tmpdir))
+
+    extract_dialogue("Ofir: Hi\nDaniel: Hello\n", workspace)
+
+    assert tmpdir.join(workspace.job_id, "host1.txt").read() == "Hi\n"
+    assert tmpdir.join(workspace.job_id, "host2.txt").read() == "Hello\n"
+
+
+@patch("app.podcastCreator.render_episode", return_value="episode.mp3")
+@patch(
+    "app.podcastCreator.generate_revised_script",
+    side_effect=lambda script, context="": script,
+)
+@patch("app.podcastCreator.generate_script")
+def test_create_podcast_skips_intermediate_files(
+    mock_generate_script, mock_revise, mock_render, tmpdir
+):
+    workspace = JobWorkspace.create(str(tmpdir))
+    mock_generate_script.return_value = "Ofir: Hi\nOfir: there\nDaniel: Hello\n"
+
+    assert create_podcast("topic", workspace) == "episode.mp3"
+
+    mock_revise.assert_called_once_with("Hi there\nHello", "")
+    assert tmpdir.join(workspace.job_id, "revised_dialogue.txt").read() == (
+        "Hi there\nHello\n"
+    )
+    assert sorted(os.listdir(workspace.root)) == ["revised_dialogue.txt"]
+
+
 def test_merge_text_files(tmpdir):
     host1_path = tmpdir.join("host1.txt")
     host2_path = tmpdir.join("host2.txt")
@@ -250,12 +416,47 @@ def test_save_revised_script():
     os.remove(file_path)
 
 
+@patch("app.podcastCreator.generate_revised_script")
+def test_total_revision_process_writes_into_job_workspace(mock_revise, tmpdir):
+    mock_revise.return_value = "**Ofir:** Revised line"
+    workspace = JobWorkspace.create(str(tmpdir))
+    merged_path = tmpdir.join("merged.txt")
+    merged_path.write("Original line\n")
+
+    total_revision_process(str(merged_path), workspace)
+
+    with open(workspace.revised, "r", encoding="utf-8") as file:
+        assert file.read() == "Revised line\n"
+
+
 def create_temp_file(tmpdir, content):
     file_path = tmpdir.join("temp_file.txt")
     file_path.write(content)
     return str(file_path)
 
 
+@patch("app.podcastCreator.generate_revised_script")
+def test_revise_segments_carries_the_revised_tail_into_the_next_segment(
+    mock_revise, tmpdir
+):
+    contexts = []
+
+    def revise(script, context=""):
+        contexts.append(context)
+        return script.replace("line", "revised line")
+
+    mock_revise.side_effect = revise
+    segments = [
+        "Ofir: first line\nDaniel: second line\nOfir: third line",
+        "Daniel: fourth line\nOfir: fifth line",
+    ]
+
+    turns = list(revise_segments(segments, JobWorkspace.create(str(tmpdir))))
+
+    assert len(turns) == 5
+    assert contexts == ["", "Daniel: second revised line\nOfir: third revised line"]
+
+
 def test_clean_revised_dialogue_removes_unwanted_characters(tmpdir):
     input_content = (
         "**Daniel:** This is a **segment 1** with some unwanted characters #&*@.\n"
@@ -287,14 +488,330 @@ def test_clean_revised_dialogue_with_unexpected_format(tmpdir):
     assert output_content == expected_output
 
 
+def tone(value, seconds=1, sample_rate=24000):
+    return AudioSegment(
+        data=np.full(sample_rate * seconds, value, dtype=np.int16).tobytes(),
+        sample_width=2,
+        frame_rate=sample_rate,
+        channels=1,
+    )
+
+
+@patch("app.audioAssembly.PcmTrack.export", autospec=True)
 @patch("pydub.AudioSegment.from_file")
-def test_add_intro_music(mock_audio_from_file):
-    intro_mock = (
-        mock_audio_from_file.return_value.fade_in.return_value.fade_out.return_value
+def test_add_intro_music(mock_audio_from_file, mock_export):
+    mock_audio_from_file.side_effect = lambda path, format: tone(
+        1000 if format == "wav" else 20000, seconds=4
     )
-    speech_mock = mock_audio_from_file.return_value
-    intro_mock.__add__.return_value.export.return_value = None
 
     add_intro_music("intro.wav", "speech.mp3", "test")
-    intro_mock.__add__.assert_called_with(speech_mock)
-    intro_mock.__add__.return_value.export.assert_called_once()
+
+    track, output = mock_export.call_args.args
+    assert mock_export.call_args.kwargs == {"format": "mp3"}
+    samples = track.to_array()
+    assert len(samples) == 24000 * 8
+    # Intro at the music level with faded edges, then speech at the voice level.
+    assert samples[0] == 0
+    assert samples[24000 * 2] == 2603
+    assert samples[24000 * 6] == 4125
+
+
+def test_generate_audio_assembles_clips_in_order(openai_client, tmpdir):
+    openai_client.audio.speech.create.side_effect = lambda model, voice, input, **kw: (
+        MagicMock(content=np.full(240, 1000 * len(input), dtype=np.int16).tobytes())
+    )
+    script_path = tmpdir.join("revised_dialogue.txt")
+    script_path.write("Hi\nHello there\n")
+    output = str(tmpdir.join("speech.wav"))
+
+    generate_audio(str(script_path), output, max_in_flight=2)
+
+    calls = openai_client.audio.speech.create.call_args_list
+    voices = [c.kwargs["voice"] for c in calls]
+    assert sorted(voices) == ["echo", "fable"]
+    with wave.open(output) as exported:
+        samples = np.frombuffer(exported.readframes(exported.getnframes()), np.int16)
+    # Both clips are normalized to the same loudness.
+    assert samples.tolist() == [4125] * 240 + [0] * 9600 + [4125] * 240 + [0] * 9600
+
+
+def test_render_episode_streams_intro_then_dialogue(openai_client, tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    openai_client.audio.speech.create.return_value = MagicMock(
+        content=np.full(240, 7000, dtype=np.int16).tobytes()
+    )
+    with wave.open("intro.wav", "wb") as intro:
+        intro.setnchannels(1)
+        intro.setsampwidth(2)
+        intro.setframerate(24000)
+        intro.writeframes(np.full(24000 * 4, 1000, dtype=np.int16).tobytes())
+    tmpdir.join("revised_dialogue.txt").write("Hi\n")
+
+    output = render_episode("intro.wav", "revised_dialogue.txt", "test topic", format="wav")
+
+    assert output == "test_topic.wav"
+    with wave.open(output) as exported:
+        samples = np.frombuffer(exported.readframes(exported.getnframes()), np.int16)
+    assert len(samples) == 24000 * 4 + 240 + 9600
+    assert samples[0] == 0
+    assert samples[24000 * 2] == 2603
+    assert samples[24000 * 4 : 24000 * 4 + 240].tolist() == [4125] * 240
+
+
+@patch(
+    "app.podcastCreator.generate_revised_script",
+    side_effect=lambda script, context="": script,
+)
+@patch("app.podcastCreator.gather_podcast_content", return_value=("content", ""))
+@patch("app.podcastCreator.SCRIPT_MODE", "sequential")
+@patch("app.podcastCreator.model.start_chat")
+@patch("app.podcastCreator.request_intros")
+def test_stream_podcast_pipelines_segments_into_audio(
+    mock_request_intros,
+    mock_start_chat,
+    mock_gather,
+    mock_revise,
+    openai_client,
+    tmpdir,
+):
+    workspace = JobWorkspace.create(str(tmpdir))
+    with wave.open(workspace.intro, "wb") as intro:
+        intro.setnchannels(1)
+        intro.setsampwidth(2)
+        intro.setframerate(24000)
+        intro.writeframes(np.zeros(48000, dtype=np.int16).tobytes())
+    intro_future = Future()
+    intro_future.set_result(workspace.intro)
+    mock_request_intros.return_value = [intro_future]
+
+    segments = iter(
+        [f"Ofir: Part {i} opener\nDaniel: Part {i} reply" for i in range(10)]
+    )
+    mock_start_chat.return_value.send_message.side_effect = lambda prompt, **kwargs: [
+        MagicMock(text=next(segments))
+    ]
+    openai_client.audio.speech.create.side_effect = lambda model, voice, input, **kw: (
+        MagicMock(content=np.full(10, 1, dtype=np.int16).tobytes())
+    )
+    stages = []
+
+    output = stream_podcast(
+        "test topic",
+        workspace=workspace,
+        format="wav",
+        on_stage=lambda stage, fraction=None: stages.append((stage, fraction)),
+    )
+
+    assert output == workspace.episode("test topic", "wav")
+    assert mock_start_chat.return_value.send_message.call_count == 10
+    calls = openai_client.audio.speech.create.call_args_list
+    voices = [c.kwargs["voice"] for c in calls]
+    assert voices.count("echo") == 10 and voices.count("fable") == 10
+    assert stages[0] == ("script", None) and stages[-1][0] == "audio"
+    fractions = [fraction for stage, fraction in stages if stage == "audio"]
+    assert len(fractions) == 20 and all(0 < f <= 1 for f in fractions)
+    with open(workspace.revised, encoding="utf-8") as revised:
+        lines = revised.read().splitlines()
+    assert lines[:2] == ["Part 0 opener", "Part 0 reply"]
+    assert len(lines) == 20
+    with wave.open(output) as exported:
+        assert exported.getnframes() == 48000 + 20 * (10 + 9600)
+    manifest = load_manifest(workspace.manifest)
+    assert manifest["intro"] == {"start": 0, "length": 48000}
+    assert [turn["text"] for turn in manifest["turns"]] == lines
+    assert manifest["turns"][1]["voice"] == "fable"
+
+
+@patch("app.podcastCreator.request_intro")
+def test_rerender_episode_renders_the_intro_again_for_ducked_edits(
+    mock_request_intro, openai_client, tmpdir
+):
+    pcm_path, manifest_path = str(tmpdir.join("t.pcm")), str(tmpdir.join("t.json"))
+    with TimelineRecorder(
+        pcm_path,
+        manifest_path,
+        format="wav",
+        sample_rate=24000,
+        pause_ms=400,
+        ducked=1,
+        intro_descriptions=["music"],
+    ) as timeline:
+        timeline.intro(np.zeros(100, dtype=np.int16))
+        timeline.turn(np.full(50, 1, dtype=np.int16), "echo", "One", "a")
+        timeline.tail(np.zeros(0, dtype=np.int16))
+    openai_client.audio.speech.create.return_value = MagicMock(
+        content=np.full(240, 7000, dtype=np.int16).tobytes()
+    )
+
+    def render_intro(worker, description, output_stem, budget):
+        with wave.open(f"{output_stem}.wav", "wb") as intro:
+            intro.setnchannels(1)
+            intro.setsampwidth(2)
+            intro.setframerate(24000)
+            intro.writeframes(np.full(24000 * 4, 1000, dtype=np.int16).tobytes())
+        future = Future()
+        future.set_result(f"{output_stem}.wav")
+        return future
+
+    mock_request_intro.side_effect = render_intro
+    output = str(tmpdir.join("episode.wav"))
+
+    rerender_episode(manifest_path, pcm_path, "One, revised", output)
+
+    assert mock_request_intro.call_args.args[1] == "music"
+    # A cache miss renders the episode's own intro rather than borrowing a jingle.
+    assert mock_request_intro.call_args.kwargs["budget"] == float("inf")
+    with wave.open(output) as exported:
+        samples = np.frombuffer(exported.readframes(exported.getnframes()), np.int16)
+    assert samples[24000] != 0
+    assert not tmpdir.join("episode.intro0.wav").exists()
+
+
+@patch("app.podcastCreator.music_worker", MusicWorker(lambda: providers.get("music")))
+@patch("app.podcastCreator.gather_podcast_content", return_value=("content", ""))
+def test_stream_podcast_stops_script_producers_when_cancelled(mock_gather, tmpdir):
+    fakeProviders.install(latency=0.02)
+    openai, gemini = providers.get("openai"), providers.get("gemini")
+
+    def cancel_on_audio(stage, fraction=None):
+        if stage == "audio":
+            raise RuntimeError("cancelled")
+
+    try:
+        workspace = JobWorkspace.create(str(tmpdir))
+        with pytest.raises(RuntimeError):
+            stream_podcast(
+                "space", workspace=workspace, format="wav", on_stage=cancel_on_audio
+            )
+        calls, prompts = len(openai.calls), len(gemini.prompts)
+        time.sleep(0.5)
+        assert (len(openai.calls), len(gemini.prompts)) == (calls, prompts)
+    finally:
+        providers.reset()
+    producers = ("revision", "script-segments")
+    assert not [t for t in threading.enumerate() if t.name in producers]
+
+
+def test_rerender_episode_synthesizes_only_edited_lines(openai_client, tmpdir):
+    pcm_path, manifest_path = str(tmpdir.join("t.pcm")), str(tmpdir.join("t.json"))
+    with TimelineRecorder(
+        pcm_path,
+        manifest_path,
+        format="wav",
+        sample_rate=24000,
+        pause_ms=400,
+        ducked=0,
+        intro_descriptions=["music"],
+    ) as timeline:
+        timeline.intro(np.full(100, 5, dtype=np.int16))
+        timeline.turn(np.full(50, 1, dtype=np.int16), "echo", "One", "a")
+        timeline.turn(np.full(50, 2, dtype=np.int16), "fable", "Two", "b")
+        timeline.tail(np.zeros(0, dtype=np.int16))
+    openai_client.audio.speech.create.return_value = MagicMock(
+        content=np.full(240, 7000, dtype=np.int16).tobytes()
+    )
+    output = str(tmpdir.join("episode.wav"))
+
+    changed = rerender_episode(manifest_path, pcm_path, "One\nTwo, revised\n", output)
+
+    assert changed == 1
+    openai_client.audio.speech.create.assert_called_once()
+    assert openai_client.audio.speech.create.call_args.kwargs["voice"] == "fable"
+    assert openai_client.audio.speech.create.call_args.kwargs["input"] == "Two, revised"
+    with wave.open(output) as exported:
+        samples = np.frombuffer(exported.readframes(exported.getnframes()), np.int16)
+    assert samples.tolist() == [5] * 100 + [1] * 50 + [4125] * 240 + [0] * 9600
+    manifest = load_manifest(manifest_path)
+    assert manifest["turns"][1]["text"] == "Two, revised"
+    assert manifest["turns"][1]["start"] == 150
+    assert not os.path.exists(pcm_path + ".partial")
+
+
+class FakeGemini:
+    """Local stand-in for the Gemini model that answers outline and segment prompts."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if "Write an outline" in prompt:
+                return [
+                    MagicMock(text=f"{i}. Topic {i} - summary {i}\n")
+                    for i in range(1, 11)
+                ]
+            time.sleep(self.delay)
+            number = prompt.split("you are writing segment ")[1].split(" ")[0]
+            return [
+                MagicMock(text=f"Ofir: Segment {number} "),
+                MagicMock(text="opener"),
+            ]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_iter_script_segments_generates_outlined_segments_concurrently():
+    fake = FakeGemini()
+    providers.override("gemini", fake)
+    try:
+        segments = list(iter_script_segments("space", "content", "", mode="outline"))
+    finally:
+        providers.reset("gemini")
+
+    assert segments == [f"Ofir: Segment {i} opener\n" for i in range(1, 11)]
+    assert fake.max_in_flight > 1
+    second = next(p for p in fake.prompts if "writing segment 2 of 10" in p)
+    assert "2. Topic 2 - summary 2" in second
+    assert "previous segment covered: Topic 1 - summary 1" in second
+    assert "next segment will cover: Topic 3 - summary 3" in second
+
+
+def test_generate_text_retries_errors_in_the_middle_of_the_stream(gemini_model):
+    unavailable = RuntimeError("stream broke")
+    unavailable.status_code = 503
+    unavailable.response = MagicMock(headers={"retry-after": "0"})
+
+    def broken_stream():
+        yield MagicMock(text="Ofir: Hel")
+        raise unavailable
+
+    gemini_model.generate_content.side_effect = [
+        broken_stream(),
+        iter([MagicMock(text="Ofir: Hel"), MagicMock(text="lo")]),
+    ]
+
+    assert generate_text("prompt") == "Ofir: Hello"
+    assert gemini_model.generate_content.call_count == 2
+
+
+def test_iter_script_segments_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        iter_script_segments("space", "content", "", mode="parallel")
+
+
+@patch("app.podcastCreator.music_worker", MusicWorker(lambda: providers.get("music")))
+@patch("app.podcastCreator.gather_podcast_content", return_value=("content", ""))
+def test_stream_podcast_runs_offline_with_fake_providers(mock_gather, tmpdir):
+    fakeProviders.install()
+    try:
+        workspace = JobWorkspace.create(str(tmpdir))
+        output = stream_podcast("space", workspace=workspace, format="wav")
+        speech_calls = [c for c in providers.get("openai").calls if c[0] == "speech"]
+    finally:
+        providers.reset()
+
+    with open(workspace.revised, encoding="utf-8") as revised:
+        lines = revised.read().splitlines()
+    assert lines[:2] == ["Let's talk about topic 1.", "Sure, topic 1 it is."]
+    assert len(lines) == len(speech_calls) == 20
+    with wave.open(output) as exported:
+        assert exported.getnframes() > 7 * 24000
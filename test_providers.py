@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+import pytest
+from app import providers
+
+
+IMPORT_BUDGET_SECONDS = float(os.environ.get("PODCRAFT_IMPORT_BUDGET", 1.0))
+HEAVY_MODULES = ["audiocraft", "torch", "openai", "google.generativeai"]
+
+
+@pytest.fixture
+def registry():
+    yield providers
+    providers.reset()
+
+
+def test_provider_is_built_once_on_first_use(registry):
+    factory = MagicMock(return_value=MagicMock(name="client"))
+    registry.register("test-lazy", factory)
+    lazy = registry.LazyProvider("test-lazy")
+
+    factory.assert_not_called()
+    lazy.embeddings.create("text")
+    lazy.embeddings.create("more text")
+
+    factory.assert_called_once()
+    factory.return_value.embeddings.create.assert_called_with("more text")
+
+
+def test_provider_can_be_swapped_for_a_fake(registry):
+    registry.register("test-fake", MagicMock(side_effect=RuntimeError("no network")))
+    fake = MagicMock()
+    registry.override("test-fake", fake)
+
+    assert registry.LazyProvider("test-fake").generate is fake.generate
+
+
+def test_lazy_provider_supports_patching(registry):
+    instance = MagicMock(spec=["start_chat"])
+    registry.register("test-patch", lambda: instance)
+    lazy = registry.LazyProvider("test-patch")
+
+    with patch.object(lazy, "start_chat") as mock_start_chat:
+        lazy.start_chat()
+        mock_start_chat.assert_called_once()
+    assert lazy.start_chat is instance.start_chat
+
+
+def test_warm_builds_named_providers(registry):
+    factory = MagicMock()
+    registry.register("test-warm", factory)
+
+    registry.warm("test-warm")
+
+    factory.assert_called_once()
+
+
+def test_release_drops_built_providers_but_keeps_overrides(registry):
+    factory = MagicMock(side_effect=lambda: object())
+    registry.register("test-release", factory)
+    first = registry.get("test-release")
+
+    registry.release("test-release")
+
+    assert registry.get("test-release") is not first
+    fake = MagicMock()
+    registry.override("test-release", fake)
+    registry.release("test-release")
+    assert registry.get("test-release") is fake
+
+
+def test_call_rate_limits_every_attempt_and_retries_throttling(registry):
+    throttled = RuntimeError("rate limited")
+    throttled.status_code = 429
+    throttled.response = MagicMock(headers={"retry-after": "0"})
+    request = MagicMock(side_effect=[throttled, "ok"])
+    limiter = MagicMock()
+
+    with patch("app.providers.rate_limiter", return_value=limiter):
+        result = registry.call("openai", "tts-1", request, model="tts-1", voice="echo")
+
+    assert result == "ok"
+    request.assert_called_with(model="tts-1", voice="echo")
+    assert limiter.acquire.call_args_list == [(("openai/tts-1", 1),)] * 2
+
+
+def test_google_api_error_codes_are_retryable():
+    unavailable = RuntimeError("service unavailable")
+    unavailable.code = 503
+    invalid = RuntimeError("invalid argument")
+    invalid.code = 400
+
+    assert providers.is_retryable(unavailable)
+    assert not providers.is_retryable(invalid)
+
+
+def test_call_does_not_retry_client_errors(registry):
+    request = MagicMock(side_effect=ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        registry.call("gemini", "gemini-pro", request, "prompt")
+    request.assert_called_once_with("prompt")
+
+
+def test_import_time_budget():
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import app.podcastCreator\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()
+
+    assert loaded == ""
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS
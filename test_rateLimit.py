@@ -0,0 +1,61 @@
+import pytest
+from app.rateLimit import FairRateLimiter, parse_rate_limits
+
+
+@pytest.fixture
+def limiter(tmpdir):
+    return FairRateLimiter(
+        str(tmpdir.join("limits.sqlite3")), limits={"openai/tts-1": 60}, window=30
+    )
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("openai/tts-1=50, gemini/gemini-pro=30,") == {
+        "openai/tts-1": 50.0,
+        "gemini/gemini-pro": 30.0,
+    }
+
+
+def test_unlimited_bucket_never_waits(limiter):
+    assert all(limiter.try_acquire("music/musicgen", now=0) == 0 for _ in range(100))
+
+
+def test_bucket_allows_a_burst_then_paces_requests(limiter):
+    granted = [limiter.try_acquire("openai/tts-1", client="a", now=0) for _ in range(11)]
+
+    assert granted[:10] == [0] * 10
+    assert granted[10] == pytest.approx(1.0)
+    assert limiter.try_acquire("openai/tts-1", client="a", now=1.0) == 0
+
+
+def test_concurrent_clients_share_the_rate_evenly(limiter):
+    bucket = "openai/tts-1"
+    limiter.try_acquire(bucket, client="a", now=0)
+    limiter.try_acquire(bucket, client="b", now=0)
+    for _ in range(5):
+        limiter.try_acquire(bucket, client="a", now=0)
+        limiter.try_acquire(bucket, client="b", now=0)
+
+    # With two active clients each gets half the burst and half the refill rate.
+    assert limiter.try_acquire(bucket, client="a", now=0) == pytest.approx(2.0)
+    assert limiter.try_acquire(bucket, client="b", now=0) == pytest.approx(2.0)
+
+
+def test_idle_clients_stop_counting_towards_the_share(limiter):
+    bucket = "openai/tts-1"
+    limiter.try_acquire(bucket, client="idle", now=0)
+    for _ in range(10):
+        limiter.try_acquire(bucket, client="busy", now=100)
+
+    assert limiter.try_acquire(bucket, client="busy", now=100) == pytest.approx(1.0)
+
+
+def test_limiter_state_is_shared_through_the_database(tmpdir):
+    path = str(tmpdir.join("limits.sqlite3"))
+    first = FairRateLimiter(path, limits={"gemini/gemini-pro": 6})
+    second = FairRateLimiter(path, limits={"gemini/gemini-pro": 6})
+
+    assert first.try_acquire("gemini/gemini-pro", client="job", now=0) == 0
+    assert second.try_acquire("gemini/gemini-pro", client="job", now=0) == pytest.approx(
+        10.0
+    )
@@ -0,0 +1,40 @@
+import threading
+
+from app.scriptGeneration import iter_concurrent_segments, parse_outline
+
+
+def test_parse_outline_reads_numbered_items():
+    outline = "Here is the plan:\n1. Intro - hello\n**2)** Rockets: launch news\n\n3: Outro"
+
+    assert parse_outline(outline, segments=4) == [
+        "Intro - hello",
+        "Rockets: launch news",
+        "Outro",
+        "",
+    ]
+
+
+def test_parse_outline_ignores_out_of_range_items():
+    assert parse_outline("0. nothing\n5. too far\n1. first\n1. again", 2) == [
+        "first",
+        "",
+    ]
+
+
+def test_iter_concurrent_segments_keeps_order_within_fan_out():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def generate(prompt):
+        barrier.wait()
+        return prompt.upper()
+
+    prompts = ["a", "b", "c", "d", "e", "f"]
+
+    assert list(iter_concurrent_segments(generate, prompts, max_in_flight=3)) == [
+        "A",
+        "B",
+        "C",
+        "D",
+        "E",
+        "F",
+    ]
@@ -0,0 +1,100 @@
+from app.scriptRevision import estimate_tokens, revise_chunks, split_chunks
+
+
+def test_estimate_tokens_grows_with_text():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a b c d") == 4
+    assert estimate_tokens("x" * 400) == 100
+
+
+def test_split_chunks_respects_budget_and_line_boundaries():
+    lines = [f"Ofir: line {i} " + "word " * 10 for i in range(20)]
+
+    chunks = split_chunks(lines, max_tokens=40)
+
+    assert [line for chunk in chunks for line in chunk] == lines
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert sum(estimate_tokens(line) for line in chunk) <= 40
+
+
+def test_split_chunks_prefers_segment_headings():
+    lines = ["Ofir: " + "word " * 10, "**Segment 2: News**", "Daniel: hi", ""]
+
+    assert split_chunks(lines, max_tokens=24) == [
+        ["Ofir: " + "word " * 10],
+        ["**Segment 2: News**", "Daniel: hi"],
+    ]
+
+
+def test_revise_chunks_keeps_order_and_passes_revised_overlap():
+    script = "\n".join(f"line {i}" for i in range(6))
+    contexts = {}
+
+    def revise(chunk, context):
+        contexts[chunk] = context
+        return chunk.upper()
+
+    revised = revise_chunks(script, revise, max_tokens=4, overlap=1)
+
+    assert revised == script.upper()
+    assert contexts == {
+        "line 0\nline 1": "",
+        "line 2\nline 3": "LINE 1",
+        "line 4\nline 5": "LINE 3",
+    }
+
+
+def test_revise_chunks_gives_the_first_chunk_the_leading_context():
+    contexts = {}
+
+    def revise(chunk, context):
+        contexts[chunk] = context
+        return chunk
+
+    script = "line 0\nline 1\nline 2\nline 3"
+    revise_chunks(script, revise, max_tokens=4, overlap=1, context="earlier")
+
+    assert contexts == {"line 0\nline 1": "earlier", "line 2\nline 3": "line 1"}
+
+
+def test_revise_chunks_keeps_the_original_of_a_failed_chunk():
+    script = "\n".join(f"line {i}" for i in range(6))
+    contexts = {}
+
+    def revise(chunk, context):
+        contexts[chunk] = context
+        if chunk.startswith("line 2"):
+            raise RuntimeError("rate limited")
+        return chunk.upper()
+
+    revised = revise_chunks(script, revise, max_tokens=4, overlap=1)
+
+    assert revised == "LINE 0\nLINE 1\nline 2\nline 3\nLINE 4\nLINE 5"
+    assert contexts["line 4\nline 5"] == "line 3"
+
+
+def test_revise_chunks_reuses_cached_chunks():
+    calls = []
+
+    def revise(chunk, context):
+        calls.append(chunk)
+        return chunk + "!"
+
+    first = revise_chunks("line 0\nline 1\nline 2", revise, max_tokens=4)
+    revise_chunks("line 0\nline 1\nline changed", revise, max_tokens=4)
+
+    assert first == "line 0\nline 1!\nline 2!"
+    assert calls == ["line 0\nline 1", "line 2", "line changed"]
+
+
+def test_revise_chunks_keeps_original_when_revision_fails():
+    calls = []
+
+    def revise(chunk, context):
+        calls.append(chunk)
+        return None
+
+    assert revise_chunks("line 0", revise) == "line 0"
+    assert revise_chunks("line 0", revise) == "line 0"
+    assert calls == ["line 0", "line 0"]
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+from app.similarity import cosine_similarities
+
+
+def test_cosine_similarities_scores_each_row():
+    vectors = np.array([[1.0, 0.0], [0.0, 2.0], [3.0, 3.0], [0.0, 0.0]])
+    similarities = cosine_similarities(np.array([2.0, 0.0]), vectors)
+    assert similarities.tolist() == pytest.approx([1.0, 0.0, np.sqrt(0.5), 0.0])
+
+
+def test_cosine_similarities_of_a_zero_query_are_zero():
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0]])
+    assert cosine_similarities(np.zeros(2), vectors).tolist() == [0.0, 0.0]
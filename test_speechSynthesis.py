@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+import pytest
+from openai import OpenAI
+from app.speechSynthesis import (
+    cached_synthesizer,
+    clip_key,
+    iter_synthesized,
+    voice_for_line,
+    with_backoff,
+)
+
+
+class FakeSpeechHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            throttle = body["input"] in server.throttle_once
+            server.throttle_once.discard(body["input"])
+        time.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+        if throttle:
+            self.send_response(429)
+            self.send_header("retry-after", "0")
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "slow down"}}')
+            return
+        payload = f"{body['voice']}:{body['input']}".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def speech_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSpeechHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.throttle_once = {"line 3"}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def test_iter_synthesized_against_fake_endpoint(speech_server):
+    host, port = speech_server.server_address
+    client = OpenAI(api_key="test", base_url=f"http://{host}:{port}/v1", max_retries=0)
+
+    def synthesize(voice, text):
+        return client.audio.speech.create(model="tts-1", voice=voice, input=text).content
+
+    lines = [f"line {i}" for i in range(12)]
+    results = list(iter_synthesized(lines, synthesize, max_in_flight=4))
+
+    assert [index for index, _, _ in results] == list(range(12))
+    assert [clip for _, _, clip in results] == [
+        f"{voice_for_line(i)}:line {i}".encode("utf-8") for i in range(12)
+    ]
+    assert 1 < speech_server.max_in_flight <= 4
+
+
+def test_voice_assignment_alternates():
+    assert [voice_for_line(i) for i in range(4)] == ["echo", "fable", "echo", "fable"]
+
+
+def test_with_backoff_does_not_retry_client_errors():
+    error = Exception("bad request")
+    error.status_code = 400
+    call = MagicMock(side_effect=error)
+
+    with pytest.raises(Exception):
+        with_backoff(call, base_delay=0)
+    call.assert_called_once()
+
+
+def test_with_backoff_gives_up_after_max_retries():
+    error = Exception("rate limited")
+    error.status_code = 429
+    call = MagicMock(side_effect=error)
+
+    with pytest.raises(Exception):
+        with_backoff(call, max_retries=2, base_delay=0)
+    assert call.call_count == 3
+
+
+def test_cached_synthesizer_only_synthesizes_new_lines(tmpdir):
+    from app.diskCache import DiskCache
+
+    cache = DiskCache(str(tmpdir.join("clips.sqlite3")))
+    synthesize = MagicMock(side_effect=lambda voice, text: f"{voice}:{text}".encode())
+    cached = cached_synthesizer(synthesize, "tts-1", cache=cache)
+
+    assert cached("echo", "Hello   there\n") == b"echo:Hello there"
+    assert cached("echo", "Hello there") == b"echo:Hello there"
+    assert cached("fable", "Hello there") == b"fable:Hello there"
+
+    assert synthesize.call_count == 2
+    assert cache.stats()["hits"] == 1
+    assert clip_key("echo", "tts-1", "a b") != clip_key("echo", "tts-hd", "a b")
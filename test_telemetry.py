@@ -0,0 +1,63 @@
+import logging
+from unittest.mock import patch
+import pytest
+from app import telemetry
+
+
+def test_spans_build_a_job_timeline():
+    telemetry.set_job("job-1")
+    with telemetry.span("gemini", segment=1):
+        pass
+    with pytest.raises(ValueError):
+        with telemetry.span("tts", voice="echo") as attrs:
+            attrs["chars"] = 12
+            raise ValueError("boom")
+    telemetry.set_job(None)
+    with telemetry.span("tts"):
+        pass
+
+    timeline = telemetry.job_timeline("job-1")
+
+    assert [(s["stage"], s["status"]) for s in timeline] == [
+        ("gemini", "ok"),
+        ("tts", "error"),
+    ]
+    assert timeline[0]["segment"] == 1
+    assert timeline[1]["voice"] == "echo" and timeline[1]["chars"] == 12
+    assert all(s["duration"] >= 0 for s in timeline)
+
+
+def test_render_metrics_in_prometheus_format():
+    telemetry.count("api_calls_total", provider="openai", model="tts-1")
+    telemetry.count("api_calls_total", 2, provider="openai", model="tts-1")
+    telemetry.observe("stage_seconds", 1.5, stage="tts")
+    telemetry.observe("stage_seconds", 0.5, stage="tts")
+    telemetry.count("cache_requests_total", cache='say "hi"', result="hit")
+
+    lines = telemetry.render_metrics().splitlines()
+
+    assert "# TYPE podcraft_api_calls_total counter" in lines
+    assert 'podcraft_api_calls_total{model="tts-1",provider="openai"} 3' in lines
+    assert "# TYPE podcraft_stage_seconds summary" in lines
+    assert 'podcraft_stage_seconds_sum{stage="tts"} 2.000000' in lines
+    assert 'podcraft_stage_seconds_count{stage="tts"} 2' in lines
+    assert 'podcraft_cache_requests_total{cache="say \\"hi\\"",result="hit"} 1' in lines
+
+
+def test_metrics_accumulate_across_flushes():
+    telemetry.count("episode_bytes_total", 100)
+    telemetry.flush()
+    telemetry.count("episode_bytes_total", 50)
+
+    assert "podcraft_episode_bytes_total 150" in telemetry.render_metrics()
+
+
+def test_configure_logging_only_once():
+    with patch.object(telemetry, "_logging_configured", False), patch.object(
+        logging, "basicConfig"
+    ) as mock_basic_config:
+        telemetry.configure_logging()
+        telemetry.configure_logging()
+
+    mock_basic_config.assert_called_once()
+    assert mock_basic_config.call_args.kwargs["filemode"] == "a"
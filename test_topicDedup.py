@@ -0,0 +1,71 @@
+import os
+import time
+from unittest.mock import MagicMock
+from app.episodeCatalog import EpisodeCatalog
+from app.topicDedup import find_duplicate, normalize_topic
+
+VECTORS = {
+    "basketball finals": [1.0, 0.0, 0.0],
+    "the nba finals": [0.98, 0.2, 0.0],
+    "jazz history": [0.0, 0.0, 1.0],
+}
+
+
+def embedder():
+    return MagicMock(side_effect=lambda texts: [VECTORS[text] for text in texts])
+
+
+def catalog_with(tmp_path, *topics):
+    catalog = EpisodeCatalog(str(tmp_path / "catalog.sqlite3"))
+    for index, topic in enumerate(topics):
+        audio = tmp_path / f"episode{index}.mp3"
+        audio.write_bytes(b"audio")
+        catalog.add(topic, str(audio), job_id=f"job{index}")
+    return catalog
+
+
+def test_normalize_topic():
+    assert normalize_topic("open ai") == normalize_topic("OpenAI") == "openai"
+    assert normalize_topic("Open-AI!") == "openai"
+
+
+def test_spelling_variants_match_without_embedding(tmp_path):
+    catalog = catalog_with(tmp_path, "OpenAI")
+    embed = embedder()
+
+    assert find_duplicate("open ai", embed, catalog=catalog)["id"] == "job0"
+    embed.assert_not_called()
+
+
+def test_similar_topic_above_threshold_matches(tmp_path):
+    catalog = catalog_with(tmp_path, "basketball finals", "jazz history")
+    embed = embedder()
+
+    match = find_duplicate("the nba finals", embed, threshold=0.9, catalog=catalog)
+    assert match["id"] == "job0"
+    assert find_duplicate("the nba finals", embed, threshold=0.999, catalog=catalog) is None
+    # Candidate topics are embedded once and then served from the index.
+    assert embed.call_args_list[1].args == (["the nba finals"],)
+
+
+def test_stale_or_deleted_episodes_never_match(tmp_path):
+    catalog = catalog_with(tmp_path, "OpenAI", "jazz history")
+    embed = embedder()
+
+    later = time.time() + 2 * 3600
+    assert find_duplicate("openai", embed, window_hours=1, catalog=catalog, now=later) is None
+    os.remove(catalog.get("job0")["path"])
+    assert find_duplicate("openai", embed, threshold=2, catalog=catalog) is None
+    embed.assert_not_called()
+
+
+def test_recap_topics_only_match_recaps_from_the_same_day(tmp_path):
+    catalog = catalog_with(tmp_path, "NBA")
+    embed = embedder()
+    same_day = catalog.get("job0")["created"]
+    next_day = same_day + 24 * 3600
+
+    assert find_duplicate("nba", embed, catalog=catalog, now=same_day)["id"] == "job0"
+    assert find_duplicate("nba", embed, window_hours=48, catalog=catalog, now=next_day) is None
+    assert find_duplicate("basketball finals", embed, catalog=catalog) is None
+    embed.assert_not_called()
@@ -0,0 +1,27 @@
+import os
+from app.workspace import DEFAULT_WORKSPACE, JobWorkspace
+
+
+def test_default_workspace_uses_working_directory_names():
+    assert DEFAULT_WORKSPACE.host1 == "host1.txt"
+    assert DEFAULT_WORKSPACE.intro == "introMusic.wav"
+    assert DEFAULT_WORKSPACE.episode("open ai") == "open_ai.mp3"
+
+
+def test_created_workspaces_are_isolated(tmpdir):
+    first = JobWorkspace.create(str(tmpdir))
+    second = JobWorkspace.create(str(tmpdir))
+
+    assert first.job_id != second.job_id
+    assert first.revised != second.revised
+    assert os.path.dirname(first.revised) == str(tmpdir.join(first.job_id))
+
+
+def test_workspace_cleanup_removes_artifacts(tmpdir):
+    workspace = JobWorkspace.create(str(tmpdir), job_id="job")
+    with open(workspace.merged, "w") as file:
+        file.write("line\n")
+
+    workspace.cleanup()
+
+    assert not os.path.exists(workspace.root)